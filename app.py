@@ -1,9 +1,24 @@
 # -*- coding: utf-8 -*-
+import os
+
 import dash
+import flask
 
 external_stylesheets = ['https://www.w3schools.com/w3css/4/w3.css']
 
+# compress all responses (including the callback responses) with brotli or gzip, see Flask-Compress,
+# the settings have to be in place before dash initializes Flask-Compress
+server = flask.Flask(__name__)
+server.config.update(
+    COMPRESS_ALGORITHM=['br', 'gzip'],
+    COMPRESS_LEVEL=6,
+    COMPRESS_BR_LEVEL=4,
+    COMPRESS_MIN_SIZE=500,
+)
+
 app = dash.Dash(__name__,
+                server=server,
+                compress=True,
                 external_stylesheets=external_stylesheets,
                 meta_tags=[
                     {
@@ -17,3 +32,7 @@ app.title = "Biostatistics"
 app.config.suppress_callback_exceptions = True
 app.css.config.serve_locally = True
 app.scripts.config.serve_locally = True
+
+# render the figures of the distribution pages in the browser (clientside callbacks)
+# instead of sending a request to the server for every slider move
+clientside_rendering = os.environ.get('CLIENTSIDE_RENDERING', '0') == '1'
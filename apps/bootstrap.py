@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# bootstrap confidence intervals of the effect size of uploaded datasets (see apps/empirical.py): the
+# resamples are drawn in batches from the binned summaries and spread over the offload processes, the
+# intervals are cached per dataset
+import json
+import os
+import tempfile
+from functools import lru_cache
+
+import numpy as np
+
+from apps.empirical import upload_dir, load_dataset, load_summary, hedges_correction
+from apps.offload import offload_map
+
+bootstrap_resamples = int(os.environ.get('BOOTSTRAP_RESAMPLES', 10000))
+bootstrap_batch = 1000
+confidence = 0.95
+
+
+def bin_moments(moments, histogram):
+    """
+    probabilities, mean deviations from the group mean and mean squared deviations of the values of the
+    non-empty bins
+    """
+    occupied = histogram.counts > 0
+    counts = histogram.counts[occupied]
+    means = histogram.sums[occupied] / counts
+    # the group mean is subtracted before squaring, which avoids cancellation for values far from 'ref'
+    deviations = means + (histogram.ref - moments.mean)
+    spread = np.maximum(histogram.squares[occupied] / counts - means**2, 0.)
+    return counts / counts.sum(), deviations, deviations**2 + spread
+
+
+def resample_d(groups, seed, size):
+    """
+    Cohen's d of 'size' resamples: a resample of a group is a multinomial draw of the bin counts
+    (equivalent to drawing n indices with replacement and counting them per bin, but O(bins) instead of
+    O(n) per resample), the sums of the resampled values follow from the means per bin
+    """
+    rng = np.random.default_rng(seed)
+    means = []
+    squares = []
+    for n, mean, probabilities, deviations, mean_squares in groups:
+        draws = rng.multinomial(n, probabilities, size=size).astype(float)
+        # deviation of the resampled mean from the group mean
+        shift = draws @ deviations / n
+        means.append(mean + shift)
+        squares.append(draws @ mean_squares - n * shift**2)
+    n_1, n_2 = groups[0][0], groups[1][0]
+    pooled = np.sqrt((squares[0] + squares[1]) / (n_1 + n_2 - 2))
+    return (means[1] - means[0]) / pooled
+
+
+def draw_resamples(summary, n_resamples, seed):
+    """
+    Cohen's d of 'n_resamples' bootstrap resamples, batches of resamples with independent seeds run in
+    parallel
+    """
+    groups = [(m.n, m.mean) + bin_moments(m, h) for m, h in zip(summary.moments, summary.histograms)]
+    sizes = [bootstrap_batch] * (n_resamples // bootstrap_batch)
+    if n_resamples % bootstrap_batch:
+        sizes.append(n_resamples % bootstrap_batch)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    return np.concatenate(offload_map(resample_d, [(groups, s, size) for s, size in zip(seeds, sizes)]))
+
+
+def ci_path(dataset_id):
+    return os.path.join(upload_dir, f'{dataset_id}-ci-{bootstrap_resamples}.json')
+
+
+def bootstrap_ci(dataset_id):
+    """
+    percentile bootstrap confidence intervals of Cohen's d and Hedges' g of an uploaded dataset, stored
+    next to the dataset for the other workers; the resamples are seeded by the dataset id, hence
+    reproducible; None for unknown (or expired) ids, which are not cached (see load_dataset)
+    """
+    if load_dataset(dataset_id) is None:
+        return None
+    return dataset_ci(dataset_id)
+
+
+@lru_cache(maxsize=64)
+def dataset_ci(dataset_id):
+    path = ci_path(dataset_id)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+
+    summary = load_summary(dataset_id)
+    d = draw_resamples(summary, bootstrap_resamples, int(dataset_id, 16))
+    alpha = 1. - confidence
+    d_lo, d_hi = np.quantile(d[np.isfinite(d)], [alpha / 2., 1. - alpha / 2.])
+    correction = hedges_correction(summary.moments[0].n + summary.moments[1].n - 2)
+    ci = {'confidence': confidence, 'resamples': bootstrap_resamples,
+          'd': [float(d_lo), float(d_hi)], 'g': [float(correction * d_lo), float(correction * d_hi)]}
+
+    # written to a temporary file first, the rename is atomic
+    fd, tmp = tempfile.mkstemp(dir=upload_dir, suffix='.json')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(ci, f)
+    os.replace(tmp, path)
+    return ci
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+# central limit theorem: the means of samples from a skewed population are drawn batch by batch while the
+# page is open, the running histogram of a stream is kept in the session store (see apps/sessions.py) and
+# only the counts added by a batch are sent, the browser adds them up and draws the histogram (see
+# 'sampling' in assets/clientside.js)
+import collections
+import os
+import secrets
+
+import dash_core_components as dcc
+import dash_html_components as html
+from dash.dependencies import Input, Output, State, ClientsideFunction
+from dash.exceptions import PreventUpdate
+
+import numpy as np
+import scipy.stats
+
+from app import app
+from apps.figure_cache import memoize
+from apps.commons import gen_header, gen_dist_layout, common_fig_layout, build_figure, scatter, bar
+from apps.empirical import RunningMoments
+from apps.explorer import slider_range, param_value
+from apps.montecarlo import populations, sample_means
+from apps.sessions import session_store, session_outputs, current_session, new_handle
+
+# global variables
+# sample means per batch and batches per stream, one batch per tick of the interval
+sampling_batch = int(os.environ.get('SAMPLING_BATCH', 500))
+sampling_max_batches = int(os.environ.get('SAMPLING_MAX_BATCHES', 200))
+sampling_interval = int(os.environ.get('SAMPLING_INTERVAL_MS', 500))
+
+# fixed bins of the standardized means, the means outside are counted but not shown
+z_min, z_max, n_bins = -4., 4., 80
+bin_width = (z_max - z_min) / n_bins
+centers = z_min + (np.arange(n_bins) + 0.5) * bin_width
+z = np.linspace(z_min, z_max, 201)
+
+labels = collections.OrderedDict([
+    ('exponential', 'exponential'),
+    ('chi2', '\u03C7\u00B2 (1 df)'),
+    ('uniform', 'uniform'),
+    ('lognormal', 'log-normal'),
+])
+
+# sample size (log10 slider)
+n_param = {'min': 1, 'max': 100, 'step': 0.01, 'log10': True, 'value': 2}
+
+# components of the app
+# header text plus logo
+header = gen_header("Central Limit Theorem", logo='/assets/icons8-return-96.png', href='/toc')
+
+n_min, n_max, n_step, n_value = slider_range(n_param)
+
+controls = html.Div([
+    html.P("""
+    The central limit theorem states that the mean of n independent draws from a population with finite
+    variance is approximately normally distributed for large n, whatever the shape of the population.
+    """),
+    html.P(f"""
+    The page draws {sampling_batch} samples of size n per tick, standardizes their means by the mean \u03BC
+    and the standard deviation \u03C3 of the population and adds them to the histogram, which approaches the
+    standard normal distribution the faster, the larger n and the less skewed the population.
+    """),
+    html.P('population:', className="control_label"),
+    dcc.RadioItems(id='clt-population',
+                   options=[{'label': label, 'value': name} for name, label in labels.items()],
+                   value='exponential',
+                   labelStyle={'display': 'block'},
+                   className='dcc_control'),
+    html.P('Use the slider to set the sample size n:', className="control_label"),
+    dcc.Slider(id='clt-n-slider',
+               min=n_min, max=n_max, step=n_step, value=n_value,
+               marks={float(np.log10(mark)): f'{mark:d}' for mark in [1, 2, 5, 10, 20, 50, 100]},
+               className='dcc_control'),
+    html.Button('pause / continue', id='clt-pause', n_clicks=0, className='w3-button w3-border w3-margin-top'),
+], className="w3-container w3-col w3-mobile w3-padding", style={'width': '25%'})
+
+
+def gen_means_base():
+    """
+    static parts of the histogram figure, the bar heights and the title are filled in by
+    'sampling.means_figure'
+    """
+    data = [
+        bar(x=centers, y=np.zeros(n_bins), width=bin_width, name='sample means', opacity=0.6),
+        scatter(x=z, y=scipy.stats.norm.pdf(z), mode='lines', name='std. normal<br>distr.',
+                line={'dash': 'dash', 'width': 1.5, 'color': 'black'}),
+    ]
+    fig_layout = {
+        'xaxis': {'title': {'text': '(mean - \u03BC) / (\u03C3 / \u221An)'}, 'range': [z_min, z_max]},
+        'yaxis': {'title': {'text': 'density'}, 'range': [0., 0.8]},
+        'legend': {'xanchor': 'right', 'yanchor': 'top', 'x': 1, 'y': 1},
+        'bargap': 0,
+        'title': {'text': '', 'xref': "paper", 'x': 0}
+    }
+    fig_layout.update(common_fig_layout)
+    base = build_figure(data, fig_layout)
+    base.update(width=bin_width, labels=labels)
+    return base
+
+
+stores = [
+    # counts added by the latest batch (server) and all counts (browser)
+    dcc.Store(id='clt-means-base', data=gen_means_base()),
+    dcc.Store(id='clt-delta'),
+    dcc.Store(id='clt-histogram'),
+    dcc.Interval(id='clt-interval', interval=sampling_interval),
+]
+
+layout = gen_dist_layout(header, controls, dcc.Graph(id='clt-means-display'),
+                         dcc.Graph(id='clt-population-display'), stores=stores)
+
+
+def observations(slider_value):
+    # the sample size set by the log10 slider
+    return int(round(param_value(n_param, slider_value)))
+
+
+class SamplingStream(object):
+    """
+    running histogram of the standardized sample means of a stream (see apps.montecarlo.sample_means),
+    O(bins) memory
+    """
+
+    def __init__(self, population, n, seed, batches=0, counts=None, moments=None):
+        self.population = population
+        self.n = n
+        self.seed = seed
+        self.batches = batches
+        self.counts = np.zeros(n_bins, dtype=np.int64) if counts is None else counts
+        self.moments = RunningMoments() if moments is None else moments
+        self._means = sample_means(population, n, seed, sampling_batch, start=batches)
+
+    def advance(self):
+        """
+        add the next batch, returns the counts added per bin
+        """
+        means = next(self._means)
+        index = np.floor((means - z_min) / bin_width).astype(np.int64)
+        delta = np.bincount(index[(index >= 0) & (index < n_bins)], minlength=n_bins)
+        self.counts += delta
+        self.moments.update(means)
+        self.batches += 1
+        return delta
+
+    def save(self):
+        return {'population': self.population, 'n': self.n, 'seed': self.seed, 'batches': self.batches,
+                'counts': self.counts,
+                'moments': np.array([self.moments.n, self.moments.mean, self.moments.m2])}
+
+    @classmethod
+    def load(cls, arrays):
+        n_means, mean, m2 = arrays['moments']
+        return cls(str(arrays['population']), int(arrays['n']), int(arrays['seed']), int(arrays['batches']),
+                   arrays['counts'], RunningMoments(int(n_means), mean, m2))
+
+
+def load_stream(handle, population, n, seed, batches):
+    """
+    the stream of a handle after 'batches' batches from the session store; a stream missing in the store
+    (expired or evicted) or ahead of the browser is replayed, as every batch has its own seed
+    """
+    arrays = session_store.get(current_session(), handle)
+    stream = SamplingStream.load(arrays) if arrays is not None else None
+    if stream is None or stream.batches > batches:
+        stream = SamplingStream(population, n, seed)
+    while stream.batches < batches:
+        stream.advance()
+    return stream
+
+
+@app.callback(Output('clt-delta', 'data'),
+              [Input('clt-interval', 'n_intervals'),
+               Input('clt-population', 'value'),
+               Input('clt-n-slider', 'value')],
+              [State('clt-delta', 'data')])
+def sample(n_intervals, population, n_slider, previous):
+    n = observations(n_slider)
+    if previous is None or previous['population'] != population or previous['n'] != n:
+        # a new stream for new settings
+        previous = {'id': new_handle(), 'seed': secrets.randbits(31), 'batches': 0}
+    elif previous['batches'] >= sampling_max_batches:
+        raise PreventUpdate
+
+    stream = load_stream(previous['id'], population, n, previous['seed'], previous['batches'])
+    delta = stream.advance()
+    session_store.put(current_session(), previous['id'], stream.save())
+    return {
+        'id': previous['id'], 'population': population, 'n': n, 'seed': stream.seed,
+        'start': previous['batches'], 'batches': stream.batches, 'counts': delta.tolist(),
+        'means': stream.moments.n, 'mean': stream.moments.mean, 'std': stream.moments.std,
+        'done': stream.batches >= sampling_max_batches,
+    }
+
+
+# the streams are stored per session, the identical first requests of all browsers must not share a stream
+session_outputs.add('clt-delta.data')
+
+
+app.clientside_callback(
+    ClientsideFunction('sampling', 'accumulate'),
+    Output('clt-histogram', 'data'),
+    [Input('clt-delta', 'data')],
+    [State('clt-histogram', 'data')]
+)
+
+app.clientside_callback(
+    ClientsideFunction('sampling', 'means_figure'),
+    Output('clt-means-display', 'figure'),
+    [Input('clt-histogram', 'data'),
+     Input('clt-means-base', 'data')]
+)
+
+app.clientside_callback(
+    ClientsideFunction('sampling', 'paused'),
+    Output('clt-interval', 'disabled'),
+    [Input('clt-pause', 'n_clicks'),
+     Input('clt-delta', 'data')]
+)
+
+
+def gen_states():
+    return [(population,) for population in populations]
+
+
+@memoize(states=gen_states)
+@app.callback(Output('clt-population-display', 'figure'),
+              [Input('clt-population', 'value')])
+def gen_population_figure(population):
+    dist = populations[population]['dist']
+    # the pdf of the chi2 distribution diverges at 0
+    x = np.linspace(dist.ppf(0.001), dist.ppf(0.99), 400)
+    data = [scatter(x=x, y=dist.pdf(x), mode='lines', name=labels[population], line={'width': 3})]
+    fig_layout = {
+        'xaxis': {'title': {'text': 'x'}},
+        'yaxis': {'title': {'text': 'density'}},
+        'legend': {'xanchor': 'right', 'yanchor': 'top', 'x': 1, 'y': 1},
+        'title': {'text': f"Population: {labels[population]}<br>\u03BC={dist.mean():.3f}, \u03C3={dist.std():.3f}, "
+                          f"skewness {float(dist.stats(moments='s')):.2f}",
+                  'xref': "paper", 'x': 0}
+    }
+    fig_layout.update(common_fig_layout)
+    return build_figure(data, fig_layout)
+
+
+if __name__ == '__main__':
+    app.title = "Central Limit Theorem"
+    app.layout = layout
+    app.run_server(debug=True)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+# coalescing of the callback requests of slider drags: superseded requests of a browser tab are dropped and
+# identical concurrent requests (of any session) share a single computation
+import hashlib
+import json
+import os
+import threading
+import time
+
+import flask
+
+from apps.sessions import session_cookie, session_outputs
+
+coalescing = os.environ.get('COALESCE', '1') == '1'
+# header with the id of the browser tab, set by assets/tab.js
+tab_header = 'X-Dash-Tab'
+coalesce_timeout = float(os.environ.get('COALESCE_TIMEOUT', 30))
+
+
+class Slot(object):
+    """
+    requests of a browser tab for an output: generation of the newest request, number of running and
+    waiting requests
+    """
+
+    def __init__(self):
+        self.generation = 0
+        self.running = 0
+        self.waiting = 0
+
+
+class Flight(object):
+    """
+    a running computation, its response (data, status, mimetype) is shared with identical requests
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+
+
+class Coalescer(object):
+    """
+    per (session, tab, output) only one request is computed at a time, of the requests waiting for it only
+    the newest one is computed next and the others are dropped; a computation is shared by the identical
+    requests arriving while it runs
+    """
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.superseded = 0
+        self.shared = 0
+        self._slots = {}
+        self._flights = {}
+        self._condition = threading.Condition()
+
+    def acquire(self, key):
+        """
+        wait until the previous request for 'key' is done, False if a newer request arrived meanwhile
+        """
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = Slot()
+            slot.generation += 1
+            generation = slot.generation
+            # waiting older requests are superseded now
+            self._condition.notify_all()
+
+            slot.waiting += 1
+            while slot.running > 0 and slot.generation == generation:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0.:
+                    break
+                self._condition.wait(remaining)
+            slot.waiting -= 1
+
+            if slot.generation != generation:
+                self.superseded += 1
+                self._discard(key, slot)
+                return False
+            slot.running += 1
+            return True
+
+    def release(self, key):
+        with self._condition:
+            slot = self._slots[key]
+            slot.running -= 1
+            self._condition.notify_all()
+            self._discard(key, slot)
+
+    def _discard(self, key, slot):
+        if slot.running == 0 and slot.waiting == 0:
+            del self._slots[key]
+
+    def share(self, key, compute):
+        """
+        the response of compute() (a flask.Response), computed once for identical concurrent requests
+        """
+        with self._condition:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+            else:
+                self.shared += 1
+
+        if not leader:
+            if flight.done.wait(self.timeout) and flight.response is not None:
+                data, status, mimetype = flight.response
+                return flask.Response(data, status=status, mimetype=mimetype)
+            # the computation failed or timed out
+            return compute()
+
+        try:
+            response = compute()
+            flight.response = response.get_data(), response.status_code, response.mimetype
+            return response
+        finally:
+            with self._condition:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self):
+        with self._condition:
+            return {'superseded': self.superseded, 'shared': self.shared, 'in_flight': len(self._flights)}
+
+
+coalescer = Coalescer(coalesce_timeout)
+
+
+def request_key(body, session):
+    """
+    key of identical callback requests, which share a computation; the requests of the outputs depending on
+    the session are only identical within the session
+    """
+    scope = session if body['output'] in session_outputs else None
+    request = json.dumps([body['output'], body.get('inputs'), body.get('state'), scope], sort_keys=True)
+    return hashlib.sha1(request.encode('utf-8')).digest()
+
+
+def coalesce(app):
+    """
+    coalesce the requests to the callback endpoint of 'app', the sessions are identified by the cookie of
+    apps/sessions.py
+    """
+    if not coalescing:
+        return
+
+    endpoint = app.config.routes_pathname_prefix + '_dash-update-component'
+    dispatch = app.server.view_functions[endpoint]
+
+    def coalesced_dispatch():
+        body = flask.request.get_json()
+        session = flask.request.cookies.get(session_cookie)
+        # the tabs of a browser share the session cookie, only the requests of the same tab supersede
+        # each other (requests without tab id never do)
+        tab = flask.request.headers.get(tab_header)
+        slot_key = (session, tab, body['output']) if tab else None
+        if slot_key is not None and not coalescer.acquire(slot_key):
+            # a newer request for the same output is already waiting, the browser ignores this one
+            return flask.Response(status=204)
+
+        try:
+            return coalescer.share(request_key(body, session), dispatch)
+        finally:
+            if slot_key is not None:
+                coalescer.release(slot_key)
+
+    app.server.view_functions[endpoint] = coalesced_dispatch
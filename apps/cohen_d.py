@@ -1,21 +1,30 @@
 # -*- coding: utf-8 -*-
+import itertools
+from urllib.parse import parse_qs
+
 import dash_core_components as dcc
 import dash_html_components as html
 from dash.dependencies import Input, Output
-
-import plotly.graph_objs as go
+from dash.exceptions import PreventUpdate
 
 import numpy as np
 import scipy.stats
 
 from app import app
-from apps.commons import gen_header, common_fig_layout
+from apps.figure_cache import memoize
+from apps.offload import offload
+from apps.commons import gen_header, common_fig_layout, slider_values, build_figure, scatter
+from apps.empirical import load_dataset, binned_kde, silverman_bandwidth
+from apps.bootstrap import bootstrap_ci
 
 # global variables
 x_max = 6.
 n_points = 200
 x = np.linspace(-x_max, x_max, n_points)
 
+# number of bins of the histograms of empirical data
+n_display_bins = 60
+
 # components of the app
 # header text plus logo
 header = gen_header("Cohen's d-value", logo='/assets/icons8-return-96.png', href='/toc')
@@ -67,10 +76,10 @@ layout = html.Div([
             """),
             html.Img(src='/assets/Cohen_d.svg', style={'display': 'block', 'margin-left': 'auto',
                                                        'margin-right': 'auto', 'width': '67%'}),
-            html.P("""
+            html.P(["""
             The d-value is a dimensionless quantity and can be employed across scientific disciplines. It is frequently
-            used in estimating necessary sample sizes for statistical testing.
-            """),
+            used in estimating necessary sample sizes for statistical testing (see """,
+                    html.A('power analysis', href='/power_analysis'), ').']),
             html.P("""
             Smaller d-values indicate a stronger overlap of the distributions of measured quantities for the two groups.
             Use the sliders to change the values for \u0394\u03BC, \u03C3\u2081 and \u03C3\u2082.
@@ -82,18 +91,47 @@ layout = html.Div([
         ], className='w3-container w3-col m9 w3-padding')
     ], className='w3-row'),
 
+    # empirical data, uploaded with assets/upload.js and summarized by apps/empirical.py, the page is
+    # reloaded with the id of the dataset in the query string
+    html.Div([
+        html.Div([
+            html.H4('Empirical data'),
+            html.P("""
+            Upload a csv file with the measured quantities of two groups, either as two columns (one per group)
+            or as rows of group label and value (header 'group,value'). The d-value is calculated using the
+            sample means and the pooled sample standard deviation.
+            """),
+            html.Button('upload csv file', className='w3-button w3-light-grey',
+                        **{'data-upload': '/upload/cohen_d'}),
+            dcc.RadioItems(id='data-curve',
+                           options=[{'label': 'kernel density estimate', 'value': 'kde'},
+                                    {'label': 'histogram', 'value': 'histogram'}],
+                           value='kde',
+                           className='dcc_control')
+        ], className='w3-container w3-col m3 w3-padding'),
+        html.Div(id='data-display', className='w3-container w3-col m9 w3-padding')
+    ], className='w3-row'),
+
 ], className='w3-container w3-padding'
 )
 
 
+def gen_states():
+    # all combinations of the slider values, see 'sliders'
+    sigmas = slider_values(0.5, 2.0, 0.1)
+    return itertools.product(slider_values(0., 5., 0.2), sigmas, sigmas)
+
+
+@memoize(states=gen_states)
 @app.callback(
     Output('fig-display', 'figure'),
     [Input('delta-mu', 'value'),
      Input('sigma-1', 'value'),
      Input('sigma-2', 'value')]
 )
+@offload
 def gen_figure(delta_mu, sigma_1, sigma_2):
-    control = go.Scatter(
+    control = scatter(
         x=x,
         y=scipy.stats.norm.pdf(x, scale=sigma_1),
         mode='none',
@@ -103,7 +141,7 @@ def gen_figure(delta_mu, sigma_1, sigma_2):
         showlegend=True,
     )
 
-    effect = go.Scatter(
+    effect = scatter(
         x=x + delta_mu,
         y=scipy.stats.norm.pdf(x, scale=sigma_2),
         mode='none',
@@ -125,11 +163,86 @@ def gen_figure(delta_mu, sigma_1, sigma_2):
         'xaxis': {'title': {'text': 'measured quantity'}},
         'yaxis': {'title': {'text': 'pdf'}},
         'legend': {'xanchor': 'right', 'yanchor': 'top', 'x': 1, 'y': 1},
-        'title': go.layout.Title(text=fig_title, xref="paper", x=0)
+        'title': {'text': fig_title, 'xref': "paper", 'x': 0}
+    }
+    fig_layout.update(common_fig_layout)
+
+    return build_figure(data, fig_layout)
+
+
+def gen_curves(summary, curve):
+    """
+    x and density of both groups of a dataset, as kernel density estimates or histograms
+    """
+    curves = []
+    for moments, histogram in zip(summary.moments, summary.histograms):
+        if curve == 'kde':
+            curves.append(binned_kde(histogram, silverman_bandwidth(moments)))
+        else:
+            centers, counts, width = histogram.rebin(n_display_bins)
+            curves.append((centers, counts / (counts.sum() * width)))
+    return curves
+
+
+@app.callback(
+    Output('data-display', 'children'),
+    [Input('url', 'search'),
+     Input('data-curve', 'value')]
+)
+# not offloaded as a whole: the curves are computed from the binned summary in milliseconds, while the
+# bootstrap resamples are spread over the offload processes
+def gen_data_figure(search, curve):
+    query = parse_qs((search or '').lstrip('?'))
+    if 'error' in query:
+        return html.P(f"The upload failed: {query['error'][0]}", className='w3-text-red')
+    if 'dataset' not in query:
+        return html.P('No dataset uploaded yet.')
+    summary = load_dataset(query['dataset'][0])
+    if summary is None:
+        return html.P('The dataset was not found, please upload it again.', className='w3-text-red')
+
+    data = []
+    for name, (x_values, density), color in zip(summary.names, gen_curves(summary, curve),
+                                                ['rgba(152,78,163,0.5)', 'rgba(77,175,74,0.5)']):
+        data.append(scatter(
+            x=x_values,
+            y=density,
+            mode='none',
+            fill='tozeroy',
+            fillcolor=color,
+            line={'shape': 'linear' if curve == 'kde' else 'hvh'},
+            name=name,
+            showlegend=True,
+        ))
+
+    (n_1, n_2), (mean_1, mean_2), (std_1, std_2) = zip(*[(m.n, m.mean, m.std) for m in summary.moments])
+    try:
+        # None if the dataset expired meanwhile
+        ci = bootstrap_ci(query['dataset'][0])
+    except PreventUpdate:
+        # the offload processes are busy, the interval is computed on the next request
+        ci = None
+    if ci is None:
+        effect_size = f"d={summary.cohen_d():.3f}, Hedges' g={summary.hedges_g():.3f}"
+    else:
+        d_lo, d_hi = ci['d']
+        g_lo, g_hi = ci['g']
+        percent = round(100 * ci['confidence'])
+        effect_size = f"d={summary.cohen_d():.3f} ({percent}% CI {d_lo:.3f} to {d_hi:.3f}), " + \
+                      f"Hedges' g={summary.hedges_g():.3f} ({percent}% CI {g_lo:.3f} to {g_hi:.3f})"
+    fig_title = f"Effect size: {effect_size}<br>" + \
+                f"(n<sub>1</sub>={n_1}, mean<sub>1</sub>={mean_1:.4g}, s<sub>1</sub>={std_1:.4g}; " + \
+                f"n<sub>2</sub>={n_2}, mean<sub>2</sub>={mean_2:.4g}, s<sub>2</sub>={std_2:.4g})"
+
+    fig_layout = {
+        'xaxis': {'title': {'text': 'measured quantity'}},
+        'yaxis': {'title': {'text': 'density'}},
+        'legend': {'xanchor': 'right', 'yanchor': 'top', 'x': 1, 'y': 1},
+        'title': {'text': fig_title, 'xref': "paper", 'x': 0}
     }
     fig_layout.update(common_fig_layout)
 
-    return go.Figure(data=data, layout=fig_layout)
+    return dcc.Graph(figure=build_figure(data, fig_layout))
 
 
 if __name__ == '__main__':
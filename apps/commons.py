@@ -1,9 +1,32 @@
 # -*- coding: utf-8 -*-
 # common layout functions
+import json
+import os
+from functools import lru_cache
+
 import dash_core_components as dcc
 import dash_html_components as html
+from dash.dependencies import Input, Output, State, ClientsideFunction
 import plotly.graph_objs as go
+import plotly.io
+import plotly.utils
+
+import numpy as np
+
+from apps.figure_cache import memoize
+
+
+# round the trace data of the figures to 'figure_digits' significant digits and strip unused template
+# parts before sending them to the browser
+slim_figures = os.environ.get('SLIM_FIGURES', '1') == '1'
+figure_digits = 4
 
+# the figures are put together as dicts by build_figure, VALIDATE_FIGURES=1 builds them as go.Figure
+# (validated by plotly, e.g. while developing a page)
+validate_figures = os.environ.get('VALIDATE_FIGURES', '0') == '1'
+
+# parts of the plotly templates, which are not used by 2d cartesian figures
+unused_template_layout = ('geo', 'mapbox', 'polar', 'scene', 'ternary')
 
 # common figure layouts
 common_fig_layout = {
@@ -17,7 +40,7 @@ pdf_layout = {
     'xaxis': {'title': {'text': 'random variable'}},
     'yaxis': {'title': {'text': 'pdf'}},
     'legend': {'xanchor': 'right', 'yanchor': 'top', 'x': 1, 'y': 1},
-    'title': go.layout.Title(text="Probability density function", xref="paper", x=0)
+    'title': {'text': "Probability density function", 'xref': "paper", 'x': 0}
 }
 pdf_layout.update(common_fig_layout)
 
@@ -25,11 +48,109 @@ cdf_layout = {
     'xaxis': {'title': {'text': 'random variable'}},
     'yaxis': {'title': {'text': 'cdf'}},
     'legend': {'xanchor': 'right', 'yanchor': 'bottom', 'x': 1, 'y': 0.05},
-    'title': go.layout.Title(text="Cumulative distribution function", xref="paper", x=0)
+    'title': {'text': "Cumulative distribution function", 'xref': "paper", 'x': 0}
 }
 cdf_layout.update(common_fig_layout)
 
 
+def round_significant(values, digits=figure_digits):
+    """
+    round to a number of significant digits, such that the values are serialized as short decimals
+    """
+    values = np.asarray(values, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        exponents = np.floor(np.log10(np.abs(values)))
+    exponents[~np.isfinite(exponents)] = 0.
+    decimals = digits - 1 - exponents
+    # dividing by an exact power of ten gives the double closest to the rounded decimal
+    scale = 10.**np.abs(decimals)
+    return np.where(decimals >= 0, np.round(values * scale) / scale, np.round(values / scale) * scale)
+
+
+def slim_template(template, trace_types):
+    """
+    reduce an expanded plotly template to the given trace types and 2d cartesian layouts
+    """
+    template = dict(template)
+    template['data'] = {k: v for k, v in template.get('data', {}).items() if k in trace_types}
+    template['layout'] = {k: v for k, v in template.get('layout', {}).items() if k not in unused_template_layout}
+    return template
+
+
+def round_traces(data, digits):
+    # round the x and y data of the traces in place
+    for trace in data:
+        for key in ('x', 'y'):
+            values = trace.get(key)
+            if values is not None and len(values) > 0 and np.asarray(values).dtype.kind == 'f':
+                trace[key] = round_significant(values, digits)
+
+
+def slim_figure(fig, digits=figure_digits):
+    """
+    convert a go.Figure to a dict with rounded trace data and a reduced template (if 'slim_figures')
+    """
+    if not slim_figures:
+        return fig
+
+    fig = fig.to_plotly_json()
+    round_traces(fig['data'], digits)
+
+    layout = fig['layout']
+    if isinstance(layout.get('template'), dict):
+        layout['template'] = slim_template(layout['template'], {trace.get('type', 'scatter') for trace in fig['data']})
+
+    return fig
+
+
+@lru_cache(maxsize=None)
+def expanded_template(name, trace_types, slim):
+    """
+    the named plotly template as a dict, expanded and validated once (reduced to the trace types if
+    'slim'), shared by all figures
+    """
+    template = plotly.io.templates[name].to_plotly_json()
+    return slim_template(template, trace_types) if slim else template
+
+
+def scatter(**props):
+    """
+    scatter trace as a dict, the counterpart of go.Scatter for build_figure
+    """
+    props['type'] = 'scatter'
+    return props
+
+
+def bar(**props):
+    """
+    bar trace as a dict, the counterpart of go.Bar for build_figure
+    """
+    props['type'] = 'bar'
+    return props
+
+
+def build_figure(data, layout, digits=figure_digits):
+    """
+    figure dict of trace dicts (see scatter) and a layout dict, the same as slim_figure(go.Figure(...))
+    but without the validation of every property by plotly, which took most of the time of the
+    callbacks (in particular the template, which was copied and validated for every figure); the traces
+    and layouts of the pages are valid by construction, which can be checked with 'validate_figures'
+    """
+    if validate_figures:
+        return slim_figure(go.Figure(data=data, layout=layout), digits)
+
+    data = [dict(trace) for trace in data]
+    if slim_figures:
+        round_traces(data, digits)
+
+    layout = dict(layout)
+    if isinstance(layout.get('template'), str):
+        layout['template'] = expanded_template(layout['template'],
+                                               frozenset(trace.get('type', 'scatter') for trace in data),
+                                               slim_figures)
+    return {'data': data, 'layout': layout}
+
+
 def gen_header(title, logo=None, href=None):
     """
     generate the header of the page containing a title and potentially a logo
@@ -57,8 +178,17 @@ def gen_header(title, logo=None, href=None):
     return header
 
 
-def gen_dist_layout(header, slider, pdf_display, cdf_display):
-    return html.Div([
+# areas under the pdf shaded for a click on the cdf, see register_dist_callbacks
+area_modes = [
+    ('left', 'left of the clicked value'),
+    ('right', 'right of the clicked value'),
+    ('both', 'in both tails (two-sided)'),
+    ('between', 'between the last two clicked values'),
+]
+
+
+def gen_dist_layout(header, slider, pdf_display, cdf_display, stores=()):
+    children = [
         html.Div(header, className='w3-row'),
         html.Div([
             slider,
@@ -69,4 +199,118 @@ def gen_dist_layout(header, slider, pdf_display, cdf_display):
                 cdf_display
             ], className='w3-container w3-col w3-mobile w3-padding', style={'width': '37.5%'})
         ], className='w3-row')
-    ], className='w3-container w3-padding')
+    ]
+    children.extend(stores)
+
+    return html.Div(children, className='w3-container w3-padding')
+
+
+def gen_area_selector(area_id):
+    return dcc.RadioItems(id=area_id,
+                          options=[{'label': label, 'value': mode} for mode, label in area_modes],
+                          value='left',
+                          labelStyle={'display': 'block'},
+                          className='dcc_control')
+
+
+def gen_area_stores(pdf_id, cdf_id):
+    """
+    stores of the pdf figure without shaded area and of the last two clicked points of the cdf, see
+    register_dist_callbacks
+    """
+    return [dcc.Store(id=f'{pdf_id}-base'), dcc.Store(id=f'{cdf_id}-clicks', data=[])]
+
+
+def format_label(label, value):
+    """
+    legend entry of a distribution, 'label' contains prefix, number of digits and suffix
+    """
+    return f"{label['prefix']}{value:.{label['digits']}f}{label['suffix']}"
+
+
+def gen_dist_store(store_id, x, pdf_table, cdf_table, label, slider_log10, pdf_std, cdf_std,
+                   pdf_fig_layout=pdf_layout, cdf_fig_layout=cdf_layout):
+    """
+    collect the interpolation tables of a distribution page (see apps/distributions.py) together with
+    the reference traces and figure layouts in a dcc.Store, which is shipped to the browser once
+    """
+    # plotly.js does not know named templates, hence the layouts are expanded by plotly
+    pdf_fig = build_figure([pdf_std], pdf_fig_layout)
+    cdf_fig = build_figure([cdf_std], cdf_fig_layout)
+    tables = {
+        'x': x,
+        'pdf': pdf_table.to_dict(),
+        'cdf': cdf_table.to_dict(),
+        'label': label,
+        # the slider sets log10 of the parameter
+        'slider_log10': slider_log10,
+        'pdf_std': pdf_fig['data'][0],
+        'cdf_std': cdf_fig['data'][0],
+        'pdf_layout': pdf_fig['layout'],
+        'cdf_layout': cdf_fig['layout'],
+    }
+    if slim_figures:
+        tables['x'] = round_significant(x)
+        for key in ('pdf', 'cdf'):
+            tables[key]['values'] = round_significant(tables[key]['values'])
+    data = json.loads(json.dumps(tables, cls=plotly.utils.PlotlyJSONEncoder))
+
+    return dcc.Store(id=store_id, data=data)
+
+
+def slider_values(min_value, max_value, step):
+    """
+    all values of a dcc.Slider, rounded like the values sent by the slider
+    """
+    n_steps = int(round((max_value - min_value) / step))
+    return [round(min_value + i * step, 6) for i in range(n_steps + 1)]
+
+
+def register_dist_callbacks(app, slider_ids, pdf_id, cdf_id, area_id, create_pdf, create_cdf, states, store=None):
+    """
+    register the pdf/cdf callbacks of a distribution page, either as memoized python callbacks or as
+    clientside callbacks (see assets/clientside.js) reading the tables in 'store' (single slider only),
+    the slider values returned by 'states' are precomputed by bake.py; the area under the pdf for the
+    clicks on the cdf is shaded in the browser (the stores of gen_area_stores have to be in the layout)
+    """
+    pdf_base_id = f'{pdf_id}-base'
+    clicks_id = f'{cdf_id}-clicks'
+    if store is None:
+        memoize(app.callback(
+            Output(cdf_id, 'figure'),
+            [Input(slider_id, 'value') for slider_id in slider_ids]
+        )(create_cdf), states=lambda: [tuple(values) for values in states()])
+        memoize(app.callback(
+            Output(pdf_base_id, 'data'),
+            [Input(slider_id, 'value') for slider_id in slider_ids]
+        )(create_pdf), states=lambda: [tuple(values) for values in states()])
+    else:
+        slider_id, = slider_ids
+        app.clientside_callback(
+            ClientsideFunction('distributions', 'create_cdf'),
+            Output(cdf_id, 'figure'),
+            [Input(slider_id, 'value'),
+             Input(store.id, 'data')]
+        )
+        app.clientside_callback(
+            ClientsideFunction('distributions', 'create_pdf'),
+            Output(pdf_base_id, 'data'),
+            [Input(slider_id, 'value'),
+             Input(store.id, 'data')]
+        )
+
+    # the areas follow from the cdf already in the browser, a click sends no request
+    app.clientside_callback(
+        ClientsideFunction('distributions', 'clicks'),
+        Output(clicks_id, 'data'),
+        [Input(cdf_id, 'clickData')],
+        [State(clicks_id, 'data')]
+    )
+    app.clientside_callback(
+        ClientsideFunction('distributions', 'shade_pdf'),
+        Output(pdf_id, 'figure'),
+        [Input(pdf_base_id, 'data'),
+         Input(cdf_id, 'figure'),
+         Input(clicks_id, 'data'),
+         Input(area_id, 'value')]
+    )
@@ -1,15 +1,19 @@
 # -*- coding: utf-8 -*-
+from functools import lru_cache
+
 import dash_core_components as dcc
 import dash_html_components as html
-from dash.dependencies import Input, Output, State
-
-import plotly.graph_objs as go
+from dash.dependencies import Input, Output, State, ClientsideFunction
 
 import numpy as np
 import scipy.stats
 
 from app import app
-from apps.commons import gen_header
+from apps.figure_cache import memoize
+from apps.offload import offload
+from apps.roc import binormal_roc, binormal_auc
+from apps.montecarlo import ContingencySimulator, predictive_values
+from apps.commons import gen_header, slider_values, build_figure, scatter
 
 # global variables
 x_max = 5.
@@ -17,6 +21,12 @@ n_points = 200
 x = np.linspace(-x_max, x_max, n_points)
 y = scipy.stats.norm.pdf(x)
 
+# number of simulated subjects for the contingency matrix, the same seed is used for all slider
+# values (common random numbers), hence the table changes smoothly when moving a slider
+n_samples = 1000000
+seed = 1
+simulator = ContingencySimulator()
+
 # components of the app
 # header text plus logo
 header = gen_header("Diagnostic tests", logo='/assets/icons8-return-96.png', href='/toc')
@@ -26,6 +36,15 @@ dist_display = dcc.Graph(id='dist-display')
 
 roc_display = dcc.Graph(id='roc-display')
 
+# moving the cutoff only changes the shaded areas, the cutoff line, the annotation and the ROC marker:
+# the static parts of the figures only depend on the separation and are kept in the browser,
+# the figures are put together by clientside callbacks (see assets/clientside.js)
+stores = [
+    dcc.Store(id='dist-base'),
+    dcc.Store(id='roc-base'),
+    dcc.Store(id='cutoff-state'),
+]
+
 # sliders for 'dist_display'
 sliders = [
     # difference
@@ -45,9 +64,18 @@ sliders = [
     ], className='w3-container w3-padding w3-half'),
 ]
 
-# TODO: add a slider for prior probability (prevalence)
-#  show posterior probability for being sick if tested positive
-#  show contingency matrix e.g. with 10000 samples
+# prior probability (prevalence) and simulated contingency matrix
+prevalence_panel = [
+    html.Div([
+        html.Label('prevalence:', className="control_label"),
+        dcc.Slider(id='prevalence',
+                   min=0.01, max=0.99, step=0.01, value=0.1,
+                   marks={0.01: '1%', 0.25: '25%', 0.5: '50%', 0.75: '75%', 0.99: '99%'},
+                   className='dcc_control')
+    ], className='w3-container w3-padding w3-third'),
+
+    html.Div(id='contingency-display', className='w3-container w3-padding w3-twothird'),
+]
 
 layout = html.Div([
 
@@ -63,10 +91,31 @@ layout = html.Div([
         ], className='w3-container w3-col m4 w3-padding'),
     ], className='w3-row'),
 
+    html.Div(prevalence_panel, className='w3-row'),
+
+    html.Div(stores),
+
 ], className='w3-container w3-padding'
 )
 
 
+def gen_states():
+    # all reachable combinations of separation and cutoff, the cutoff maximum depends on the separation
+    return [(diff_value, cutoff_value) for diff_value in slider_values(0., 5., 0.2)
+            for cutoff_value in slider_values(-4., 4. + diff_value, 0.2)]
+
+
+def gen_diff_states():
+    return [(diff_value,) for diff_value in slider_values(0., 5., 0.2)]
+
+
+def gen_slider_states():
+    # separation and previous cutoff, which can be anywhere on the widest cutoff slider
+    return [(diff_value, cutoff_value) for diff_value in slider_values(0., 5., 0.2)
+            for cutoff_value in slider_values(-4., 9., 0.2)]
+
+
+@memoize(states=gen_slider_states)
 @app.callback(
     [Output('cutoff', 'max'),
      Output('cutoff', 'value')],
@@ -78,19 +127,16 @@ def update_slider(diff_value, cutoff_old):
     return new_max, min(cutoff_old, new_max)
 
 
+@memoize(states=gen_diff_states)
 @app.callback(
-    Output('dist-display', 'figure'),
-    [Input('difference', 'value'),
-     Input('cutoff', 'value')]
+    Output('dist-base', 'data'),
+    [Input('difference', 'value')]
 )
-def gen_dist_figure(diff_value, cutoff_value):
-
-    spec = scipy.stats.norm.cdf(cutoff_value)
-    fn = scipy.stats.norm.cdf(cutoff_value, loc=diff_value)
-    fp = 1. - spec
-    sens = 1. - fn
+@offload
+def gen_dist_base(diff_value):
+    # the shaded areas, the cutoff line and the annotation are filled in by 'diagnostic.dist_figure'
 
-    healthy = go.Scatter(
+    healthy = scatter(
         x=x,
         y=y,
         mode='lines',
@@ -99,7 +145,7 @@ def gen_dist_figure(diff_value, cutoff_value):
         showlegend=True,
     )
 
-    sick = go.Scatter(
+    sick = scatter(
         x=x + diff_value,
         y=y,
         mode='lines',
@@ -108,31 +154,27 @@ def gen_dist_figure(diff_value, cutoff_value):
         showlegend=True,
     )
 
-    selected = (x + diff_value) <= cutoff_value
-    false_negatives = go.Scatter(
-        x=x[selected] + diff_value,
-        y=y[selected],
+    false_negatives = scatter(
+        x=[],
+        y=[],
         mode='none',
         fill='tozeroy',
         fillcolor='rgba(228,26,28, 0.3)',
         name='false negatives',
         showlegend=False,
         hoveron='fills',
-        text='false negative<br>rate: {:.1f}%'.format(fn * 100.),
         hoverinfo='text'
     )
 
-    selected = x >= cutoff_value
-    false_positives = go.Scatter(
-        x=x[selected],
-        y=y[selected],
+    false_positives = scatter(
+        x=[],
+        y=[],
         mode='none',
         fill='tozeroy',
         fillcolor='rgba(55, 126, 184, 0.3)',
         name='false positives',
         showlegend=False,
         hoveron='fills',
-        text='false positive<br>rate: {:.1f}%'.format(fp * 100.),
         hoverinfo='text'
     )
 
@@ -148,10 +190,10 @@ def gen_dist_figure(diff_value, cutoff_value):
 
     fig_layout.update({
         'shapes': [
-            go.layout.Shape(
+            dict(
                 type="line",
                 xref="x", yref="paper",
-                x0=cutoff_value, x1=cutoff_value,
+                x0=0, x1=0,
                 y0=0, y1=1,
                 line=dict(
                     color="#4daf4a",
@@ -159,35 +201,69 @@ def gen_dist_figure(diff_value, cutoff_value):
                 )),
         ],
         'annotations': [
-            go.layout.Annotation(x=0.01, y=0.99, xref="paper", yref="paper", showarrow=False,
-                                 text=f"sensitivity: {sens:.3f}<br>" +
-                                      f"specificity: {spec:.3f}<br>" +
-                                      f"fp-rate: {fp:.3f}<br>" +
-                                      f"fn-rate: {fn:.3f}",
-                                 font=dict(size=14), xanchor="left", yanchor="top",
-                                 align="left", bgcolor='rgba(255, 255, 255, 0.8)', borderpad=3,
-                                 )
+            dict(x=0.01, y=0.99, xref="paper", yref="paper", showarrow=False,
+                 text="",
+                 font=dict(size=14), xanchor="left", yanchor="top",
+                 align="left", bgcolor='rgba(255, 255, 255, 0.8)', borderpad=3,
+                 )
         ]
     })
 
-    return go.Figure(data=data, layout=fig_layout)
+    return build_figure(data, fig_layout)
 
 
+@memoize(states=gen_states)
 @app.callback(
-    Output('roc-display', 'figure'),
+    Output('cutoff-state', 'data'),
     [Input('difference', 'value'),
      Input('cutoff', 'value')]
 )
-def gen_roc_figure(diff_value, cutoff_value):
+def gen_cutoff_state(diff_value, cutoff_value):
+    # the small set of values changing with the cutoff, sent instead of the full figures
+
+    fp, sens = binormal_roc(diff_value, cutoff_value)
+    spec = 1. - fp
+    fn = 1. - sens
+
+    return {
+        'cutoff': cutoff_value,
+        # the false negatives are the part of the sick curve left of the cutoff (x + diff_value <= cutoff),
+        # the false positives the part of the healthy curve right of it (x >= cutoff)
+        'fn_end': int(np.count_nonzero((x + diff_value) <= cutoff_value)),
+        'fp_start': int(np.count_nonzero(x < cutoff_value)),
+        'fn_text': 'false negative<br>rate: {:.1f}%'.format(fn * 100.),
+        'fp_text': 'false positive<br>rate: {:.1f}%'.format(fp * 100.),
+        'annotation': f"sensitivity: {sens:.3f}<br>" +
+                      f"specificity: {spec:.3f}<br>" +
+                      f"fp-rate: {fp:.3f}<br>" +
+                      f"fn-rate: {fn:.3f}",
+        'marker': [float(fp), float(sens)],
+    }
+
+
+@lru_cache(maxsize=64)
+def roc_curve(diff_value):
+    # the ROC curve and its area only depend on the separation, not on the cutoff
     n_roc = int((8 + diff_value)/0.2) + 1  # number of points in the ROC curve
     x_roc = np.linspace(-4., 4.+diff_value, n_roc)
 
-    fp = 1. - scipy.stats.norm.cdf(x_roc)  # false positives
-    tp = 1. - scipy.stats.norm.cdf(x_roc, loc=diff_value)  # true positives
+    fp, tp = binormal_roc(diff_value, x_roc)  # false and true positives
+    auc = binormal_auc(diff_value)  # area under the curve
+
+    return fp, tp, auc
 
-    auc = -np.trapz(tp, fp)  # area under the curve
 
-    roc = go.Scatter(
+@memoize(states=gen_diff_states)
+@app.callback(
+    Output('roc-base', 'data'),
+    [Input('difference', 'value')]
+)
+@offload
+def gen_roc_base(diff_value):
+    # the cutoff marker is placed by 'diagnostic.roc_figure'
+    fp, tp, auc = roc_curve(diff_value)
+
+    roc = scatter(
         x=fp,
         y=tp,
         mode='lines',
@@ -196,9 +272,9 @@ def gen_roc_figure(diff_value, cutoff_value):
         showlegend=False,
     )
 
-    cutoff_marker = go.Scatter(
-        x=(1. - scipy.stats.norm.cdf(cutoff_value),),
-        y=(1. - scipy.stats.norm.cdf(cutoff_value, loc=diff_value),),
+    cutoff_marker = scatter(
+        x=[],
+        y=[],
         mode='markers',
         marker=dict(
             symbol='circle',
@@ -223,18 +299,91 @@ def gen_roc_figure(diff_value, cutoff_value):
                       ),
         'margin': dict(l=25, r=25, t=50, b=50),
         'template': 'ggplot2',
-        'title': go.layout.Title(text="ROC curve", xref="paper", x=0),
+        'title': dict(text="ROC curve", xref="paper", x=0),
         'annotations': [
-            go.layout.Annotation(x=0.75, y=0.25, xref="paper", yref="paper",
-                                 text=f"AUC: {auc:.3f}<br>(area under<br>the curve)", showarrow=False,
-                                 font=dict(size=14), xanchor="center", yanchor="middle",
-                                 align="center", bgcolor='rgba(255, 255, 255, 0.8)', borderpad=3,
-                                 )
+            dict(x=0.75, y=0.25, xref="paper", yref="paper",
+                 text=f"AUC: {auc:.3f}<br>(area under<br>the curve)", showarrow=False,
+                 font=dict(size=14), xanchor="center", yanchor="middle",
+                 align="center", bgcolor='rgba(255, 255, 255, 0.8)', borderpad=3,
+                 )
         ]
     }
 
-    return go.Figure(data=data, layout=fig_layout)
+    return build_figure(data, fig_layout)
+
+
+def gen_contingency_states():
+    # the cutoffs innermost, they share the simulation of 'contingency_tables'
+    return [(diff_value, cutoff_value, prevalence) for diff_value in slider_values(0., 5., 0.2)
+            for prevalence in slider_values(0.01, 0.99, 0.01)
+            for cutoff_value in slider_values(-4., 4. + diff_value, 0.2)]
+
 
+@lru_cache(maxsize=64)
+def contingency_tables(diff_value, prevalence):
+    """
+    the contingency tables of all cutoffs of the slider for a separation and prevalence, counted from the
+    same subjects (as for a single cutoff, see 'seed'), by cutoff value
+    """
+    cutoffs = slider_values(-4., 4. + diff_value, 0.2)
+    tables = simulator.simulate(n_samples, prevalence, diff_value, np.array(cutoffs), seed=seed)
+    return dict(zip(cutoffs, tables))
+
+
+@memoize(states=gen_contingency_states)
+@app.callback(
+    Output('contingency-display', 'children'),
+    [Input('difference', 'value'),
+     Input('cutoff', 'value'),
+     Input('prevalence', 'value')]
+)
+@offload
+def gen_contingency_table(diff_value, cutoff_value, prevalence):
+    counts = contingency_tables(round(diff_value, 6), round(prevalence, 6)).get(round(cutoff_value, 6))
+    if counts is None:
+        counts = simulator.simulate(n_samples, prevalence, diff_value, cutoff_value, seed=seed)
+    (tp, fp), (fn, tn) = counts
+
+    fpr, sens = binormal_roc(diff_value, cutoff_value)
+    ppv, npv = predictive_values(prevalence, sens, 1. - fpr)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ppv_sim = np.divide(tp, tp + fp)
+        npv_sim = np.divide(tn, tn + fn)
+
+    def row(label, values):
+        return html.Tr([html.Th(label)] + [html.Td(f'{v:,d}') for v in values])
+
+    table = html.Table([
+        html.Tr([html.Th(''), html.Th('sick'), html.Th('healthy'), html.Th('total')]),
+        row('tested positive', (tp, fp, tp + fp)),
+        row('tested negative', (fn, tn, fn + tn)),
+        row('total', (tp + fn, fp + tn, n_samples)),
+    ], className='w3-table w3-bordered')
+
+    return [
+        html.Label(f'contingency matrix of {n_samples:,d} simulated subjects:', className="control_label"),
+        table,
+        html.P([
+            f'probability of being sick if tested positive (PPV): {ppv:.3f} (simulated: {ppv_sim:.3f})',
+            html.Br(),
+            f'probability of being healthy if tested negative (NPV): {npv:.3f} (simulated: {npv_sim:.3f})',
+        ]),
+    ]
+
+
+app.clientside_callback(
+    ClientsideFunction('diagnostic', 'dist_figure'),
+    Output('dist-display', 'figure'),
+    [Input('cutoff-state', 'data'),
+     Input('dist-base', 'data')]
+)
+
+app.clientside_callback(
+    ClientsideFunction('diagnostic', 'roc_figure'),
+    Output('roc-display', 'figure'),
+    [Input('cutoff-state', 'data'),
+     Input('roc-base', 'data')]
+)
 
 if __name__ == '__main__':
     app.title = "Diagnostic tests"
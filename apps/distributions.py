@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+# evaluation of distributions for continuous parameter values from precomputed interpolation tables
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+
+import numpy as np
+import scipy.optimize
+import scipy.stats
+
+from apps.figure_cache import source_version
+
+# directory of the tables shared by all processes of the host (e.g. the gunicorn workers), which map
+# them read-only instead of building their own copies, an empty SHARED_TABLE_DIR disables sharing
+shared_table_dir = os.environ.get('SHARED_TABLE_DIR', '/dev/shm/statistics_apps' if os.path.isdir('/dev/shm') else '')
+# the tables of the current sources are in a subdirectory named by their hash, the directories of other
+# sources (sha1 names, other entries such as the session store are kept) are removed
+table_version = source_version()
+stale_pattern = re.compile('[0-9a-f]{40}$')
+
+
+def remove_stale_tables():
+    """
+    remove the tables of other sources from 'shared_table_dir', processes still mapping them keep their
+    mappings (the files are only freed when they are unmapped)
+    """
+    for entry in os.scandir(shared_table_dir):
+        if entry.name != table_version and stale_pattern.match(entry.name) and entry.is_dir():
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def shared_arrays(key, build):
+    """
+    the arrays (dict name -> array) returned by build(), stored once under 'key' in 'shared_table_dir'
+    and memory-mapped read-only by every process, hence 'key' has to identify the contents (the tables
+    of other sources are removed when the first table of the current ones is stored)
+    """
+    if not shared_table_dir:
+        return build()
+
+    version_dir = os.path.join(shared_table_dir, table_version)
+    path = os.path.join(version_dir, hashlib.sha1(repr(key).encode('utf-8')).hexdigest())
+    try:
+        if not os.path.isdir(path):
+            arrays = build()
+            published = os.path.isdir(version_dir)
+            os.makedirs(version_dir, exist_ok=True)
+            # written to a temporary directory first, the rename is atomic
+            tmp = tempfile.mkdtemp(dir=version_dir)
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp, f'{name}.npy'), array)
+            try:
+                os.rename(tmp, path)
+            except OSError:
+                # built concurrently by another process
+                shutil.rmtree(tmp, ignore_errors=True)
+            if not published:
+                remove_stale_tables()
+        return {filename[:-4]: np.load(os.path.join(path, filename), mmap_mode='r')
+                for filename in os.listdir(path)}
+    except OSError:
+        return build()
+
+
+class ParameterTable(object):
+    """
+    values of func(parameter, x) on the x grid of a page for a dense grid of parameters (the rows),
+    evaluated for arbitrary parameters by linear interpolation between neighbouring rows
+
+    the parameter grid (linear or logarithmic) is refined adaptively until the interpolation error at
+    the midpoints of all intervals is below 'tolerance', parameters outside the table are computed
+    directly
+
+    with a 'shared_key' the table is built only once per host and mapped read-only (see shared_arrays)
+    """
+
+    def __init__(self, func, x, param_min, param_max, log=False, tolerance=1e-4, n_initial=9, max_rows=4096,
+                 shared_key=None):
+        self.func = func
+        self.x = np.asarray(x, dtype=float)
+        self.log = log
+        self.tolerance = tolerance
+
+        def build():
+            return self._build(param_min, param_max, n_initial, max_rows)
+
+        if shared_key is None:
+            arrays = build()
+        else:
+            arrays = shared_arrays((shared_key, param_min, param_max, log, tolerance, n_initial, max_rows,
+                                    self.x.tobytes()), build)
+
+        self.grid = arrays['grid']
+        self.values = arrays['values']
+        self.max_error = float(arrays['max_error'])
+
+    def _build(self, param_min, param_max, n_initial, max_rows):
+        grid = np.linspace(self._transform(param_min), self._transform(param_max), n_initial)
+        values = self._evaluate(grid)
+        while True:
+            midpoints = (grid[:-1] + grid[1:]) / 2.
+            exact = self._evaluate(midpoints)
+            errors = np.max(np.abs(exact - (values[:-1] + values[1:]) / 2.), axis=1)
+            split = np.flatnonzero(errors > self.tolerance)
+            if split.size == 0 or grid.size + split.size > max_rows:
+                break
+            grid = np.insert(grid, split + 1, midpoints[split])
+            values = np.insert(values, split + 1, exact[split], axis=0)
+
+        return {'grid': grid, 'values': values, 'max_error': np.max(errors)}
+
+    def _transform(self, params):
+        return np.log(params) if self.log else np.asarray(params, dtype=float)
+
+    def _evaluate(self, grid):
+        params = np.exp(grid) if self.log else grid
+        return self.func(params[:, np.newaxis], self.x[np.newaxis, :])
+
+    def __call__(self, params):
+        """
+        values for a single parameter (1-d array) or an array of parameters (one row per parameter)
+        """
+        params = np.asarray(params, dtype=float)
+        if params.ndim == 0:
+            return self(params[np.newaxis])[0]
+
+        u = self._transform(params)
+        i = np.clip(np.searchsorted(self.grid, u, side='right') - 1, 0, self.grid.size - 2)
+        weights = ((u - self.grid[i]) / (self.grid[i + 1] - self.grid[i]))[:, np.newaxis]
+        result = (1. - weights) * self.values[i] + weights * self.values[i + 1]
+
+        outside = (u < self.grid[0]) | (u > self.grid[-1])
+        if np.any(outside):
+            result[outside] = self.func(params[outside][:, np.newaxis], self.x[np.newaxis, :])
+
+        return result
+
+    def to_dict(self):
+        """
+        the table for interpolating in the browser, see assets/clientside.js
+        """
+        return {'grid': self.grid, 'values': self.values, 'log': self.log}
+
+
+def t_test_power(df, nc, alpha, tails):
+    """
+    power of a one- or two-sided t-test with 'df' degrees of freedom for the noncentrality 'nc'
+    """
+    t_crit = scipy.stats.t.isf(alpha / tails, df)
+    power = scipy.stats.nct.sf(t_crit, df, nc)
+    if tails == 2:
+        # the lower tail by symmetry, nct.cdf returns nan far in the tail
+        power = power + scipy.stats.nct.sf(t_crit, df, -nc)
+    return power
+
+
+class PowerTable(object):
+    """
+    power of the two-sample t-test with n observations per group for the effect size d, interpolated
+    bilinearly from a table of the noncentral t-distribution over log(df) and the noncentrality
+    nc = d sqrt(n/2) (d >= 0), on which the power depends smoothly (unlike on d for large n); the
+    noncentrality is clipped to 'nc_max', where the power is 1 for all but the smallest df
+
+    with a 'shared_key' the table is built only once per host and mapped read-only (see shared_arrays)
+    """
+
+    def __init__(self, alphas, df_max=4000., n_df=100, nc_max=12., n_nc=241, shared_key=None):
+        self.alphas = list(alphas)
+
+        def build():
+            log_df = np.linspace(np.log(2.), np.log(df_max), n_df)
+            nc = np.linspace(0., nc_max, n_nc)
+            df_grid, nc_grid = np.exp(log_df)[:, np.newaxis], nc[np.newaxis, :]
+            power = np.array([[t_test_power(df_grid, nc_grid, alpha, tails) for tails in (1, 2)]
+                              for alpha in self.alphas])
+            return {'log_df': log_df, 'nc': nc, 'power': power}
+
+        if shared_key is None:
+            arrays = build()
+        else:
+            arrays = shared_arrays((shared_key, tuple(self.alphas), df_max, n_df, nc_max, n_nc), build)
+
+        self.log_df = arrays['log_df']
+        self.nc = arrays['nc']
+        self.power = arrays['power']
+
+    @property
+    def n_max(self):
+        # largest number of observations per group in the table
+        return np.exp(self.log_df[-1]) / 2. + 1.
+
+    def __call__(self, n, d, alpha, tails):
+        """
+        power for n observations per group and effect size d (arrays are broadcast)
+        """
+        n, d = np.broadcast_arrays(np.asarray(n, dtype=float), np.asarray(d, dtype=float))
+        table = self.power[self.alphas.index(alpha), tails - 1]
+        u = np.clip(np.log(2. * n - 2.), self.log_df[0], self.log_df[-1])
+        v = np.clip(d * np.sqrt(n / 2.), self.nc[0], self.nc[-1])
+        i = np.clip(np.searchsorted(self.log_df, u, side='right') - 1, 0, self.log_df.size - 2)
+        j = np.clip(np.searchsorted(self.nc, v, side='right') - 1, 0, self.nc.size - 2)
+        s = (u - self.log_df[i]) / (self.log_df[i + 1] - self.log_df[i])
+        t = (v - self.nc[j]) / (self.nc[j + 1] - self.nc[j])
+        return (1. - s) * ((1. - t) * table[i, j] + t * table[i, j + 1]) + \
+            s * ((1. - t) * table[i + 1, j] + t * table[i + 1, j + 1])
+
+    def sample_size(self, d, power, alpha, tails):
+        """
+        smallest (fractional) number of observations per group reaching 'power' for the effect size d,
+        inf if it is not reached within the table; the power increases with n, the root is bracketed
+        between the rows of the table and found by Brent's method on the interpolated power
+        """
+        n_grid = np.exp(self.log_df) / 2. + 1.
+        above = np.flatnonzero(self(n_grid, d, alpha, tails) >= power)
+        if above.size == 0:
+            return np.inf
+        if above[0] == 0:
+            return n_grid[0]
+        return scipy.optimize.brentq(lambda n: self(n, d, alpha, tails) - power, n_grid[above[0] - 1],
+                                     n_grid[above[0]], xtol=1e-6)
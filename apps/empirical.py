@@ -0,0 +1,400 @@
+# -*- coding: utf-8 -*-
+# empirical two-group datasets: uploads are parsed in chunks into one-pass summaries (moments and
+# histograms), which are stored per dataset and rendered as histograms or kernel density estimates
+import csv
+import hashlib
+import os
+import tempfile
+import time
+from functools import lru_cache
+from urllib.parse import quote
+
+import flask
+import numpy as np
+from scipy.special import gammaln
+
+# directory of the dataset summaries, shared by all workers
+upload_dir = os.environ.get('UPLOAD_DIR', 'uploads')
+chunk_size = 2**20
+# size limit of an upload, the summaries (and bootstrap intervals) are removed after the ttl
+upload_max_bytes = int(float(os.environ.get('UPLOAD_MAX_MB', 20)) * 2**20)
+upload_ttl = float(os.environ.get('UPLOAD_TTL_DAYS', 7)) * 86400.
+
+
+class RunningMoments(object):
+    """
+    count, mean and sum of squared deviations, updated chunk by chunk with the numerically stable
+    one-pass merge of Welford/Chan (instead of sums of squares, which cancel catastrophically)
+    """
+
+    def __init__(self, n=0, mean=0., m2=0.):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return
+        n = values.size
+        mean = values.mean()
+        m2 = np.sum((values - mean)**2)
+        self.merge(RunningMoments(n, mean, m2))
+
+    def merge(self, other):
+        n = self.n + other.n
+        if n == 0:
+            return
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta**2 * self.n * other.n / n
+        self.n = n
+
+    @property
+    def variance(self):
+        # sample variance
+        return self.m2 / (self.n - 1) if self.n > 1 else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+
+def merge_bins(array, factor):
+    # sum groups of 'factor' adjacent bins, the last group is padded with empty bins
+    pad = -array.size % factor
+    return np.append(array, np.zeros(pad, dtype=array.dtype)).reshape(-1, factor).sum(axis=1)
+
+
+class StreamingHistogram(object):
+    """
+    histogram of a stream of values with unknown range: the bins are extended to new values, and pairs
+    of bins are merged (doubling the bin width) to keep at most 'max_bins' bins; besides the counts, the
+    sums and sums of squares of the values (relative to 'ref') are kept per bin, see apps/bootstrap.py
+    """
+
+    def __init__(self, max_bins=1024, lo=None, width=None, counts=None, ref=None, sums=None, squares=None):
+        self.max_bins = max_bins
+        self.lo = lo
+        self.width = width
+        self.counts = np.zeros(0, dtype=np.int64) if counts is None else counts
+        self.ref = lo if ref is None else ref
+        if sums is None and self.counts.size > 0:
+            # summaries saved without sums: the values are approximated by the bin centers
+            offsets = self.centers - self.ref
+            sums, squares = self.counts * offsets, self.counts * offsets**2
+        self.sums = np.zeros(self.counts.size) if sums is None else sums
+        self.squares = np.zeros(self.counts.size) if squares is None else squares
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return
+        vmin, vmax = values.min(), values.max()
+
+        if self.lo is None:
+            span = vmax - vmin
+            self.lo = self.ref = vmin
+            # half of the bins are left for later values outside the range
+            self.width = 2. * span / self.max_bins if span > 0 else max(abs(vmin), 1.) * 1e-6
+        self._extend(vmin, vmax)
+
+        index = np.minimum(((values - self.lo) / self.width).astype(np.int64), self.counts.size - 1)
+        offsets = values - self.ref
+        self.counts += np.bincount(index, minlength=self.counts.size)
+        self.sums += np.bincount(index, weights=offsets, minlength=self.counts.size)
+        self.squares += np.bincount(index, weights=offsets**2, minlength=self.counts.size)
+
+    def _extend(self, vmin, vmax):
+        lo = min(self.lo, vmin)
+        hi = max(self.lo + self.counts.size * self.width, vmax)
+        # merge groups of bins first, such that the extended range fits into 'max_bins' bins
+        factor = 1
+        while (hi - lo) / (self.width * factor) >= self.max_bins - 1:
+            factor *= 2
+        if factor > 1:
+            self.counts, self.sums, self.squares = [merge_bins(array, factor)
+                                                    for array in (self.counts, self.sums, self.squares)]
+            self.width *= factor
+
+        below = int(np.ceil((self.lo - vmin) / self.width)) if vmin < self.lo else 0
+        self.lo -= below * self.width
+        above = max(int(np.floor((vmax - self.lo) / self.width)) + 1 - below - self.counts.size, 0)
+        self.counts, self.sums, self.squares = [np.concatenate([np.zeros(below, dtype=array.dtype), array,
+                                                                np.zeros(above, dtype=array.dtype)])
+                                                for array in (self.counts, self.sums, self.squares)]
+
+    @property
+    def centers(self):
+        return self.lo + (np.arange(self.counts.size) + 0.5) * self.width
+
+    def rebin(self, n_bins):
+        """
+        centers and counts of at most 'n_bins' bins (for display)
+        """
+        factor = max(1, int(np.ceil(self.counts.size / n_bins)))
+        counts = merge_bins(self.counts, factor)
+        centers = self.lo + (np.arange(counts.size) + 0.5) * self.width * factor
+        return centers, counts, self.width * factor
+
+
+def binned_kde(histogram, bandwidth, cutoff=4.):
+    """
+    Gaussian kernel density estimate on the bin centers of a histogram (extended by the kernel support),
+    by FFT convolution of the bin counts with the sampled kernel, O(bins log(bins))
+    """
+    width = histogram.width
+    n = histogram.counts.sum()
+    # the kernel is not resolved for bandwidths below the bin width
+    bandwidth = max(bandwidth, width)
+    half = int(np.ceil(cutoff * bandwidth / width))
+    counts = np.concatenate([np.zeros(half), histogram.counts, np.zeros(half)])
+    offsets = np.arange(-half, half + 1) * width
+    kernel = np.exp(-0.5 * (offsets / bandwidth)**2)
+    kernel /= kernel.sum() * width
+
+    size = counts.size + kernel.size - 1
+    n_fft = 1 << (size - 1).bit_length()
+    density = np.fft.irfft(np.fft.rfft(counts, n_fft) * np.fft.rfft(kernel, n_fft), n_fft)
+    density = np.maximum(density[half:half + counts.size], 0.) / n
+
+    x = histogram.lo + (np.arange(counts.size) - half + 0.5) * width
+    return x, density
+
+
+def silverman_bandwidth(moments):
+    return 1.06 * moments.std * moments.n**(-0.2)
+
+
+def is_number(text):
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def read_lines(stream, sha, max_bytes=None):
+    """
+    decoded lines of a binary stream, read in chunks of 'chunk_size' bytes and hashed on the fly, at most
+    'max_bytes' bytes (ValueError beyond)
+    """
+    rest = b''
+    size = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        size += len(chunk)
+        if max_bytes is not None and size > max_bytes:
+            raise ValueError(f'the file exceeds {max_bytes / 2**20:g} MB')
+        sha.update(chunk)
+        lines = (rest + chunk).split(b'\n')
+        rest = lines.pop()
+        yield [line.decode('utf-8-sig').rstrip('\r') for line in lines]
+    if rest.strip():
+        yield [rest.decode('utf-8-sig').rstrip('\r')]
+
+
+def to_float(fields):
+    return np.array([float(field) if field.strip() else np.nan for field in fields])
+
+
+def hedges_correction(df):
+    # exact bias correction factor J(df) = gamma(df/2) / (sqrt(df/2) gamma((df-1)/2)), via log-gamma for large df
+    return np.exp(gammaln(df / 2.) - gammaln((df - 1) / 2.)) / np.sqrt(df / 2.)
+
+
+class DatasetSummary(object):
+    """
+    moments and histograms of the two groups of a dataset
+    """
+
+    def __init__(self, names, moments, histograms):
+        self.names = names
+        self.moments = moments
+        self.histograms = histograms
+
+    @classmethod
+    def from_csv(cls, stream, max_bytes=None):
+        """
+        parse a csv file with either two numeric columns (one per group, 'wide' format) or a group label
+        and a value per row ('long' format, header 'group,value' or non-numeric labels), chunk by chunk;
+        returns the summary and the sha1 of the file
+        """
+        sha = hashlib.sha1()
+        names = None
+        header_checked = False
+        long_format = None
+        labels = []
+        moments = [RunningMoments(), RunningMoments()]
+        histograms = [StreamingHistogram(), StreamingHistogram()]
+
+        for lines in read_lines(stream, sha, max_bytes):
+            rows = [row for row in csv.reader(lines) if row and any(field.strip() for field in row)]
+            if not rows:
+                continue
+            if not header_checked:
+                header_checked = True
+                if len(rows[0]) != 2:
+                    raise ValueError('the csv file must have two columns')
+                # the second field of a data row is always a number (or empty)
+                if rows[0][1].strip() and not is_number(rows[0][1]):
+                    names = [field.strip() for field in rows[0]]
+                    rows = rows[1:]
+                    if [name.lower() for name in names] == ['group', 'value']:
+                        long_format = True
+            if long_format is None:
+                if not rows:
+                    continue
+                long_format = bool(rows[0][0].strip()) and not is_number(rows[0][0])
+
+            if any(len(row) != 2 for row in rows):
+                raise ValueError('the csv file must have two columns')
+            if long_format:
+                # the labels of the chunk in the order of their first occurrence
+                names, first, inverse = np.unique([row[0].strip() for row in rows], return_index=True,
+                                                  return_inverse=True)
+                for name in names[np.argsort(first)]:
+                    if name not in labels:
+                        if len(labels) == 2:
+                            raise ValueError('the dataset must contain two groups')
+                        labels.append(str(name))
+                groups = np.array([labels.index(name) for name in names])[inverse]
+                values = to_float([row[1] for row in rows])
+                columns = [values[groups == 0], values[groups == 1]]
+            else:
+                columns = [to_float([row[0] for row in rows]), to_float([row[1] for row in rows])]
+
+            for group, values in enumerate(columns):
+                values = values[np.isfinite(values)]
+                moments[group].update(values)
+                histograms[group].update(values)
+
+        if long_format:
+            names = labels
+        if names is None:
+            names = ['group 1', 'group 2']
+        if len(names) != 2 or min(m.n for m in moments) < 2:
+            raise ValueError('both groups need at least two values')
+
+        return cls(names, moments, histograms), sha.hexdigest()[:16]
+
+    def cohen_d(self):
+        """
+        difference of the means (second minus first group) scaled by the pooled standard deviation
+        """
+        (n_1, mean_1, var_1), (n_2, mean_2, var_2) = [(m.n, m.mean, m.variance) for m in self.moments]
+        pooled = np.sqrt(((n_1 - 1) * var_1 + (n_2 - 1) * var_2) / (n_1 + n_2 - 2))
+        return (mean_2 - mean_1) / pooled
+
+    def hedges_g(self):
+        """
+        Cohen's d corrected for its bias in small samples
+        """
+        return hedges_correction(self.moments[0].n + self.moments[1].n - 2) * self.cohen_d()
+
+    def save(self, path):
+        arrays = {'names': np.array(self.names)}
+        for group, (moments, histogram) in enumerate(zip(self.moments, self.histograms)):
+            arrays[f'moments_{group}'] = np.array([moments.n, moments.mean, moments.m2])
+            arrays[f'histogram_{group}'] = np.array([histogram.lo, histogram.width, histogram.ref])
+            arrays[f'counts_{group}'] = histogram.counts
+            arrays[f'sums_{group}'] = histogram.sums
+            arrays[f'squares_{group}'] = histogram.squares
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            moments = []
+            histograms = []
+            for group in range(2):
+                n, mean, m2 = arrays[f'moments_{group}']
+                moments.append(RunningMoments(int(n), mean, m2))
+                # summaries of earlier versions lack the reference and the sums per bin
+                lo, width, ref = np.append(arrays[f'histogram_{group}'], np.nan)[:3]
+                histograms.append(StreamingHistogram(
+                    lo=lo, width=width, counts=arrays[f'counts_{group}'], ref=None if np.isnan(ref) else ref,
+                    sums=arrays.get(f'sums_{group}'), squares=arrays.get(f'squares_{group}')))
+            return cls([str(name) for name in arrays['names']], moments, histograms)
+
+
+def dataset_path(dataset_id):
+    return os.path.join(upload_dir, f'{dataset_id}.npz')
+
+
+@lru_cache(maxsize=64)
+def load_summary(dataset_id):
+    return DatasetSummary.load(dataset_path(dataset_id))
+
+
+def load_dataset(dataset_id):
+    """
+    summary of an uploaded dataset, None for unknown (or expired) ids; only the summaries found are
+    cached, a dataset uploaded again after its expiry is found at once
+    """
+    if not dataset_id.isalnum() or not os.path.exists(dataset_path(dataset_id)):
+        return None
+    try:
+        return load_summary(dataset_id)
+    except FileNotFoundError:
+        # pruned meanwhile
+        return None
+
+
+def prune_uploads():
+    """
+    remove the summaries and bootstrap intervals older than the ttl (the upload of a dataset again renews
+    it), the files may be removed by another worker meanwhile
+    """
+    deadline = time.time() - upload_ttl
+    for entry in os.scandir(upload_dir):
+        # temporary files of tempfile.mkstemp being written
+        if entry.name.startswith('tmp'):
+            continue
+        try:
+            if entry.stat().st_mtime < deadline:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def register_uploads(server, pages):
+    """
+    route receiving csv files for the given pages (as the request body, see assets/upload.js, or as the
+    form field 'file'), which are redirected to with the id of the dataset (or an error) in the query string
+    """
+    @server.route('/upload/<page>', methods=['POST'])
+    def upload(page):
+        if page not in pages:
+            flask.abort(404)
+        if (flask.request.content_length or 0) > upload_max_bytes:
+            error = f'the file exceeds {upload_max_bytes / 2**20:g} MB'
+            return flask.redirect(f'/{page}?error={quote(error)}', code=303)
+        # the request body is parsed while it is received, multipart uploads are spooled to a temporary
+        # file by werkzeug first
+        if flask.request.mimetype == 'multipart/form-data':
+            if 'file' not in flask.request.files:
+                flask.abort(400)
+            stream = flask.request.files['file'].stream
+        else:
+            stream = flask.request.stream
+        try:
+            summary, dataset_id = DatasetSummary.from_csv(stream, upload_max_bytes)
+        except (ValueError, UnicodeDecodeError, csv.Error) as error:
+            return flask.redirect(f'/{page}?error={quote(str(error))}', code=303)
+
+        os.makedirs(upload_dir, exist_ok=True)
+        prune_uploads()
+        if os.path.exists(dataset_path(dataset_id)):
+            os.utime(dataset_path(dataset_id))
+        else:
+            # written to a temporary file first, the rename is atomic
+            fd, tmp = tempfile.mkstemp(dir=upload_dir, suffix='.npz')
+            with os.fdopen(fd, 'wb') as f:
+                summary.save(f)
+            os.replace(tmp, dataset_path(dataset_id))
+
+        return flask.redirect(f'/{page}?dataset={dataset_id}', code=303)
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+# distribution explorer: generates the layout and callbacks of a page for every entry of apps/registry.py
+import itertools
+from functools import lru_cache
+
+import dash_core_components as dcc
+import dash_html_components as html
+
+import numpy as np
+import scipy.stats
+
+from app import app, clientside_rendering
+from apps.commons import (gen_header, pdf_layout, cdf_layout, gen_dist_layout, gen_dist_store, gen_area_selector,
+                          gen_area_stores, register_dist_callbacks, build_figure, scatter, slider_values,
+                          format_label)
+from apps.distributions import ParameterTable
+from apps.figure_cache import source_version
+from apps.registry import distributions
+
+# the shared tables are rebuilt when the sources change
+version = source_version()
+
+
+def gen_x(x_spec):
+    x_min, x_max, n_points = x_spec
+    return np.linspace(x_min, x_max, n_points)
+
+
+def density(dist):
+    # probability mass function of discrete and density of continuous distributions
+    return dist.pmf if isinstance(dist, scipy.stats.rv_discrete) else dist.pdf
+
+
+# pdf and cdf are cached across all pages, e.g. the standard normal reference curve is computed once
+# for the normal and the t-distribution page
+@lru_cache(maxsize=1024)
+def evaluate(dist_name, params, x_spec):
+    """
+    pdf (or pmf) and cdf of scipy.stats.<dist_name> for the parameters 'params' (tuple of (keyword, value))
+    """
+    dist = getattr(scipy.stats, dist_name)
+    x = gen_x(x_spec)
+    pdf = density(dist)(x, **dict(params))
+    cdf = dist.cdf(x, **dict(params))
+    pdf.flags.writeable = False
+    cdf.flags.writeable = False
+    return pdf, cdf
+
+
+@lru_cache(maxsize=None)
+def parameter_tables(dist_name, name, param_min, param_max, x_spec):
+    """
+    interpolation tables of pdf (or pmf) and cdf for a single parameter, all rows of a refinement pass
+    are evaluated in one vectorized call (see apps/distributions.py); the tables are shared by all
+    processes of the host
+    """
+    dist = getattr(scipy.stats, dist_name)
+    x = gen_x(x_spec)
+    log = param_min > 0
+    key = (version, scipy.__version__, dist_name, name)
+    pdf_table = ParameterTable(lambda p, x: density(dist)(x, **{name: p}), x, param_min, param_max, log=log,
+                               shared_key=key + ('pdf',))
+    cdf_table = ParameterTable(lambda p, x: dist.cdf(x, **{name: p}), x, param_min, param_max, log=log,
+                               shared_key=key + ('cdf',))
+    return pdf_table, cdf_table
+
+
+def slider_range(param):
+    """
+    min, max, step and initial value of the slider of a parameter (log10 of the parameter for 'log10')
+    """
+    step = param['step']
+    if not param.get('log10', False):
+        return param['min'], param['max'], step, param['value']
+
+    # bounds and initial value on the grid of the slider
+    slider_min = round(np.log10(param['min']), 6)
+    slider_max = round(slider_min + round((np.log10(param['max']) - slider_min) / step) * step, 6)
+    value = round(slider_min + round((np.log10(param['value']) - slider_min) / step) * step, 6)
+    return slider_min, slider_max, step, value
+
+
+def param_value(param, value):
+    return 10.**value if param.get('log10', False) else value
+
+
+class DistributionPage(object):
+    """
+    page of a registry entry: sliders for the parameters, pdf (or pmf) and cdf figures and their callbacks
+    """
+
+    def __init__(self, name, entry):
+        self.name = name
+        self.entry = entry
+        self.params = entry['params']
+        self.x_spec = entry['x']
+        self.x = gen_x(self.x_spec)
+        self.discrete = entry.get('discrete', False)
+
+        self.pdf_layout = dict(pdf_layout)
+        self.cdf_layout = dict(cdf_layout)
+        if self.discrete:
+            self.pdf_layout['yaxis'] = {'title': {'text': 'pmf'}}
+            self.pdf_layout['title'] = {'text': 'Probability mass function', 'xref': 'paper', 'x': 0}
+        if 'pdf_range' in entry:
+            self.pdf_layout['yaxis'] = dict(self.pdf_layout['yaxis'], range=entry['pdf_range'])
+
+        # pmfs are drawn as steps centered on the integers, cdfs as steps at the integers
+        self.pdf_shape = 'hvh' if self.discrete else 'linear'
+        self.cdf_shape = 'hv' if self.discrete else 'linear'
+
+        reference = entry['reference']
+        pdf, cdf = evaluate(reference['dist'], tuple(sorted(reference['params'].items())), self.x_spec)
+        self.pdf_std = self.gen_trace(pdf, reference['name'], self.pdf_shape, dash='dash', width=1.5)
+        self.cdf_std = self.gen_trace(cdf, reference['name'], self.cdf_shape, dash='dash', width=1.5)
+
+        self.ranges = [slider_range(param) for param in self.params]
+
+        # a single parameter is interpolated from tables, which can be shipped to the browser
+        if len(self.params) == 1:
+            param = self.params[0]
+            slider_min, slider_max = self.ranges[0][:2]
+            self.tables = parameter_tables(entry['dist'], param['name'], param_value(param, slider_min),
+                                           param_value(param, slider_max), self.x_spec)
+        else:
+            self.tables = None
+
+        if clientside_rendering and self.tables is not None:
+            param = self.params[0]
+            label = {'prefix': f"{entry['label']}<br>({param['symbol']}=", 'digits': param['digits'], 'suffix': ')'}
+            self.store = gen_dist_store(f"{entry['id']}-tables", self.x, self.tables[0], self.tables[1], label,
+                                        param.get('log10', False), self.pdf_std, self.cdf_std,
+                                        pdf_fig_layout=self.pdf_layout, cdf_fig_layout=self.cdf_layout)
+        else:
+            self.store = None
+
+        pdf_id, cdf_id, area_id = f"{entry['id']}-pdf-display", f"{entry['id']}-cdf-display", f"{entry['id']}-area"
+        stores = gen_area_stores(pdf_id, cdf_id) + ([self.store] if self.store is not None else [])
+        self.layout = gen_dist_layout(self.gen_header(), self.gen_sliders(area_id), dcc.Graph(id=pdf_id),
+                                      dcc.Graph(id=cdf_id), stores=stores)
+
+        register_dist_callbacks(app, [param['id'] for param in self.params], pdf_id, cdf_id, area_id,
+                                self.create_pdf, self.create_cdf, self.gen_states, store=self.store)
+
+    def gen_header(self):
+        return gen_header(self.entry['title'], logo='/assets/icons8-return-96.png', href='/toc')
+
+    def gen_sliders(self, area_id):
+        # sliders to choose the parameters plus explanatory text
+        children = [html.P(text) for text in self.entry['description']]
+        for param, (slider_min, slider_max, step, value) in zip(self.params, self.ranges):
+            log10 = param.get('log10', False)
+            children += [
+                html.P(f"Use the slider to set {param['symbol']}:", className="control_label"),
+                dcc.Slider(
+                    id=param['id'],
+                    min=slider_min, max=slider_max, step=step,
+                    marks={(float(np.log10(mark)) if log10 else mark): f'{mark:g}' for mark in param['marks']},
+                    value=value,
+                    className="dcc_control"
+                ),
+            ]
+        children += [
+            html.P("""
+            Click on the cumulative distribution function (cdf) to get a representation
+            of the corresponding area under the probability density function (pdf):
+            """),
+            gen_area_selector(area_id),
+        ]
+
+        return html.Div(children, className="w3-container w3-col w3-mobile w3-padding", style={'width': '25%'})
+
+    def gen_states(self):
+        """
+        all combinations of slider values, see bake.py
+        """
+        return itertools.product(*[slider_values(*slider_range[:3]) for slider_range in self.ranges])
+
+    def gen_trace(self, y, name, shape, dash='solid', width=3):
+        return scatter(
+            x=self.x,
+            y=y,
+            mode='lines',
+            name=name,
+            showlegend=True,
+            line={'dash': dash, 'width': width, 'shape': shape}
+        )
+
+    def curves(self, values):
+        """
+        pdf (or pmf) and cdf for the slider values
+        """
+        params = [param_value(param, value) for param, value in zip(self.params, values)]
+        if self.tables is not None:
+            return self.tables[0](params[0]), self.tables[1](params[0])
+        return evaluate(self.entry['dist'], tuple(sorted(zip([param['name'] for param in self.params], params))),
+                        self.x_spec)
+
+    def label(self, values):
+        parameters = ', '.join(format_label({'prefix': f"{param['symbol']}=", 'digits': param['digits'], 'suffix': ''},
+                                            param_value(param, value))
+                               for param, value in zip(self.params, values))
+        return f"{self.entry['label']}<br>({parameters})"
+
+    def create_cdf(self, *values):
+        _, cdf = self.curves(values)
+        cdf_var = self.gen_trace(cdf, self.label(values), self.cdf_shape)
+
+        return build_figure([self.cdf_std, cdf_var], self.cdf_layout)
+
+    def create_pdf(self, *values):
+        # the area for the clicks on the cdf is shaded in the browser (distributions.shade_pdf)
+        pdf, _ = self.curves(values)
+        pdf_var = self.gen_trace(pdf, self.label(values), self.pdf_shape)
+
+        return build_figure([self.pdf_std, pdf_var], self.pdf_layout)
+
+
+def load_page(name):
+    """
+    generate the page of the registry entry 'name' (see apps/pages.py)
+    """
+    return DistributionPage(name, distributions[name])
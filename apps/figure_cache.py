@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+# bounded LRU cache of serialized callback responses, shared by all pages, backed by an
+# optional on-disk store of precomputed ("baked") responses, see bake.py
+import collections
+import glob
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from functools import wraps
+
+from app import app
+
+
+class FigureCache(object):
+    """
+    LRU cache mapping (callback id, quantized inputs) to the serialized JSON response of the callback,
+    bounded by the total size of the stored responses in bytes
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= len(self._entries.pop(key))
+            self._entries[key] = value
+            self.nbytes += len(value)
+            # evict least recently used responses until the memory cap is met
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.nbytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+class BakedStore(object):
+    """
+    read-only store of zlib-compressed callback responses in a single memory-mapped file, which is
+    shared by all worker processes through the page cache
+
+    file layout: magic, length of the index (uint64), JSON index {key: [offset, length]}, payloads
+    """
+    magic = b'SAFIG001'
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:8] != self.magic:
+            raise ValueError(f'{path} is not a baked figure store')
+        index_length, = struct.unpack('<Q', self._mmap[8:16])
+        header = json.loads(self._mmap[16:16 + index_length].decode('utf-8'))
+        self.version = header['version']
+        self._index = header['index']
+        self._data_start = 16 + index_length
+
+    def __len__(self):
+        return len(self._index)
+
+    def get(self, key):
+        entry = self._index.get(repr(key))
+        if entry is None:
+            return None
+        offset, length = entry
+        start = self._data_start + offset
+        return zlib.decompress(self._mmap[start:start + length])
+
+    @classmethod
+    def write(cls, path, version, items):
+        """
+        write the (key, response) pairs in 'items' to a new store at 'path'
+        """
+        index = {}
+        tmp_path = path + '.tmp'
+        payload_path = path + '.payload'
+        offset = 0
+        with open(payload_path, 'wb') as payload:
+            for key, response in items:
+                compressed = zlib.compress(response, 6)
+                index[repr(key)] = [offset, len(compressed)]
+                payload.write(compressed)
+                offset += len(compressed)
+
+        header = json.dumps({'version': version, 'index': index}).encode('utf-8')
+        with open(tmp_path, 'wb') as f, open(payload_path, 'rb') as payload:
+            f.write(cls.magic)
+            f.write(struct.pack('<Q', len(header)))
+            f.write(header)
+            while True:
+                chunk = payload.read(2**20)
+                if not chunk:
+                    break
+                f.write(chunk)
+        os.remove(payload_path)
+        os.replace(tmp_path, path)
+
+        return len(index), offset
+
+
+def source_version():
+    """
+    hash of the app sources, a baked store is only used if it was created from the same sources
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sha = hashlib.sha1()
+    for filename in [os.path.join(root, 'app.py')] + sorted(glob.glob(os.path.join(root, 'apps', '*.py'))):
+        with open(filename, 'rb') as f:
+            sha.update(f.read())
+    return sha.hexdigest()
+
+
+def open_baked_store(path):
+    if not os.path.exists(path):
+        return None
+    store = BakedStore(path)
+    if store.version != source_version():
+        app.logger.warning(f'ignoring baked figure store {path}, it was created from different sources')
+        return None
+    return store
+
+
+# memory cap in MB, configurable by environment variable
+figure_cache = FigureCache(max_bytes=int(float(os.environ.get('FIGURE_CACHE_MB', 64)) * 2**20))
+
+# store of precomputed responses written by bake.py
+baked_store_path = os.environ.get('BAKED_STORE', os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'baked', 'figures.bin'))
+baked_store = open_baked_store(baked_store_path)
+
+# memoized callbacks with a known state space, callback id -> (callback, states, key)
+bakeable = collections.OrderedDict()
+
+
+def quantize(value, digits=6):
+    """
+    make callback inputs hashable and remove the float noise of slider steps (e.g. 1.2000000000000002);
+    ints are converted to floats, as the browser sends whole slider values as JSON ints (2 for 2.0)
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return round(float(value), digits)
+    elif isinstance(value, (list, tuple)):
+        return tuple(quantize(v, digits) for v in value)
+    elif isinstance(value, dict):
+        return tuple(sorted((k, quantize(v, digits)) for k, v in value.items()))
+    else:
+        return value
+
+
+def canonical_value(value):
+    # numbers with 6 decimals, also within lists and dicts, dicts with sorted keys, anything else as JSON
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'{value:.6f}'
+    elif isinstance(value, (list, tuple)):
+        return '[' + ','.join(canonical_value(v) for v in value) + ']'
+    elif isinstance(value, dict):
+        return '{' + ','.join(f'{json.dumps(k, ensure_ascii=False)}:{canonical_value(value[k])}'
+                              for k in sorted(value)) + '}'
+    return json.dumps(value, ensure_ascii=False)
+
+
+def static_key(args):
+    """
+    key of the arguments of a callback in the responses computed ahead for the browser (see export.py and
+    apps/presenter.py), computed alike by static/dash_static.js and assets/presenter.js
+    """
+    return ','.join(canonical_value(value) for value in args)
+
+
+def memoize(func=None, key=None, states=None):
+    """
+    cache the serialized response of a dash callback in 'figure_cache', has to be applied to the
+    function returned by app.callback (i.e. placed above @app.callback), optionally with a function
+    'key' mapping the callback arguments to the relevant part of the inputs and a function 'states'
+    returning the arguments of all reachable slider states for bake.py
+    """
+    if func is None:
+        return lambda f: memoize(f, key=key, states=states)
+
+    for callback_id, entry in app.callback_map.items():
+        if entry.get('callback') is func:
+            break
+    else:
+        raise ValueError(f'{func.__name__} is not a registered dash callback')
+
+    @wraps(func)
+    def cached(*args):
+        cache_key = (callback_id, quantize(args if key is None else key(*args)))
+        response = figure_cache.get(cache_key)
+        if response is None:
+            if baked_store is not None:
+                response = baked_store.get(cache_key)
+            if response is None:
+                response = func(*args).encode('utf-8')
+            figure_cache.put(cache_key, response)
+        return response
+
+    entry['callback'] = cached
+    if states is not None:
+        bakeable[callback_id] = (func, states, key)
+
+    return cached
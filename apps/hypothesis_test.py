@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+import os
+from functools import lru_cache
+
+import dash_core_components as dcc
+import dash_html_components as html
+from dash.dependencies import Input, Output
+
+import numpy as np
+import scipy.stats
+
+from app import app
+from apps.figure_cache import memoize
+from apps.commons import gen_header, gen_dist_layout, common_fig_layout, build_figure, scatter, bar
+from apps.distributions import t_test_power
+from apps.explorer import slider_range, param_value
+from apps.montecarlo import simulate_t_tests
+
+# global variables
+# simulated two-sample t-tests per slider state
+simulated_tests = int(os.environ.get('SIMULATED_TESTS', 100000))
+alphas = [0.01, 0.05, 0.1]
+# observations per group (log10 slider)
+n_param = {'min': 2, 'max': 200, 'step': 0.01, 'log10': True, 'value': 20}
+# histogram bins of the p-values, the significance levels are multiples of the bin width
+p_bins = np.linspace(0., 1., 101)
+n_t_bins = 80
+
+rejected_color = '#e41a1c'
+accepted_color = '#377eb8'
+
+# components of the app
+# header text plus logo
+header = gen_header("Hypothesis Tests", logo='/assets/icons8-return-96.png', href='/toc')
+
+n_min, n_max, n_step, n_value = slider_range(n_param)
+
+controls = html.Div([
+    html.P(f"""
+    Each slider setting simulates {simulated_tests:,d} experiments, which compare the means of two groups
+    of n observations with a two-sided t-test. The observations are drawn from normal distributions, whose
+    means differ by the true effect size d (Cohen's d).
+    """),
+    html.P("""
+    Without effect (d=0), the p-values are uniformly distributed and the null hypothesis is rejected (a type
+    I error) with the probability \u03B1. With an effect, the rejections are correct and the remaining
+    tests are type II errors.
+    """),
+    html.P('Use the slider to set the true d:', className="control_label"),
+    dcc.Slider(id='hypothesis-d-slider',
+               min=0., max=1.5, step=0.05, value=0.,
+               marks={0.: '0', 0.2: '0.2', 0.5: '0.5', 0.8: '0.8', 1.: '1.0', 1.5: '1.5'},
+               className='dcc_control'),
+    html.P('Use the slider to set n (per group):', className="control_label"),
+    dcc.Slider(id='hypothesis-n-slider',
+               min=n_min, max=n_max, step=n_step, value=n_value,
+               marks={float(np.log10(mark)): f'{mark:d}' for mark in [2, 5, 10, 20, 50, 100, 200]},
+               className='dcc_control'),
+    html.P('significance level \u03B1:', className="control_label"),
+    dcc.RadioItems(id='hypothesis-alpha',
+                   options=[{'label': f'{alpha:g}', 'value': alpha} for alpha in alphas],
+                   value=0.05,
+                   labelStyle={'display': 'inline-block', 'margin-right': '12px'},
+                   className='dcc_control'),
+], className="w3-container w3-col w3-mobile w3-padding", style={'width': '25%'})
+
+layout = gen_dist_layout(header, controls, dcc.Graph(id='hypothesis-p-display'),
+                         dcc.Graph(id='hypothesis-t-display'))
+
+
+def observations(slider_value):
+    # the number of observations per group set by the log10 slider
+    return int(round(param_value(n_param, slider_value)))
+
+
+def gen_layout(title, x_title, y_title, shapes):
+    fig_layout = {
+        'xaxis': {'title': {'text': x_title}},
+        'yaxis': {'title': {'text': y_title}},
+        'legend': {'xanchor': 'right', 'yanchor': 'top', 'x': 1, 'y': 1},
+        'barmode': 'overlay',
+        'bargap': 0,
+        'shapes': shapes,
+        'title': {'text': title, 'xref': "paper", 'x': 0}
+    }
+    fig_layout.update(common_fig_layout)
+    return fig_layout
+
+
+def gen_error_rates(d, n, alpha, rejected):
+    """
+    title of the p-value histogram: the empirical error rates next to the exact ones
+    """
+    if d == 0.:
+        return f"Type I error rate {rejected:.4f} (\u03B1={alpha:g})<br>" + \
+               f"p-values of {simulated_tests:,d} simulated t-tests"
+    power = float(t_test_power(2 * n - 2, d * np.sqrt(n / 2.), alpha, 2))
+    return f"Power {rejected:.4f} (exact {power:.4f})<br>" + \
+           f"type II error rate {1. - rejected:.4f} (exact {1. - power:.4f})"
+
+
+def gen_p_figure(p, d, n, alpha):
+    density = np.histogram(p, bins=p_bins)[0] / (len(p) * np.diff(p_bins))
+    centers = 0.5 * (p_bins[:-1] + p_bins[1:])
+    width = p_bins[1] - p_bins[0]
+    # the bins are aligned with alpha
+    significant = centers < alpha
+    rejected = np.count_nonzero(p < alpha) / len(p)
+
+    data = [
+        bar(x=centers[significant], y=density[significant], width=width, name='rejected (p < \u03B1)',
+            marker={'color': rejected_color}),
+        bar(x=centers[~significant], y=density[~significant], width=width, name='not rejected',
+            marker={'color': accepted_color}),
+        scatter(x=[0., 1.], y=[1., 1.], mode='lines', name='uniform (d=0)',
+                line={'dash': 'dash', 'width': 1.5, 'color': 'black'}),
+    ]
+    shapes = [{'type': 'line', 'x0': alpha, 'x1': alpha, 'yref': 'paper', 'y0': 0, 'y1': 1,
+               'line': {'dash': 'dot', 'width': 1.5, 'color': 'black'}}]
+    return build_figure(data, gen_layout(gen_error_rates(d, n, alpha, rejected), 'p-value', 'density', shapes))
+
+
+def gen_t_figure(t, d, n, alpha):
+    df = 2 * n - 2
+    nc = d * np.sqrt(n / 2.)
+    t_crit = scipy.stats.t.isf(alpha / 2., df)
+    lo = min(-5., -t_crit - 1.)
+    hi = max(5., t_crit + 1., nc + 4.)
+    bins = np.linspace(lo, hi, n_t_bins + 1)
+    density = np.histogram(t, bins=bins)[0] / (len(t) * np.diff(bins))
+    centers = 0.5 * (bins[:-1] + bins[1:])
+    x = np.linspace(lo, hi, 301)
+
+    data = [
+        bar(x=centers, y=density, width=bins[1] - bins[0], name='simulated', opacity=0.6,
+            marker={'color': np.where(np.abs(centers) > t_crit, rejected_color, accepted_color)}),
+        scatter(x=x, y=scipy.stats.t.pdf(x, df), mode='lines', name=f't-distribution (d=0, df={df})',
+                line={'dash': 'dash', 'width': 1.5, 'color': 'black'}),
+    ]
+    if d > 0.:
+        data.append(scatter(x=x, y=scipy.stats.nct.pdf(x, df, nc), mode='lines', name=f'noncentral t (d={d:.2f})',
+                            line={'width': 1.5, 'color': rejected_color}))
+
+    # rejection region of the two-sided test
+    shapes = [{'type': 'rect', 'x0': x0, 'x1': x1, 'yref': 'paper', 'y0': 0, 'y1': 1, 'layer': 'below',
+               'line': {'width': 0}, 'fillcolor': rejected_color, 'opacity': 0.1}
+              for x0, x1 in [(lo, -t_crit), (t_crit, hi)]]
+    fig_title = f"t statistics (n={n} per group)<br>rejection region |t| > {t_crit:.3f}"
+    return build_figure(data, gen_layout(fig_title, 't statistic', 'density', shapes))
+
+
+@lru_cache(maxsize=8)
+def experiments(n, d):
+    """
+    t statistics and p-values of the simulated experiments, seeded by n and d; the same experiments for
+    all significance levels, hence a click on another level only bins them again
+    """
+    t, p = simulate_t_tests(simulated_tests, n, d, [n, int(round(d * 1000.))])
+    t.flags.writeable = False
+    p.flags.writeable = False
+    return t, p
+
+
+@memoize
+@app.callback([Output('hypothesis-p-display', 'figure'),
+               Output('hypothesis-t-display', 'figure')],
+              [Input('hypothesis-d-slider', 'value'),
+               Input('hypothesis-n-slider', 'value'),
+               Input('hypothesis-alpha', 'value')])
+def gen_figures(d, n_slider, alpha):
+    n = observations(n_slider)
+    t, p = experiments(n, d)
+    return gen_p_figure(p, d, n, alpha), gen_t_figure(t, d, n, alpha)
+
+
+if __name__ == '__main__':
+    app.title = "Hypothesis Tests"
+    app.layout = layout
+    app.run_server(debug=True)
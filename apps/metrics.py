@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+# per-callback latency and payload-size instrumentation, exposed in the Prometheus text format at /metrics
+import bisect
+import collections
+import cProfile
+import os
+import random
+import threading
+import time
+from functools import wraps
+
+import flask
+
+from apps.coalesce import coalescer
+from apps.figure_cache import figure_cache
+from apps.offload import offload_pool
+from apps.sessions import session_store
+
+# opt-in profiling: fraction of callback requests run under cProfile, the profiles of requests slower
+# than PROFILE_MIN_MS are written to PROFILE_DIR
+profile_sample_rate = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+profile_min_seconds = float(os.environ.get('PROFILE_MIN_MS', 100)) / 1000.
+profile_dir = os.environ.get('PROFILE_DIR', 'profiles')
+
+time_buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1., 2.5, 5.)
+size_buckets = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram(object):
+    """
+    cumulative histogram with fixed upper bucket bounds, like a Prometheus histogram
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            yield ('+Inf' if bound == float('inf') else repr(bound)), cumulative
+
+
+class CallbackMetrics(object):
+    """
+    histograms per metric and callback id
+    """
+    metrics = collections.OrderedDict([
+        ('dash_callback_seconds', ('wall time of the callback request', time_buckets)),
+        ('dash_callback_build_seconds', ('time spent in the callback function (scipy/plotly)', time_buckets)),
+        ('dash_callback_serialize_seconds', ('time spent serializing (or reading the cached) response',
+                                             time_buckets)),
+        ('dash_callback_response_bytes', ('size of the uncompressed response', size_buckets)),
+    ])
+
+    def __init__(self):
+        self._histograms = {name: {} for name in self.metrics}
+        self._lock = threading.Lock()
+
+    def observe(self, name, callback_id, value):
+        with self._lock:
+            histograms = self._histograms[name]
+            if callback_id not in histograms:
+                histograms[callback_id] = Histogram(self.metrics[name][1])
+            histograms[callback_id].observe(value)
+
+    def exposition(self):
+        """
+        all metrics in the Prometheus text format
+        """
+        lines = []
+        with self._lock:
+            for name, (description, _) in self.metrics.items():
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for callback_id, histogram in sorted(self._histograms[name].items()):
+                    label = 'callback="{}"'.format(callback_id.replace('\\', '\\\\').replace('"', '\\"'))
+                    for bound, cumulative in histogram.samples():
+                        lines.append(f'{name}_bucket{{{label},le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_sum{{{label}}} {histogram.sum!r}')
+                    lines.append(f'{name}_count{{{label}}} {histogram.count}')
+
+        stats = figure_cache.stats()
+        for key, kind in [('hits', 'counter'), ('misses', 'counter'), ('evictions', 'counter'),
+                          ('entries', 'gauge'), ('bytes', 'gauge')]:
+            name = f'figure_cache_{key}_total' if kind == 'counter' else f'figure_cache_{key}'
+            lines.append(f'# TYPE {name} {kind}')
+            lines.append(f'{name} {stats[key]}')
+
+        for prefix, stats, keys in [
+            ('offload', offload_pool.stats(),
+             [('submitted', 'counter'), ('rejected', 'counter'), ('in_flight', 'gauge')]),
+            ('coalesce', coalescer.stats(),
+             [('superseded', 'counter'), ('shared', 'counter'), ('in_flight', 'gauge')]),
+            ('session_store', session_store.stats(),
+             [('hits', 'counter'), ('misses', 'counter'), ('evictions', 'counter'), ('entries', 'gauge'),
+              ('bytes', 'gauge')]),
+        ]:
+            for key, kind in keys:
+                name = f'{prefix}_{key}_total' if kind == 'counter' else f'{prefix}_{key}'
+                lines.append(f'# TYPE {name} {kind}')
+                lines.append(f'{name} {stats[key]}')
+
+        return '\n'.join(lines) + '\n'
+
+
+callback_metrics = CallbackMetrics()
+
+
+def timed_build(func):
+    """
+    measure the time spent in the callback function itself (only within requests)
+    """
+    @wraps(func)
+    def timed(*args, **kwargs):
+        if not flask.has_request_context():
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            flask.g.build_seconds = getattr(flask.g, 'build_seconds', 0.) + time.perf_counter() - start
+    return timed
+
+
+def instrument(app):
+    """
+    instrument all callbacks registered afterwards and add the /metrics route to the flask server
+    """
+    register_callback = app.callback
+
+    def callback(output, inputs=[], state=[]):
+        register = register_callback(output, inputs, state)
+        return lambda func: register(timed_build(func))
+
+    app.callback = callback
+
+    endpoint = app.config.routes_pathname_prefix + '_dash-update-component'
+    dispatch = app.server.view_functions[endpoint]
+
+    def timed_dispatch():
+        callback_id = flask.request.get_json()['output']
+        entry = app.callback_map.get(callback_id)
+        # the registered callback (including memoization and serialization) is wrapped on first use,
+        # as it may be replaced (e.g. by memoize) after registration
+        if entry is not None and not getattr(entry['callback'], 'instrumented', False):
+            entry['callback'] = timed_callback(entry['callback'])
+
+        profiler = None
+        if profile_sample_rate > 0. and random.random() < profile_sample_rate:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        flask.g.build_seconds = 0.
+        start = time.perf_counter()
+        try:
+            response = dispatch()
+        finally:
+            wall_seconds = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+                if wall_seconds >= profile_min_seconds:
+                    save_profile(profiler, callback_id, wall_seconds)
+            callback_metrics.observe('dash_callback_seconds', callback_id, wall_seconds)
+
+        build_seconds = flask.g.build_seconds
+        callback_seconds = getattr(flask.g, 'callback_seconds', build_seconds)
+        callback_metrics.observe('dash_callback_build_seconds', callback_id, build_seconds)
+        callback_metrics.observe('dash_callback_serialize_seconds', callback_id, callback_seconds - build_seconds)
+        callback_metrics.observe('dash_callback_response_bytes', callback_id, response.content_length or 0)
+
+        return response
+
+    app.server.view_functions[endpoint] = timed_dispatch
+
+    @app.server.route('/metrics')
+    def metrics():
+        return flask.Response(callback_metrics.exposition(), mimetype='text/plain; version=0.0.4')
+
+
+def timed_callback(func):
+    """
+    measure the time spent in the registered callback, i.e. the callback function plus serialization
+    """
+    @wraps(func)
+    def timed(*args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            flask.g.callback_seconds = time.perf_counter() - start
+    timed.instrumented = True
+    return timed
+
+
+def save_profile(profiler, callback_id, wall_seconds):
+    os.makedirs(profile_dir, exist_ok=True)
+    filename = os.path.join(profile_dir, f'{callback_id}-{time.strftime("%Y%m%d-%H%M%S")}-'
+                                         f'{int(wall_seconds * 1000.)}ms.prof')
+    profiler.dump_stats(filename)
+    flask.current_app.logger.info(f'saved profile of {callback_id} ({wall_seconds * 1000.:.1f} ms) to {filename}')
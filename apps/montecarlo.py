@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# Monte-Carlo simulation of diagnostic tests, t-tests and sample means, vectorized in batches with reusable buffers
+import itertools
+import threading
+
+import numpy as np
+import scipy.stats
+
+from apps.offload import offload_map
+
+# simulated t-tests per batch, the batches run in parallel in the offload processes
+t_test_batch_size = 10000
+
+# populations of the sample means: the distribution and a sampler of the sums of n draws (exact
+# distributions of the sums where available, i.e. one value per mean instead of n)
+populations = {
+    'exponential': {'dist': scipy.stats.expon(),
+                    'sums': lambda rng, n, size: rng.gamma(n, 1., size)},
+    'chi2': {'dist': scipy.stats.chi2(1),
+             'sums': lambda rng, n, size: rng.chisquare(n, size)},
+    'uniform': {'dist': scipy.stats.uniform(),
+                'sums': lambda rng, n, size: rng.random((size, n)).sum(axis=1)},
+    'lognormal': {'dist': scipy.stats.lognorm(1.),
+                  'sums': lambda rng, n, size: rng.lognormal(size=(size, n)).sum(axis=1)},
+}
+
+
+def predictive_values(prevalence, sensitivity, specificity):
+    """
+    exact positive and negative predictive values (posterior probabilities of being sick if tested
+    positive and of being healthy if tested negative), nan if undefined
+    """
+    true_positives = sensitivity * prevalence
+    false_positives = (1. - specificity) * (1. - prevalence)
+    true_negatives = specificity * (1. - prevalence)
+    false_negatives = (1. - sensitivity) * prevalence
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ppv = np.divide(true_positives, true_positives + false_positives)
+        npv = np.divide(true_negatives, true_negatives + false_negatives)
+
+    return float(ppv), float(npv)
+
+
+class ContingencySimulator(object):
+    """
+    draws the status (sick with probability 'prevalence') and the diagnostic marker (N(0, 1) for the
+    healthy, N(separation, 1) for the sick) of a large number of subjects and counts the contingency
+    table of the test classifying markers above the cutoff as positive
+
+    the samples are drawn in batches into preallocated buffers, hence memory is bounded by the batch
+    size and no arrays are allocated per call
+    """
+
+    def __init__(self, batch_size=2**18):
+        self.batch_size = batch_size
+        self._uniform = np.empty(batch_size)
+        self._marker = np.empty(batch_size)
+        self._sick = np.empty(batch_size, dtype=bool)
+        self._positive = np.empty(batch_size, dtype=bool)
+        self._both = np.empty(batch_size, dtype=bool)
+        self._lock = threading.Lock()
+
+    def simulate(self, n_samples, prevalence, separation, cutoff, seed=None):
+        """
+        return the contingency table [[true positives, false positives], [false negatives, true negatives]],
+        for an array of cutoffs the tables of all cutoffs counted from the same subjects (cutoffs x 2 x 2)
+        """
+        rng = np.random.default_rng(seed)
+        cutoffs = np.atleast_1d(cutoff)
+        n_sick = 0
+        n_positive = np.zeros(len(cutoffs), dtype=np.int64)
+        n_true_positive = np.zeros(len(cutoffs), dtype=np.int64)
+
+        with self._lock:
+            remaining = n_samples
+            while remaining > 0:
+                n = min(remaining, self.batch_size)
+                uniform = self._uniform[:n]
+                marker = self._marker[:n]
+                sick = self._sick[:n]
+                positive = self._positive[:n]
+                both = self._both[:n]
+
+                rng.random(out=uniform)
+                np.less(uniform, prevalence, out=sick)
+                rng.standard_normal(out=marker)
+                np.add(marker, separation, out=marker, where=sick)
+                n_sick += np.count_nonzero(sick)
+                for i, value in enumerate(cutoffs):
+                    np.greater(marker, value, out=positive)
+                    np.logical_and(positive, sick, out=both)
+                    n_positive[i] += np.count_nonzero(positive)
+                    n_true_positive[i] += np.count_nonzero(both)
+                remaining -= n
+
+        n_false_positive = n_positive - n_true_positive
+        n_false_negative = n_sick - n_true_positive
+        n_true_negative = n_samples - n_sick - n_false_positive
+
+        tables = np.stack([np.stack([n_true_positive, n_false_positive], axis=-1),
+                           np.stack([n_false_negative, n_true_negative], axis=-1)], axis=1)
+        return tables if np.ndim(cutoff) else tables[0]
+
+
+def t_test_batch(n_tests, n, d, seed, max_values=2**20):
+    """
+    t statistics of 'n_tests' two-sample t-tests with n observations per group drawn from N(0, 1) and
+    N(d, 1); the samples are drawn as (tests x n) arrays in chunks of at most 'max_values' values into a
+    reused buffer, means and variances follow from the sums and sums of squares of the rows (the effect d
+    is added to the difference of the means instead of the samples)
+    """
+    rng = np.random.default_rng(seed)
+    rows = max(1, min(n_tests, max_values // n))
+    buffer = np.empty((rows, n), dtype=np.float32)
+    ones = np.ones(n, dtype=np.float32)
+    t = np.empty(n_tests)
+
+    for start in range(0, n_tests, rows):
+        size = min(rows, n_tests - start)
+        samples = buffer[:size]
+        moments = []
+        for _ in range(2):
+            rng.standard_normal(out=samples, dtype=np.float32)
+            sums = (samples @ ones).astype(float)
+            squares = np.einsum('ij,ij->i', samples, samples).astype(float)
+            moments.append((sums / n, (squares - sums**2 / n) / (n - 1)))
+        (mean_1, var_1), (mean_2, var_2) = moments
+        t[start:start + size] = (mean_2 - mean_1 + d) / np.sqrt((var_1 + var_2) / n)
+
+    return t
+
+
+def simulate_t_tests(n_tests, n, d, seed):
+    """
+    t statistics and two-sided p-values of 'n_tests' simulated two-sample t-tests (see t_test_batch),
+    batches with independent seeds run in parallel
+    """
+    sizes = [t_test_batch_size] * (n_tests // t_test_batch_size)
+    if n_tests % t_test_batch_size:
+        sizes.append(n_tests % t_test_batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    t = np.concatenate(offload_map(t_test_batch, [(size, n, d, s) for size, s in zip(sizes, seeds)]))
+    return t, 2. * scipy.stats.t.sf(np.abs(t), 2 * n - 2)
+
+
+def sample_means(population, n, seed, size, start=0):
+    """
+    generator of batches of 'size' standardized means of n draws from one of the 'populations', starting
+    at batch 'start'; every batch is drawn with its own seed, hence a stream can be replayed from any batch
+    """
+    dist = populations[population]['dist']
+    sums = populations[population]['sums']
+    scale = dist.std() * np.sqrt(n)
+    for batch in itertools.count(start):
+        rng = np.random.default_rng([seed, batch])
+        yield (sums(rng, n, size) - n * dist.mean()) / scale
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+# CPU-heavy callbacks run in a bounded pool of processes, the threads of a web worker (see
+# gunicorn.conf.py) only wait for them and keep serving the cheap callbacks
+import concurrent.futures
+import importlib
+import multiprocessing
+import multiprocessing.forkserver
+import os
+import threading
+from functools import wraps
+
+from dash.exceptions import PreventUpdate
+
+# processes per web worker (0 runs the callbacks in the calling thread), the number of offloaded
+# callbacks running or waiting per web worker is limited to 'offload_queue_depth', further requests wait
+# for a free slot up to 'offload_queue_wait' seconds (apps/coalesce.py keeps only the newest request of a
+# slider waiting) and are dropped after that (PreventUpdate, i.e. the figure keeps its state)
+offload_processes = int(os.environ.get('OFFLOAD_PROCESSES', 0))
+offload_queue_depth = int(os.environ.get('OFFLOAD_QUEUE_DEPTH', 2 * max(offload_processes, 1)))
+offload_queue_wait = float(os.environ.get('OFFLOAD_QUEUE_WAIT', 10))
+offload_timeout = float(os.environ.get('OFFLOAD_TIMEOUT', 30))
+
+# offloaded functions by '<module>.<name>', the pool processes import the module to register them
+offloaded = {}
+
+
+def call(name, args):
+    """
+    run an offloaded function (or a module level function, see offload_map) in a pool process
+    """
+    if name not in offloaded:
+        module_name, func_name = name.rsplit('.', 1)
+        module = importlib.import_module(module_name)
+        if name not in offloaded:
+            return getattr(module, func_name)(*args)
+    return offloaded[name](*args)
+
+
+def offloaded_modules():
+    return sorted({name.rsplit('.', 1)[0] for name in offloaded})
+
+
+def start_forkserver():
+    """
+    start the forkserver of the pool processes in the gunicorn master (see gunicorn.conf.py) once all pages
+    are loaded, the web workers forked afterwards share it instead of starting one each on their first
+    offloaded call; a worker starts its own if the shared one is gone
+    """
+    if offload_processes == 0:
+        return
+    multiprocessing.get_context('forkserver').set_forkserver_preload(offloaded_modules())
+    multiprocessing.forkserver.ensure_running()
+
+    server = multiprocessing.forkserver._forkserver
+    master = os.getpid()
+    shared_pid = server._forkserver_pid
+    ensure_running = server.ensure_running
+
+    def ensure_shared():
+        # the shared forkserver is not a child of the workers, which cannot wait for it
+        if os.getpid() != master and server._forkserver_pid == shared_pid:
+            try:
+                os.kill(shared_pid, 0)
+                return
+            except ProcessLookupError:
+                os.close(server._forkserver_alive_fd)
+                server._forkserver_address = None
+                server._forkserver_alive_fd = None
+                server._forkserver_pid = None
+        ensure_running()
+
+    server.ensure_running = ensure_shared
+
+
+class OffloadPool(object):
+    """
+    process pool with a limited number of pending calls, the pool is created on first use in every
+    (forked) web worker; the processes are started by a forkserver (shared by the workers, see
+    start_forkserver), as forking the threaded web worker itself is unsafe
+    """
+
+    def __init__(self, processes, queue_depth, queue_wait, timeout):
+        self.processes = processes
+        self.queue_depth = queue_depth
+        self.queue_wait = queue_wait
+        self.timeout = timeout
+        self.submitted = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self._slots = threading.BoundedSemaphore(queue_depth)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                context = multiprocessing.get_context('forkserver')
+                # the forkserver imports the pages once, the pool processes are forked from it
+                context.set_forkserver_preload(offloaded_modules())
+                self._executor = concurrent.futures.ProcessPoolExecutor(self.processes, mp_context=context)
+                self._pid = os.getpid()
+            return self._executor
+
+    def run(self, name, args):
+        return self.map(name, [args])[0]
+
+    def map(self, name, args_list):
+        """
+        results of the calls with every tuple of arguments, which run concurrently and take a single
+        slot of the queue
+        """
+        if not self._slots.acquire(timeout=self.queue_wait):
+            with self._lock:
+                self.rejected += 1
+            raise PreventUpdate
+
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+        futures = []
+        try:
+            executor = self._get_executor()
+            try:
+                for args in args_list:
+                    futures.append(executor.submit(call, name, args))
+                # the timeout applies to all calls together
+                _, pending = concurrent.futures.wait(futures, timeout=self.timeout)
+                for future in pending:
+                    future.cancel()
+                if pending:
+                    raise concurrent.futures.TimeoutError
+                return [future.result() for future in futures]
+            except concurrent.futures.process.BrokenProcessPool:
+                # a pool process died, start a new pool for the next call
+                with self._lock:
+                    if self._executor is executor:
+                        self._executor = None
+                raise
+        finally:
+            self._release_when_done(futures)
+
+    def _release_when_done(self, futures):
+        """
+        free the slot when all calls are done, calls already running at a timeout cannot be cancelled and
+        keep their slot until they finish
+        """
+        remaining = [len(futures)]
+
+        def release(_=None):
+            with self._lock:
+                remaining[0] -= 1
+                if remaining[0] > 0:
+                    return
+                self.in_flight -= 1
+            self._slots.release()
+
+        if not futures:
+            remaining[0] = 1
+            release()
+        for future in futures:
+            future.add_done_callback(release)
+
+    def stats(self):
+        with self._lock:
+            return {'submitted': self.submitted, 'rejected': self.rejected, 'in_flight': self.in_flight}
+
+
+offload_pool = OffloadPool(offload_processes, offload_queue_depth, offload_queue_wait, offload_timeout)
+
+
+def offload(func):
+    """
+    run a CPU-heavy callback in 'offload_pool', has to be applied to the function itself (i.e. placed
+    below @app.callback) and the arguments and result have to be picklable
+    """
+    name = f'{func.__module__}.{func.__qualname__}'
+    offloaded[name] = func
+    if offload_processes == 0:
+        return func
+
+    @wraps(func)
+    def run(*args):
+        return offload_pool.run(name, args)
+    return run
+
+
+def offload_map(func, args_list):
+    """
+    results of the module level function 'func' for every tuple of arguments, spread over the processes
+    of 'offload_pool' (in the calling thread without offload processes); not to be called from an
+    offloaded function, which already runs in a pool process
+    """
+    if offload_processes == 0:
+        return [func(*args) for args in args_list]
+    return offload_pool.map(f'{func.__module__}.{func.__qualname__}', args_list)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# registry of the pages, which are imported (i.e. their layout and callbacks registered) on first request
+import collections
+import importlib
+import threading
+import time
+
+
+class PageRegistry(object):
+    """
+    maps pathnames to page modules in the 'apps' package and imports them lazily, a route 'module:name'
+    denotes the page 'name' generated by module.load_page (e.g. 'explorer:normal_distribution')
+    """
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.timings = collections.OrderedDict()
+        self._pages = {}
+        self._lock = threading.RLock()
+
+    def load(self, pathname):
+        """
+        return the page module for 'pathname' (None for unknown pathnames), importing it if necessary; a
+        trailing slash is ignored (static hosts redirect e.g. /cohen_d to /cohen_d/, see export.py)
+        """
+        if pathname is None:
+            return None
+        name = self.routes.get(pathname.rstrip('/') or '/')
+        if name is None:
+            return None
+
+        page = self._pages.get(name)
+        if page is None:
+            with self._lock:
+                page = self._pages.get(name)
+                if page is None:
+                    start = time.perf_counter()
+                    module_name, _, page_name = name.partition(':')
+                    page = importlib.import_module(f'apps.{module_name}')
+                    if page_name:
+                        page = page.load_page(page_name)
+                    self.timings[name] = time.perf_counter() - start
+                    self._pages[name] = page
+
+        return page
+
+    def load_all(self):
+        for pathname in self.routes:
+            self.load(pathname)
+
+    def warm_up(self):
+        """
+        import all pages in a background thread
+        """
+        thread = threading.Thread(target=self.load_all, name='page-warm-up', daemon=True)
+        thread.start()
+        return thread
+
+    def report(self):
+        """
+        import time per page, pages importing shared modules first are charged for them
+        """
+        lines = [f'{name:>32s}: {seconds * 1000.:8.1f} ms' for name, seconds in self.timings.items()]
+        lines.append(f'{"total":>32s}: {sum(self.timings.values()) * 1000.:8.1f} ms')
+        return '\n'.join(lines)
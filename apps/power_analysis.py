@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+import dash_core_components as dcc
+import dash_html_components as html
+from dash.dependencies import Input, Output
+
+import numpy as np
+import scipy
+
+from app import app
+from apps.figure_cache import memoize
+from apps.commons import gen_header, gen_dist_layout, common_fig_layout, build_figure, scatter
+from apps.distributions import PowerTable
+from apps.explorer import version, slider_range, param_value
+
+# global variables
+alphas = [0.01, 0.05, 0.1]
+# power of the two-sample t-test from a table of the noncentral t-distribution, shared by all processes
+# of the host; a slider move interpolates the table instead of integrating scipy.stats.nct
+power_table = PowerTable(alphas, shared_key=(version, scipy.__version__, 'power'))
+
+# observations per group (log10 slider) and effect sizes of the curves
+n_param = {'min': 2, 'max': 2000, 'step': 0.01, 'log10': True, 'value': 30}
+n_values = np.geomspace(2., 2000., 200)
+d_values = np.linspace(0., 2., 201)
+# small, medium and large effects according to Cohen
+reference_d = [0.2, 0.5, 0.8]
+
+# components of the app
+# header text plus logo
+header = gen_header("Power Analysis", logo='/assets/icons8-return-96.png', href='/toc')
+
+n_min, n_max, n_step, n_value = slider_range(n_param)
+
+controls = html.Div([
+    html.P("""
+    The power of a statistical test is the probability to detect an effect, i.e. to reject the null hypothesis,
+    if the effect exists. For the comparison of the means of two groups with a t-test, it depends on the
+    effect size (Cohen's d), the number of observations per group n and the significance level \u03B1.
+    """),
+    html.P("""
+    Before an experiment, the necessary sample size is estimated as the smallest n, for which the test reaches
+    the targeted power (frequently 0.8) for the expected effect size.
+    """),
+    html.P('Use the slider to set d:', className="control_label"),
+    dcc.Slider(id='power-d-slider',
+               min=0.05, max=2., step=0.05, value=0.5,
+               marks={0.2: '0.2', 0.5: '0.5', 0.8: '0.8', 1.: '1.0', 1.5: '1.5', 2.: '2.0'},
+               className='dcc_control'),
+    html.P('Use the slider to set n (per group):', className="control_label"),
+    dcc.Slider(id='power-n-slider',
+               min=n_min, max=n_max, step=n_step, value=n_value,
+               marks={float(np.log10(mark)): f'{mark:d}' for mark in [2, 10, 50, 200, 1000]},
+               className='dcc_control'),
+    html.P('Use the slider to set the targeted power:', className="control_label"),
+    dcc.Slider(id='power-target-slider',
+               min=0.5, max=0.99, step=0.01, value=0.8,
+               marks={0.5: '0.5', 0.6: '0.6', 0.7: '0.7', 0.8: '0.8', 0.9: '0.9'},
+               className='dcc_control'),
+    html.P('significance level \u03B1:', className="control_label"),
+    dcc.RadioItems(id='power-alpha',
+                   options=[{'label': f'{alpha:g}', 'value': alpha} for alpha in alphas],
+                   value=0.05,
+                   labelStyle={'display': 'inline-block', 'margin-right': '12px'},
+                   className='dcc_control'),
+    dcc.RadioItems(id='power-tails',
+                   options=[{'label': 'two-sided', 'value': 2}, {'label': 'one-sided', 'value': 1}],
+                   value=2,
+                   labelStyle={'display': 'inline-block', 'margin-right': '12px'},
+                   className='dcc_control'),
+], className="w3-container w3-col w3-mobile w3-padding", style={'width': '25%'})
+
+layout = gen_dist_layout(header, controls, dcc.Graph(id='power-n-display'), dcc.Graph(id='power-d-display'))
+
+inputs = [Input('power-d-slider', 'value'),
+          Input('power-n-slider', 'value'),
+          Input('power-target-slider', 'value'),
+          Input('power-alpha', 'value'),
+          Input('power-tails', 'value')]
+
+
+def observations(slider_value):
+    # the number of observations per group set by the log10 slider
+    return int(round(param_value(n_param, slider_value)))
+
+
+def format_n(n):
+    return f'{int(np.ceil(n))}' if np.isfinite(n) else f'more than {n_param["max"]}'
+
+
+def gen_marker(x, y, name):
+    return scatter(x=[x], y=[y], mode='markers', marker={'size': 10, 'color': 'black'}, name=name,
+                   showlegend=False, hoverinfo='x+y')
+
+
+def gen_target_line(target):
+    # horizontal line at the targeted power
+    return {'type': 'line', 'xref': 'paper', 'x0': 0, 'x1': 1, 'y0': target, 'y1': target,
+            'line': {'dash': 'dot', 'width': 1.5, 'color': 'black'}}
+
+
+def gen_reached_line(x_value, x_range):
+    """
+    vertical line where the targeted power is reached (a trace instead of a shape, as the coordinates of
+    shapes on log axes are in log units)
+    """
+    if not (np.isfinite(x_value) and x_range[0] <= x_value <= x_range[1]):
+        return []
+    return [scatter(x=[x_value, x_value], y=[0., 1.], mode='lines', showlegend=False, hoverinfo='x',
+                    line={'dash': 'dot', 'width': 1.5, 'color': 'black'})]
+
+
+def gen_layout(title, x_title, target, x_type='linear'):
+    fig_layout = {
+        'xaxis': {'title': {'text': x_title}, 'type': x_type},
+        'yaxis': {'title': {'text': 'power'}, 'range': [0., 1.02]},
+        'legend': {'xanchor': 'right', 'yanchor': 'bottom', 'x': 1, 'y': 0.05},
+        'shapes': [gen_target_line(target)],
+        'title': {'text': title, 'xref': "paper", 'x': 0}
+    }
+    fig_layout.update(common_fig_layout)
+    return fig_layout
+
+
+@memoize
+@app.callback(Output('power-n-display', 'figure'), inputs)
+def gen_n_figure(d, n_slider, target, alpha, tails):
+    n = observations(n_slider)
+    data = [scatter(x=n_values, y=power_table(n_values, d_ref, alpha, tails), mode='lines',
+                    name=f'd={d_ref:g}', line={'dash': 'dash', 'width': 1.5})
+            for d_ref in reference_d]
+    data.append(scatter(x=n_values, y=power_table(n_values, d, alpha, tails), mode='lines',
+                        name=f'd={d:.2f}', line={'width': 3}))
+    power = float(power_table(n, d, alpha, tails))
+    data.append(gen_marker(n, power, 'power'))
+
+    required = power_table.sample_size(d, target, alpha, tails)
+    data += gen_reached_line(required, (n_values[0], n_values[-1]))
+    fig_title = f"Power {power:.2f} for n={n} per group (d={d:.2f})<br>" + \
+                f"n per group for power {target:.2f}: {format_n(required)}"
+
+    return build_figure(data, gen_layout(fig_title, 'n per group', target, x_type='log'))
+
+
+@memoize
+@app.callback(Output('power-d-display', 'figure'), inputs)
+def gen_d_figure(d, n_slider, target, alpha, tails):
+    n = observations(n_slider)
+    power = power_table(n, d_values, alpha, tails)
+    data = [scatter(x=d_values, y=power, mode='lines', name=f'n={n}', line={'width': 3}),
+            gen_marker(d, float(power_table(n, d, alpha, tails)), 'power')]
+
+    # smallest effect size detected with the targeted power, the power increases with d
+    if power[-1] >= target:
+        i = np.flatnonzero(power >= target)[0]
+        detectable = float(np.interp(target, power[i - 1:i + 1], d_values[i - 1:i + 1])) if i > 0 else d_values[0]
+        text = f'{detectable:.2f}'
+    else:
+        detectable = np.inf
+        text = f'more than {d_values[-1]:g}'
+    data += gen_reached_line(detectable, (d_values[0], d_values[-1]))
+    fig_title = f"Power for n={n} per group<br>smallest d detected with power {target:.2f}: {text}"
+
+    return build_figure(data, gen_layout(fig_title, "effect size (Cohen's d)", target))
+
+
+if __name__ == '__main__':
+    app.title = "Power Analysis"
+    app.layout = layout
+    app.run_server(debug=True)
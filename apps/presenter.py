@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+# presenter mode: the lecturer's browser posts the input state of its page (see assets/presenter.js), the
+# server computes the callbacks of the state once (mostly read from the figure cache) and pushes their
+# responses over server-sent events to the browsers following the session, which answer their own
+# callback requests from the pushed responses
+#
+# the state of a session is a snapshot file in PRESENTER_DIR shared by the workers of the host, a single
+# thread per worker watches the snapshots of the sessions with listeners and fans the changes out to them
+import hashlib
+import json
+import os
+import re
+import secrets
+import tempfile
+import threading
+import time
+
+import flask
+from dash.exceptions import PreventUpdate
+
+from apps.figure_cache import static_key
+
+presenter_dir = os.environ.get('PRESENTER_DIR', '/dev/shm/statistics_apps/presenter' if os.path.isdir('/dev/shm')
+                               else 'presenter')
+presenter_poll = float(os.environ.get('PRESENTER_POLL', 0.1))
+presenter_keepalive = float(os.environ.get('PRESENTER_KEEPALIVE', 15))
+# every listener occupies a thread of a gthread worker, the browsers beyond the limit poll the snapshot
+# (see gunicorn.conf.py)
+presenter_max_listeners = int(os.environ.get('PRESENTER_MAX_LISTENERS', 1000))
+presenter_ttl = float(os.environ.get('PRESENTER_TTL_HOURS', 12)) * 3600.
+
+session_pattern = re.compile(r'^[A-Za-z0-9_-]{8}$')
+
+
+def key_hash(key):
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def sse_event(data):
+    return b'data: ' + json.dumps(data, separators=(',', ':')).encode('utf-8') + b'\n\n'
+
+
+class Channel(object):
+    """
+    snapshot of a session as seen by this process, the serialized events of its latest change (the whole
+    snapshot and the changed responses) and the number of listeners
+    """
+
+    def __init__(self):
+        self.snapshot = None
+        self.mtime = None
+        self.version = 0
+        self.body = b''
+        self.full = b''
+        self.delta = b''
+        self.listeners = 0
+        self.condition = threading.Condition()
+
+    def update(self, snapshot, mtime):
+        previous = self.snapshot['responses'] if self.snapshot is not None else {}
+        changed = {output: response for output, response in snapshot['responses'].items()
+                   if previous.get(output) != response}
+        self.snapshot = snapshot
+        self.mtime = mtime
+        self.version += 1
+        self.body = json.dumps(snapshot, separators=(',', ':')).encode('utf-8')
+        self.full = b'data: ' + self.body + b'\n\n'
+        self.delta = sse_event(dict(snapshot, responses=changed))
+
+
+class Broadcaster(object):
+    """
+    sessions of the presenter mode, the events of a change are serialized once per process and the same
+    bytes are written to all listeners
+    """
+
+    def __init__(self, directory, poll, keepalive, max_listeners, ttl):
+        self.directory = directory
+        self.poll = poll
+        self.keepalive = keepalive
+        self.max_listeners = max_listeners
+        self.ttl = ttl
+        self._channels = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    def path(self, session, suffix='json'):
+        return os.path.join(self.directory, f'{session}.{suffix}')
+
+    def create(self):
+        """
+        new session, returns its id (public, for the followers) and the key of the presenter
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self.prune()
+        session, key = secrets.token_urlsafe(6), secrets.token_urlsafe(16)
+        with open(self.path(session, 'key'), 'w') as f:
+            f.write(key_hash(key))
+        self.write(session, {'seq': 0, 'page': None, 'inputs': {}, 'responses': {}})
+        return session, key
+
+    def prune(self):
+        # sessions older than the ttl, the files may be removed by another worker meanwhile, the temporary
+        # files are being written
+        deadline = time.time() - self.ttl
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.tmp'):
+                continue
+            try:
+                if entry.stat().st_mtime < deadline:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            for session in [session for session, channel in self._channels.items()
+                            if channel.listeners == 0 and not os.path.exists(self.path(session))]:
+                del self._channels[session]
+
+    def authorized(self, session, key):
+        try:
+            with open(self.path(session, 'key')) as f:
+                stored = f.read()
+        except FileNotFoundError:
+            return False
+        return key is not None and secrets.compare_digest(stored, key_hash(key))
+
+    def read(self, session):
+        try:
+            with open(self.path(session)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def write(self, session, snapshot):
+        # written to a temporary file first, the rename is atomic
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+        os.replace(tmp, self.path(session))
+        self.refresh(session)
+
+    def refresh(self, session):
+        """
+        load the snapshot of the session if it changed and wake up the listeners of this process
+        """
+        channel = self._channels.get(session)
+        if channel is None:
+            return
+        try:
+            mtime = os.stat(self.path(session)).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == channel.mtime:
+            return
+        snapshot = self.read(session)
+        if snapshot is None:
+            return
+        with channel.condition:
+            channel.update(snapshot, mtime)
+            channel.condition.notify_all()
+
+    def current(self, session):
+        """
+        channel of an existing session with the latest snapshot (read only if the file changed), None for
+        unknown sessions
+        """
+        if not os.path.exists(self.path(session)):
+            return None
+        channel = self.channel(session)
+        return channel if channel.snapshot is not None else None
+
+    def listeners(self):
+        with self._lock:
+            return sum(channel.listeners for channel in self._channels.values())
+
+    def channel(self, session):
+        with self._lock:
+            channel = self._channels.get(session)
+            if channel is None:
+                channel = self._channels[session] = Channel()
+            # started in the worker on first use, not in the gunicorn master
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch, name='presenter-watcher', daemon=True)
+                self._watcher.start()
+        self.refresh(session)
+        return channel
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll)
+            with self._lock:
+                sessions = [session for session, channel in self._channels.items() if channel.listeners > 0]
+            for session in sessions:
+                self.refresh(session)
+
+    def listen(self, channel):
+        """
+        event stream of a channel: the whole snapshot first, then the changed responses (or the whole
+        snapshot, if the listener missed a change) and keep-alive comments
+        """
+        with self._lock:
+            channel.listeners += 1
+        try:
+            with channel.condition:
+                version = channel.version
+                event = channel.full
+            yield b'retry: 2000\n\n' + event
+            while True:
+                with channel.condition:
+                    channel.condition.wait_for(lambda: channel.version != version, self.keepalive)
+                    if channel.version == version:
+                        event = b': keep-alive\n\n'
+                    else:
+                        event = channel.delta if channel.version == version + 1 else channel.full
+                        version = channel.version
+                yield event
+        finally:
+            with self._lock:
+                channel.listeners -= 1
+
+
+broadcaster = Broadcaster(presenter_dir, presenter_poll, presenter_keepalive, presenter_max_listeners,
+                          presenter_ttl)
+
+
+def compute_responses(callback_map, inputs, previous):
+    """
+    responses of the server callbacks, whose inputs and states are all part of the posted state, by
+    output id as [key of the arguments, response]; the responses of unchanged arguments are reused
+    """
+    responses = {}
+    for output, entry in callback_map.items():
+        if 'callback' not in entry:
+            # clientside callback
+            continue
+        prop_ids = [f'{c["id"]}.{c["property"]}' for c in entry['inputs'] + entry['state']]
+        if not prop_ids or not all(prop_id in inputs for prop_id in prop_ids):
+            continue
+        args = [inputs[prop_id] for prop_id in prop_ids]
+        key = static_key(args)
+        if output in previous and previous[output][0] == key:
+            responses[output] = previous[output]
+            continue
+        try:
+            response = entry['callback'](*args)
+        except PreventUpdate:
+            continue
+        responses[output] = [key, response.decode('utf-8') if isinstance(response, bytes) else response]
+    return responses
+
+
+def cookie_name(session):
+    return f'presenter-{session}'
+
+
+def register_presenter(app, pages):
+    """
+    routes of the presenter mode: /presenter/new?page=<pathname> starts a session and redirects the
+    lecturer to the page, the students open the page with ?follow=<session>
+    """
+    server = app.server
+
+    def check_session(session):
+        if not session_pattern.match(session):
+            flask.abort(404)
+
+    @server.route('/presenter/new')
+    def new_session():
+        page = flask.request.args.get('page', '/')
+        if not page.startswith('/') or page.startswith('//'):
+            flask.abort(400)
+        session, key = broadcaster.create()
+        response = flask.redirect(f'{page}?present={session}', code=303)
+        response.set_cookie(cookie_name(session), key, max_age=int(broadcaster.ttl), httponly=True, samesite='Lax')
+        return response
+
+    @server.route('/presenter/<session>', methods=['POST'])
+    def publish(session):
+        check_session(session)
+        if not broadcaster.authorized(session, flask.request.cookies.get(cookie_name(session))):
+            flask.abort(403)
+        body = flask.request.get_json()
+        snapshot = broadcaster.read(session)
+        # posts overtaken by a newer one
+        if snapshot is None or body['seq'] <= snapshot['seq']:
+            return flask.Response(status=204)
+
+        # the callbacks of the page have to be registered in this worker
+        pages.load(body['page'])
+        previous = snapshot['responses'] if snapshot['page'] == body['page'] else {}
+        responses = compute_responses(app.callback_map, body['inputs'], previous)
+        broadcaster.write(session, {'seq': body['seq'], 'page': body['page'], 'inputs': body['inputs'],
+                                    'responses': responses})
+        return flask.Response(status=204)
+
+    @server.route('/presenter/<session>/events')
+    def events(session):
+        check_session(session)
+        channel = broadcaster.current(session)
+        if channel is None:
+            flask.abort(404)
+        if broadcaster.listeners() >= broadcaster.max_listeners:
+            # the browser polls the snapshot instead
+            return flask.Response(status=503)
+        stream = broadcaster.listen(channel)
+        return flask.Response(stream, mimetype='text/event-stream',
+                              headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    @server.route('/presenter/<session>/snapshot')
+    def snapshot(session):
+        # polled by the followers beyond the listener limit: a stat of the snapshot file per poll, the file
+        # is only read and serialized again after a change
+        check_session(session)
+        channel = broadcaster.current(session)
+        if channel is None:
+            flask.abort(404)
+        with channel.condition:
+            seq, body = channel.snapshot['seq'], channel.body
+        if flask.request.args.get('seq') == str(seq):
+            return flask.Response(status=204)
+        return flask.Response(body, mimetype='application/json')
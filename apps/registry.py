@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+# registry of the distribution explorer pages, which are generated by apps/explorer.py
+#
+# every entry maps the name of the page (its pathname without '/') to
+#   title:       header of the page and text of the link in the table of contents
+#   id:          prefix of the component ids (e.g. 'normal' for 'normal-pdf-display')
+#   dist:        name of the scipy.stats distribution
+#   discrete:    True for discrete distributions (pmf instead of pdf)
+#   label:       legend entry of the distribution, followed by the parameter values
+#   x:           (min, max, number of points) of the random variable
+#   params:      one slider per parameter, given by its scipy.stats keyword ('name'), the slider 'id',
+#                'symbol', 'min', 'max', 'step', 'value', 'marks' and number of 'digits' of the legend;
+#                with 'log10' the slider sets log10 of the parameter ('step' in log10 units)
+#   reference:   fixed reference curve ('dist', 'params', legend 'name')
+#   pdf_range:   optional fixed range of the pdf axis
+#   description: explanatory paragraphs
+import collections
+
+std_normal = {'dist': 'norm', 'params': {}, 'name': 'std. normal<br>distr.'}
+
+distributions = collections.OrderedDict([
+    ('normal_distribution', {
+        'title': 'Normal Distribution',
+        'id': 'normal',
+        'dist': 'norm',
+        'label': 'normal distr.',
+        'x': (-5., 5., 150),
+        'params': [
+            {'name': 'scale', 'id': 'sigma-slider', 'symbol': '\u03C3', 'min': 0.5, 'max': 3., 'step': 0.01,
+             'value': 1.3, 'marks': [0.5, 1., 1.5, 2., 2.5, 3.], 'digits': 2},
+        ],
+        'reference': std_normal,
+        'description': [
+            """
+            The normal distribution is a symmetric continuous distribution defined by two parameters
+            (\u03BC and \u03C3). The mean value \u03BC represents the location of the maximum
+            and the standard deviation \u03C3 the width of the distribution. The so called 'standard normal
+            distribution' (red dashed line) is a special case with \u03BC=0 and \u03C3=1.
+            """,
+        ],
+    }),
+    ('t_distribution', {
+        'title': "Student's t-Distribution",
+        'id': 'tdist',
+        'dist': 't',
+        'label': 't-distribution',
+        'x': (-5., 5., 150),
+        'params': [
+            {'name': 'df', 'id': 'dof-slider', 'symbol': '\u03BD', 'min': 1., 'max': 200., 'step': 0.01,
+             'log10': True, 'value': 1., 'marks': [1, 2, 5, 10, 20, 50, 100], 'digits': 1},
+        ],
+        'reference': std_normal,
+        'description': [
+            """
+            Similar to the normal distribution, the t-distribution is symmetric and bell-shaped, but with heavier
+            tails. It is defined by one parameter, the degrees of freedom \u03BD. With larger \u03BD the
+            t-distribution resembles more and more a standard normal distribution. It is the central distribution
+            for performing t-tests or estimating confidence intervals of sample means.
+            """,
+        ],
+    }),
+    ('chi2_distribution', {
+        'title': '\u03C7\u00B2-Distribution',
+        'id': 'chi2',
+        'dist': 'chi2',
+        'label': '\u03C7\u00B2-distribution',
+        'x': (0.1, 30., 150),
+        'params': [
+            {'name': 'df', 'id': 'chi2-dof-slider', 'symbol': 'k', 'min': 1., 'max': 20., 'step': 0.1,
+             'value': 3., 'marks': [1, 5, 10, 15, 20], 'digits': 1},
+        ],
+        'reference': {'dist': 'chi2', 'params': {'df': 1.}, 'name': '\u03C7\u00B2-distr.<br>(k=1)'},
+        'pdf_range': [0., 0.5],
+        'description': [
+            """
+            The sum of the squares of k independent standard normal random variables follows a \u03C7\u00B2
+            distribution with k degrees of freedom (the dashed line is the square of a single standard normal
+            variable). It is the distribution of the test statistic of \u03C7\u00B2-tests and of sample variances
+            of normally distributed data.
+            """,
+        ],
+    }),
+    ('f_distribution', {
+        'title': 'F-Distribution',
+        'id': 'fdist',
+        'dist': 'f',
+        'label': 'F-distribution',
+        'x': (0.02, 5., 150),
+        'params': [
+            {'name': 'dfn', 'id': 'fdist-dfn-slider', 'symbol': '\u03BD\u2081', 'min': 1., 'max': 50., 'step': 0.05,
+             'log10': True, 'value': 5., 'marks': [1, 2, 5, 10, 20, 50], 'digits': 1},
+            {'name': 'dfd', 'id': 'fdist-dfd-slider', 'symbol': '\u03BD\u2082', 'min': 1., 'max': 50., 'step': 0.05,
+             'log10': True, 'value': 10., 'marks': [1, 2, 5, 10, 20, 50], 'digits': 1},
+        ],
+        'reference': {'dist': 'f', 'params': {'dfn': 1., 'dfd': 1.},
+                      'name': 'F-distr.<br>(\u03BD\u2081=\u03BD\u2082=1)'},
+        'pdf_range': [0., 1.5],
+        'description': [
+            """
+            The ratio of two independent \u03C7\u00B2 distributed variables, each divided by its degrees of
+            freedom \u03BD\u2081 and \u03BD\u2082, follows an F-distribution. It is the distribution of the
+            test statistic of the analysis of variance (ANOVA) and of the comparison of two variances.
+            """,
+        ],
+    }),
+    ('binomial_distribution', {
+        'title': 'Binomial Distribution',
+        'id': 'binom',
+        'dist': 'binom',
+        'discrete': True,
+        'label': 'binomial distr.',
+        'x': (0, 40, 41),
+        'params': [
+            {'name': 'n', 'id': 'binom-n-slider', 'symbol': 'n', 'min': 1, 'max': 40, 'step': 1,
+             'value': 10, 'marks': [1, 10, 20, 30, 40], 'digits': 0},
+            {'name': 'p', 'id': 'binom-p-slider', 'symbol': 'p', 'min': 0.05, 'max': 0.95, 'step': 0.05,
+             'value': 0.5, 'marks': [0.1, 0.3, 0.5, 0.7, 0.9], 'digits': 2},
+        ],
+        'reference': {'dist': 'binom', 'params': {'n': 20, 'p': 0.5}, 'name': 'binomial distr.<br>(n=20, p=0.5)'},
+        'description': [
+            """
+            The binomial distribution is the distribution of the number of successes in n independent trials,
+            each with the probability of success p, e.g. the number of patients responding to a treatment
+            out of n treated patients.
+            """,
+        ],
+    }),
+    ('poisson_distribution', {
+        'title': 'Poisson Distribution',
+        'id': 'poisson',
+        'dist': 'poisson',
+        'discrete': True,
+        'label': 'Poisson distr.',
+        'x': (0, 40, 41),
+        'params': [
+            {'name': 'mu', 'id': 'poisson-mu-slider', 'symbol': '\u03BC', 'min': 0.5, 'max': 25., 'step': 0.1,
+             'value': 3., 'marks': [0.5, 5, 10, 15, 20, 25], 'digits': 1},
+        ],
+        'reference': {'dist': 'poisson', 'params': {'mu': 10.}, 'name': 'Poisson distr.<br>(\u03BC=10)'},
+        'description': [
+            """
+            The Poisson distribution is the distribution of the number of events occurring independently with
+            a constant rate in a fixed interval, e.g. the number of new cases of a rare disease per year. Its
+            mean and variance are both equal to the parameter \u03BC.
+            """,
+        ],
+    }),
+])
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# ROC curves, areas under the curve and operating points, vectorized over separations and cutoffs
+import numpy as np
+import scipy.stats
+
+
+def binormal_roc(separations, cutoffs, sigma_healthy=1., sigma_sick=1.):
+    """
+    false and true positive rates of a test classifying values above the cutoff as positive, for
+    markers distributed as N(0, sigma_healthy) for the healthy and N(separation, sigma_sick) for the
+    sick; separations and cutoffs are broadcast against each other, e.g. separations[:, np.newaxis]
+    and cutoffs[np.newaxis, :] give one ROC curve per separation in a single pass
+    """
+    separations = np.asarray(separations, dtype=float)
+    cutoffs = np.asarray(cutoffs, dtype=float)
+    fpr = scipy.stats.norm.sf(cutoffs / sigma_healthy)
+    tpr = scipy.stats.norm.sf((cutoffs - separations) / sigma_sick)
+    return np.broadcast_arrays(fpr, tpr)
+
+
+def binormal_auc(separations, sigma_healthy=1., sigma_sick=1.):
+    """
+    closed form of the area under the binormal ROC curve
+    """
+    separations = np.asarray(separations, dtype=float)
+    return scipy.stats.norm.cdf(separations / np.sqrt(sigma_healthy**2 + sigma_sick**2))
+
+
+def trapezoid_auc(fpr, tpr, axis=-1):
+    """
+    area under a (sampled) ROC curve by the trapezoidal rule, the points may be in either order
+    """
+    return np.abs(np.trapz(tpr, fpr, axis=axis))
+
+
+def empirical_roc(scores, labels):
+    """
+    ROC curve of empirical data by a sort-based sweep over all distinct scores, O(n log(n));
+    'labels' are True (or 1) for the sick, returns false positive rates, true positive rates and
+    the corresponding cutoffs (values >= cutoff are positive), starting at (0, 0) for cutoff inf
+    """
+    scores = np.asarray(scores, dtype=float).ravel()
+    labels = np.asarray(labels, dtype=bool).ravel()
+    if scores.size == 0:
+        raise ValueError('no scores given')
+
+    order = np.argsort(scores, kind='mergesort')[::-1]
+    scores = scores[order]
+    labels = labels[order]
+
+    # last index of each block of tied scores
+    ends = np.append(np.flatnonzero(np.diff(scores)), scores.size - 1)
+
+    tps = np.cumsum(labels)[ends]
+    fps = (ends + 1) - tps
+    n_sick = tps[-1]
+    n_healthy = fps[-1]
+
+    fpr = np.concatenate(([0.], fps / max(n_healthy, 1)))
+    tpr = np.concatenate(([0.], tps / max(n_sick, 1)))
+    cutoffs = np.concatenate(([np.inf], scores[ends]))
+
+    return fpr, tpr, cutoffs
+
+
+def empirical_auc(scores, labels):
+    fpr, tpr, _ = empirical_roc(scores, labels)
+    return trapezoid_auc(fpr, tpr)
+
+
+def empirical_operating_points(scores, labels, cutoffs):
+    """
+    false and true positive rates of empirical data for many cutoffs at once (values >= cutoff
+    are positive), by binary search in the sorted scores of both groups
+    """
+    scores = np.asarray(scores, dtype=float).ravel()
+    labels = np.asarray(labels, dtype=bool).ravel()
+    cutoffs = np.asarray(cutoffs, dtype=float)
+
+    sick = np.sort(scores[labels])
+    healthy = np.sort(scores[~labels])
+
+    tpr = (sick.size - np.searchsorted(sick, cutoffs, side='left')) / max(sick.size, 1)
+    fpr = (healthy.size - np.searchsorted(healthy, cutoffs, side='left')) / max(healthy.size, 1)
+
+    return fpr, tpr
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+# server-side state of the browser sessions: callbacks keep bulky or running state (e.g. the histograms of
+# apps/central_limit.py) in the session store and exchange small handles with the browser instead of
+# sending the state back and forth in dcc.Store
+#
+# the store is a SQLite database shared by the workers of the host, the entries are dicts of numpy arrays
+# (serialized with np.savez), which expire after SESSION_TTL_HOURS without access, and the least recently
+# used entries are evicted beyond SESSION_STORE_MB
+import io
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+import flask
+import numpy as np
+
+session_store_path = os.environ.get('SESSION_STORE', '/dev/shm/statistics_apps/sessions.sqlite'
+                                    if os.path.isdir('/dev/shm') else 'sessions.sqlite')
+session_store_mb = float(os.environ.get('SESSION_STORE_MB', 64))
+session_ttl = float(os.environ.get('SESSION_TTL_HOURS', 1)) * 3600.
+# seconds between the evictions of a process, the budget may be exceeded in between
+session_evict_interval = float(os.environ.get('SESSION_EVICT_INTERVAL', 1))
+
+# cookie identifying the browser session
+session_cookie = 'dash_session'
+
+# ids of the callback outputs depending on the session (i.e. calling current_session), their requests are
+# not shared across sessions by apps/coalesce.py
+session_outputs = set()
+
+
+def pack(arrays):
+    """
+    serialize a dict of numpy arrays (or scalars and strings), without pickle
+    """
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def unpack(data):
+    with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+        return {name: arrays[name] for name in arrays.files}
+
+
+class SessionStore(object):
+    """
+    entries by session and key with expiry after 'ttl' seconds without access and least recently used
+    eviction beyond 'max_bytes'; every thread of every process has its own connection
+    """
+
+    def __init__(self, path, max_bytes, ttl, evict_interval):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.evict_interval = evict_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._evicted = 0.
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # connections are not inherited by forked workers
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10., isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            # the sessions do not survive a crash of the host anyway
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.execute('CREATE TABLE IF NOT EXISTS entries (session TEXT, key TEXT, data BLOB, '
+                               'size INTEGER, accessed REAL, PRIMARY KEY (session, key))')
+            connection.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, session, key):
+        """
+        the arrays stored for 'key' in 'session', None if missing or expired
+        """
+        connection = self._connect()
+        now = time.time()
+        row = connection.execute('SELECT data FROM entries WHERE session = ? AND key = ? AND accessed >= ?',
+                                 (session, key, now - self.ttl)).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if row is None:
+            return None
+        connection.execute('UPDATE entries SET accessed = ? WHERE session = ? AND key = ?', (now, session, key))
+        return unpack(row[0])
+
+    def put(self, session, key, arrays):
+        """
+        store a dict of arrays, False if it exceeds the budget on its own
+        """
+        data = pack(arrays)
+        if len(data) > self.max_bytes:
+            return False
+        connection = self._connect()
+        connection.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)',
+                           (session, key, data, len(data), time.time()))
+        self.evict()
+        return True
+
+    def delete(self, session, key):
+        self._connect().execute('DELETE FROM entries WHERE session = ? AND key = ?', (session, key))
+
+    def evict(self, force=False):
+        """
+        drop the expired entries and the least recently used ones beyond the budget, at most once per
+        'evict_interval' seconds and process
+        """
+        now = time.time()
+        with self._lock:
+            if not force and now - self._evicted < self.evict_interval:
+                return
+            self._evicted = now
+
+        connection = self._connect()
+        evicted = connection.execute('DELETE FROM entries WHERE accessed < ?', (now - self.ttl,)).rowcount
+        total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total > self.max_bytes:
+            rows = connection.execute('SELECT session, key, size FROM entries ORDER BY accessed').fetchall()
+            victims = []
+            for session, key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                victims.append((session, key))
+                total -= size
+            connection.executemany('DELETE FROM entries WHERE session = ? AND key = ?', victims)
+            evicted += len(victims)
+        with self._lock:
+            self.evictions += evicted
+
+    def stats(self):
+        entries, nbytes = self._connect().execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        with self._lock:
+            return {
+                'entries': entries,
+                'bytes': nbytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+session_store = SessionStore(session_store_path, int(session_store_mb * 2**20), session_ttl, session_evict_interval)
+
+
+def new_handle():
+    return secrets.token_urlsafe(8)
+
+
+def current_session():
+    """
+    id of the browser session of the current request (empty without cookie)
+    """
+    return flask.request.cookies.get(session_cookie, '')
+
+
+def register_sessions(server):
+    """
+    identify the browser sessions by a cookie, which is set on the first response
+    """
+    @server.after_request
+    def set_session_cookie(response):
+        if session_cookie not in flask.request.cookies:
+            response.set_cookie(session_cookie, secrets.token_urlsafe(16), httponly=True, samesite='Lax')
+        return response
@@ -3,6 +3,7 @@ import dash_html_components as html
 
 from app import app
 from apps.commons import gen_header
+from apps.registry import distributions
 
 # components of the app
 # header text plus logo
@@ -14,10 +15,13 @@ layout = html.Div([
     html.Div(header, className='w3-row'),
 
     html.Div([
-        html.A(html.H3("Normal Distribution"), href="/normal_distribution"),
-        html.A(html.H3("t-Distribution"), href="/t_distribution"),
+        html.A(html.H3(entry['title']), href=f'/{name}') for name, entry in distributions.items()
+    ] + [
         html.A(html.H3("Cohen's d-value"), href="/cohen_d"),
-        html.A(html.H3("Diagnostic tests"), href="/diagnostic_tests")
+        html.A(html.H3("Power analysis"), href="/power_analysis"),
+        html.A(html.H3("Diagnostic tests"), href="/diagnostic_tests"),
+        html.A(html.H3("Hypothesis tests"), href="/hypothesis_test"),
+        html.A(html.H3("Central limit theorem"), href="/central_limit")
     ], className='w3-container w3-padding'),
 
 ], className='w3-container w3-padding'
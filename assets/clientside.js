@@ -0,0 +1,294 @@
+// clientside callbacks, see app.clientside_callback
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+
+    // distribution pages, drawing the figures from the tables created by apps.commons.gen_dist_store
+    distributions: {
+        // values of a apps.distributions.ParameterTable for 'param' by linear interpolation between the
+        // neighbouring rows of the table, found by binary search (clamped to the range of the table)
+        interpolate: function(table, param) {
+            var u = table.log ? Math.log(param) : param;
+            var grid = table.grid;
+            var lo = 0;
+            var hi = grid.length - 1;
+            while (hi - lo > 1) {
+                var mid = (lo + hi) >> 1;
+                if (grid[mid] <= u) {
+                    lo = mid;
+                } else {
+                    hi = mid;
+                }
+            }
+            var w = Math.min(Math.max((u - grid[lo]) / (grid[hi] - grid[lo]), 0), 1);
+            var a = table.values[lo];
+            var b = table.values[hi];
+            return a.map(function(value, i) {
+                return (1 - w) * value + w * b[i];
+            });
+        },
+
+        param: function(value, tables) {
+            return tables.slider_log10 ? Math.pow(10, value) : value;
+        },
+
+        label: function(tables, param) {
+            var label = tables.label;
+            return label.prefix + param.toFixed(label.digits) + label.suffix;
+        },
+
+        create_cdf: function(value, tables) {
+            var dist = window.dash_clientside.distributions;
+            var param = dist.param(value, tables);
+            var cdf_var = {
+                type: 'scatter',
+                x: tables.x,
+                y: dist.interpolate(tables.cdf, param),
+                mode: 'lines',
+                name: dist.label(tables, param),
+                showlegend: true,
+                line: {dash: 'solid', width: 3, shape: tables.cdf_std.line.shape}
+            };
+
+            return {data: [tables.cdf_std, cdf_var], layout: tables.cdf_layout};
+        },
+
+        create_pdf: function(value, tables) {
+            var dist = window.dash_clientside.distributions;
+            var param = dist.param(value, tables);
+            var pdf_var = {
+                type: 'scatter',
+                x: tables.x,
+                y: dist.interpolate(tables.pdf, param),
+                mode: 'lines',
+                name: dist.label(tables, param),
+                showlegend: true,
+                line: {dash: 'solid', width: 3, shape: tables.pdf_std.line.shape}
+            };
+
+            return {data: [tables.pdf_std, pdf_var], layout: tables.pdf_layout};
+        },
+
+        // grid indices of the last two points clicked on the cdf of the parameters (curve 1)
+        clicks: function(clickdata, clicks) {
+            clicks = clicks || [];
+            if (!clickdata || clickdata.points[0].curveNumber !== 1) {
+                return clicks;
+            }
+            return clicks.concat([clickdata.points[0].pointIndex]).slice(-2);
+        },
+
+        // probability left of the grid point i (of a discrete distribution: left of its mass), the area
+        // between grid points i and j follows in O(1) as cdf[j] - below(cdf, i)
+        below: function(cdf, i, discrete) {
+            if (!discrete) {
+                return cdf[i];
+            }
+            return i > 0 ? cdf[i - 1] : 0;
+        },
+
+        // first index in [lo, hi) for which the monotone 'predicate' holds (hi if none)
+        search: function(lo, hi, predicate) {
+            while (lo < hi) {
+                var mid = (lo + hi) >> 1;
+                if (predicate(mid)) {
+                    hi = mid;
+                } else {
+                    lo = mid + 1;
+                }
+            }
+            return lo;
+        },
+
+        // shaded regions [first index, last index, area] for the clicked grid points and the mode of
+        // apps.commons.area_modes
+        regions: function(cdf, clicks, mode, discrete) {
+            var dist = window.dash_clientside.distributions;
+            var n = cdf.length;
+            var last = clicks[clicks.length - 1];
+            var right = function(i) {
+                return 1 - dist.below(cdf, i, discrete);
+            };
+
+            if (mode === 'left') {
+                return [[0, last, cdf[last]]];
+            }
+            if (mode === 'right') {
+                return [[last, n - 1, right(last)]];
+            }
+            if (mode === 'both') {
+                // the tail of the clicked point and the opposite tail of the closest area on the grid, i.e.
+                // the region of a two-sided p-value
+                if (discrete && Math.min(cdf[last], right(last)) >= 0.5) {
+                    // the mass of the clicked point belongs to both tails, which cover the centre
+                    return [[0, n - 1, 1]];
+                }
+                // the opposite tail of a discrete distribution starts next to the clicked point, which
+                // belongs to the clicked tail only
+                var gap = discrete ? 1 : 0;
+                var lo = last;
+                var hi = last;
+                var closer = function(area, a, b) {
+                    return Math.abs(a - area) < Math.abs(b - area);
+                };
+                if (cdf[last] <= right(last)) {
+                    hi = dist.search(last + gap, n, function(i) {
+                        return right(i) <= cdf[last];
+                    });
+                    // an empty tail (hi = n) has the area 0
+                    if (hi > last + gap && closer(cdf[last], right(hi - 1), hi < n ? right(hi) : 0)) {
+                        hi -= 1;
+                    }
+                } else {
+                    lo = dist.search(0, last + 1 - gap, function(i) {
+                        return cdf[i] > right(last);
+                    }) - 1;
+                    if (lo < last - gap && closer(right(last), cdf[lo + 1], lo >= 0 ? cdf[lo] : 0)) {
+                        lo += 1;
+                    }
+                }
+                var tails = [];
+                if (lo >= 0) {
+                    tails.push([0, lo, cdf[lo]]);
+                }
+                if (hi < n) {
+                    tails.push([hi, n - 1, right(hi)]);
+                }
+                return tails;
+            }
+            if (mode === 'between' && clicks.length === 2) {
+                var first = Math.min(clicks[0], clicks[1]);
+                var second = Math.max(clicks[0], clicks[1]);
+                return [[first, second, cdf[second] - dist.below(cdf, first, discrete)]];
+            }
+            return [];
+        },
+
+        // the pdf figure plus the area for the clicks on the cdf, the shaded regions are slices of the pdf
+        // trace already in the browser and their areas differences of the cdf trace
+        shade_pdf: function(base, cdf_figure, clicks, mode) {
+            if (!base) {
+                return {data: [], layout: {}};
+            }
+            var pdf = base.data[1];
+            if (!cdf_figure || !clicks || clicks.length === 0 || cdf_figure.data[1].y.length !== pdf.y.length) {
+                return base;
+            }
+
+            var dist = window.dash_clientside.distributions;
+            var regions = dist.regions(cdf_figure.data[1].y, clicks, mode, pdf.line.shape === 'hvh');
+            var total = regions.reduce(function(sum, region) {
+                return sum + region[2];
+            }, 0);
+            var text = 'area: ' + total.toFixed(3);
+            if (regions.length > 1) {
+                text += ' (' + regions.map(function(region) {
+                    return region[2].toFixed(3);
+                }).join(' + ') + ')';
+            }
+
+            var shaded = regions.map(function(region) {
+                return {
+                    type: 'scatter',
+                    x: pdf.x.slice(region[0], region[1] + 1),
+                    y: pdf.y.slice(region[0], region[1] + 1),
+                    mode: 'none',
+                    showlegend: false,
+                    fill: 'tozeroy',
+                    line: {shape: pdf.line.shape},
+                    hoveron: 'fills',
+                    text: text,
+                    hoverinfo: 'text'
+                };
+            });
+
+            return {data: base.data.concat(shaded), layout: base.layout};
+        }
+    },
+
+    // diagnostic tests page, patching the moving parts ('cutoff-state') into the static figures,
+    // which only change with the separation (see apps/diagnostic_tests.py)
+    diagnostic: {
+        dist_figure: function(state, base) {
+            if (!state || !base) {
+                return {data: [], layout: {}};
+            }
+
+            var healthy = base.data[2];
+            var sick = base.data[3];
+
+            var data = [
+                Object.assign({}, base.data[0], {
+                    x: sick.x.slice(0, state.fn_end),
+                    y: sick.y.slice(0, state.fn_end),
+                    text: state.fn_text
+                }),
+                Object.assign({}, base.data[1], {
+                    x: healthy.x.slice(state.fp_start),
+                    y: healthy.y.slice(state.fp_start),
+                    text: state.fp_text
+                }),
+                healthy,
+                sick
+            ];
+
+            var layout = Object.assign({}, base.layout, {
+                shapes: [Object.assign({}, base.layout.shapes[0], {x0: state.cutoff, x1: state.cutoff})],
+                annotations: [Object.assign({}, base.layout.annotations[0], {text: state.annotation})]
+            });
+
+            return {data: data, layout: layout};
+        },
+
+        roc_figure: function(state, base) {
+            if (!state || !base) {
+                return {data: [], layout: {}};
+            }
+
+            var marker = Object.assign({}, base.data[1], {x: [state.marker[0]], y: [state.marker[1]]});
+
+            return {data: [base.data[0], marker], layout: base.layout};
+        }
+    },
+
+    // central limit theorem page (apps/central_limit.py): the server sends the counts added by every batch
+    // of sample means, which are added up here
+    sampling: {
+        accumulate: function(delta, histogram) {
+            if (!delta) {
+                return null;
+            }
+            var counts = delta.counts;
+            if (histogram && histogram.id === delta.id && histogram.batches === delta.start) {
+                counts = histogram.counts.map(function(count, i) {
+                    return count + delta.counts[i];
+                });
+            }
+            return Object.assign({}, delta, {counts: counts});
+        },
+
+        means_figure: function(histogram, base) {
+            if (!histogram || !base) {
+                return {data: [], layout: {}};
+            }
+
+            var scale = 1 / (histogram.means * base.width);
+            var bars = Object.assign({}, base.data[0], {
+                y: histogram.counts.map(function(count) {
+                    return count * scale;
+                })
+            });
+            var title = histogram.means + ' means of samples of n=' + histogram.n + ' (' +
+                base.labels[histogram.population] + ')<br>mean ' + histogram.mean.toFixed(3) +
+                ', standard deviation ' + histogram.std.toFixed(3);
+            var layout = Object.assign({}, base.layout, {
+                title: Object.assign({}, base.layout.title, {text: title})
+            });
+
+            return {data: [bars, base.data[1]], layout: layout};
+        },
+
+        // the interval stops at the end of a stream and on every other click
+        paused: function(n_clicks, delta) {
+            return (n_clicks || 0) % 2 === 1 || Boolean(delta && delta.done);
+        }
+    }
+});
@@ -0,0 +1,247 @@
+// presenter mode (see apps/presenter.py): a page opened with ?present=<session> posts the values of its
+// callback inputs whenever they change, a page opened with ?follow=<session> receives the responses
+// computed by the server over server-sent events, moves its inputs to the lecturer's values and answers
+// the resulting callback requests from the received responses (the mode is kept while navigating)
+(function() {
+    var params = new URLSearchParams(window.location.search);
+    ['present', 'follow'].forEach(function(mode) {
+        if (params.get(mode)) {
+            window.sessionStorage.setItem('presenter-mode', mode);
+            window.sessionStorage.setItem('presenter-session', params.get(mode));
+        }
+    });
+    var mode = window.sessionStorage.getItem('presenter-mode');
+    var session = window.sessionStorage.getItem('presenter-session');
+    if (!session) {
+        return;
+    }
+
+    // components whose props are not shared: the url and bulky data
+    var skippedTypes = ['Location', 'Store', 'Upload'];
+    // interval of the followers polling the snapshot if the server refuses more listeners
+    var pollInterval = 1000;
+
+    // same as apps.figure_cache.static_key
+    function canonicalValue(value) {
+        if (typeof value === 'number') {
+            return value.toFixed(6);
+        }
+        if (Array.isArray(value)) {
+            return '[' + value.map(canonicalValue).join(',') + ']';
+        }
+        if (value !== null && typeof value === 'object') {
+            return '{' + Object.keys(value).sort().map(function(key) {
+                return JSON.stringify(key) + ':' + canonicalValue(value[key]);
+            }).join(',') + '}';
+        }
+        return JSON.stringify(value === undefined ? null : value);
+    }
+
+    function staticKey(values) {
+        return values.map(canonicalValue).join(',');
+    }
+
+    function getIn(object, path) {
+        for (var i = 0; i < path.length && object; i++) {
+            object = object[path[i]];
+        }
+        return object;
+    }
+
+    // values of the callback inputs and states of the components on the page, by 'id.property'
+    function inputValues(state) {
+        var values = {};
+        var dependencies = (state.dependenciesRequest && state.dependenciesRequest.content) || [];
+        dependencies.forEach(function(dependency) {
+            dependency.inputs.concat(dependency.state).forEach(function(item) {
+                var itempath = state.paths[item.id];
+                var component = itempath && getIn(state.layout, itempath);
+                if (!component || skippedTypes.indexOf(component.type) >= 0) {
+                    return;
+                }
+                var value = component.props[item.property];
+                values[item.id + '.' + item.property] = value === undefined ? null : value;
+            });
+        });
+        return values;
+    }
+
+    // setProps of a dash component, as called by the component itself on user input
+    function findSetProps(id) {
+        var element = document.getElementById(id);
+        if (!element) {
+            return null;
+        }
+        var key = Object.keys(element).filter(function(name) {
+            return name.indexOf('__reactInternalInstance$') === 0;
+        })[0];
+        for (var fiber = key && element[key]; fiber; fiber = fiber.return) {
+            var props = fiber.memoizedProps;
+            if (props && props.id === id && typeof props.setProps === 'function') {
+                return props.setProps;
+            }
+        }
+        return null;
+    }
+
+    function showBanner(html) {
+        var banner = document.createElement('div');
+        banner.className = 'w3-bar w3-small w3-pale-yellow w3-padding-small';
+        banner.style.cssText = 'position: fixed; bottom: 0; left: 0; z-index: 10;';
+        banner.innerHTML = html + ' <a href="#" class="w3-margin-left">stop</a>';
+        banner.querySelector('a:last-child').onclick = function() {
+            window.sessionStorage.removeItem('presenter-mode');
+            window.sessionStorage.removeItem('presenter-session');
+            window.location = window.location.pathname;
+            return false;
+        };
+        document.body.appendChild(banner);
+    }
+
+    function present(store) {
+        var link = window.location.origin + window.location.pathname + '?follow=' + session;
+        showBanner('presenting, students follow at <a href="' + link + '">' + link + '</a>');
+
+        // one post at a time, the state is posted again if it changed meanwhile
+        var posted = null;
+        var inFlight = false;
+        var seq = 0;
+
+        function post() {
+            if (inFlight) {
+                return;
+            }
+            var inputs = inputValues(store.getState());
+            var text = JSON.stringify([window.location.pathname, inputs]);
+            if (text === posted) {
+                return;
+            }
+            posted = text;
+            inFlight = true;
+            seq = Math.max(seq + 1, Date.now());
+            fetch('/presenter/' + session, {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({seq: seq, page: window.location.pathname, inputs: inputs})
+            }).catch(function() {}).then(function() {
+                inFlight = false;
+                post();
+            });
+        }
+
+        store.subscribe(post);
+        post();
+    }
+
+    function follow(store) {
+        showBanner('following the lecturer');
+
+        // output -> [key of the arguments, response]
+        var responses = {};
+        var target = null;
+        var applied = {};
+        var seq = null;
+        var scheduled = false;
+
+        var originalFetch = window.fetch.bind(window);
+        window.fetch = function(url, options) {
+            if (typeof url === 'string' && url.indexOf('_dash-update-component') >= 0) {
+                var payload = JSON.parse(options.body);
+                var entry = responses[payload.output];
+                var values = (payload.inputs || []).concat(payload.state || []).map(function(item) {
+                    return item.value;
+                });
+                if (entry !== undefined && entry[0] === staticKey(values)) {
+                    return Promise.resolve(new Response(entry[1], {
+                        status: 200, headers: {'Content-Type': 'application/json'}
+                    }));
+                }
+            }
+            return originalFetch(url, options);
+        };
+
+        // move the inputs on the page to the lecturer's values, each input once per received state (the
+        // student may move it afterwards)
+        function apply() {
+            scheduled = false;
+            if (target === null || target.page !== window.location.pathname) {
+                return;
+            }
+            var current = inputValues(store.getState());
+            Object.keys(target.inputs).forEach(function(propId) {
+                var text = JSON.stringify(target.inputs[propId]);
+                if (!(propId in current) || applied[propId] === text || JSON.stringify(current[propId]) === text) {
+                    return;
+                }
+                var dot = propId.lastIndexOf('.');
+                var setProps = findSetProps(propId.slice(0, dot));
+                if (setProps === null) {
+                    return;
+                }
+                applied[propId] = text;
+                var props = {};
+                props[propId.slice(dot + 1)] = target.inputs[propId];
+                setProps(props);
+            });
+        }
+
+        function schedule() {
+            if (target !== null && !scheduled) {
+                scheduled = true;
+                window.setTimeout(apply, 0);
+            }
+        }
+
+        function receive(snapshot) {
+            Object.assign(responses, snapshot.responses);
+            seq = snapshot.seq;
+            if (!snapshot.page) {
+                return;
+            }
+            target = snapshot;
+            applied = {};
+            if (snapshot.page !== window.location.pathname) {
+                // like dcc.Link
+                window.history.pushState({}, '', snapshot.page);
+                window.dispatchEvent(new CustomEvent('onpushstate'));
+            }
+            schedule();
+        }
+
+        function poll() {
+            var url = '/presenter/' + session + '/snapshot?seq=' + (seq === null ? '' : seq);
+            originalFetch(url).then(function(response) {
+                return response.status === 200 ? response.json().then(receive) : null;
+            }).catch(function() {}).then(function() {
+                window.setTimeout(poll, pollInterval);
+            });
+        }
+
+        store.subscribe(schedule);
+        var source = new EventSource('/presenter/' + session + '/events');
+        source.onmessage = function(event) {
+            receive(JSON.parse(event.data));
+        };
+        source.onerror = function() {
+            // refused (e.g. too many listeners), a lost connection is reopened by the browser
+            if (source.readyState === EventSource.CLOSED) {
+                poll();
+            }
+        };
+    }
+
+    // the store of the dash renderer is created after the assets are loaded
+    function start() {
+        if (!window.store || !document.body) {
+            window.setTimeout(start, 50);
+            return;
+        }
+        if (mode === 'present') {
+            present(window.store);
+        } else {
+            follow(window.store);
+        }
+    }
+
+    start();
+})();
@@ -0,0 +1,14 @@
+// id of the browser tab (a new one per page load), sent with every callback request: apps/coalesce.py
+// drops the superseded requests of a tab, the tabs of a browser share the session cookie
+(function() {
+    var tabId = Math.random().toString(36).slice(2) + Date.now().toString(36);
+    var originalFetch = window.fetch.bind(window);
+    window.fetch = function(url, options) {
+        if (typeof url === 'string' && url.indexOf('_dash-update-component') >= 0) {
+            var headers = new Headers((options && options.headers) || {});
+            headers.set('X-Dash-Tab', tabId);
+            options = Object.assign({}, options, {headers: headers});
+        }
+        return originalFetch(url, options);
+    };
+})();
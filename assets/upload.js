@@ -0,0 +1,39 @@
+// streamed uploads of csv files (see apps/empirical.py): buttons with a 'data-upload' attribute open a
+// file dialog and post the file as the request body to the url of the attribute, which is parsed by the
+// server while it is received; the page is then replaced by the response (the page with the dataset), a
+// failed upload is reported and the button is enabled again
+document.addEventListener('click', function(event) {
+    var button = event.target.closest ? event.target.closest('[data-upload]') : null;
+    if (!button) {
+        return;
+    }
+
+    var input = document.createElement('input');
+    input.type = 'file';
+    input.accept = '.csv,text/csv,text/plain';
+    input.onchange = function() {
+        var file = input.files[0];
+        if (!file) {
+            return;
+        }
+        var label = button.textContent;
+        button.disabled = true;
+        button.textContent = 'uploading ' + file.name + ' ...';
+        fetch(button.getAttribute('data-upload'), {
+            method: 'POST',
+            body: file,
+            headers: {'Content-Type': 'text/csv'}
+        }).then(function(response) {
+            if (!response.ok) {
+                throw new Error(response.status + ' ' + response.statusText);
+            }
+            window.location = response.url;
+        }).catch(function(error) {
+            // e.g. a network error or a response of a proxy, the button can be used again
+            button.disabled = false;
+            button.textContent = label;
+            window.alert('The upload of ' + file.name + ' failed (' + error.message + ').');
+        });
+    };
+    input.click();
+});
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# offline "bake" step: evaluate all memoized callbacks for every reachable slider state and write
+# the responses to the store, which is memory-mapped by the workers (see apps/figure_cache.py)
+#
+# usage: python bake.py [path] [--jobs N]
+import argparse
+import multiprocessing
+import os
+import time
+
+from index import pages
+from apps.figure_cache import BakedStore, bakeable, baked_store_path, quantize, source_version
+
+
+def render(task):
+    callback_id, args = task
+    func, _, key = bakeable[callback_id]
+    cache_key = (callback_id, quantize(args if key is None else key(*args)))
+    return cache_key, func(*args).encode('utf-8')
+
+
+def gen_tasks():
+    for callback_id, (_, states, _) in bakeable.items():
+        for args in states():
+            yield callback_id, tuple(args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='precompute the responses of all slider states')
+    parser.add_argument('path', nargs='?', default=baked_store_path)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count())
+    options = parser.parse_args()
+
+    os.makedirs(os.path.dirname(os.path.abspath(options.path)), exist_ok=True)
+
+    # register the callbacks of all pages
+    pages.load_all()
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(options.jobs) as pool:
+        items = pool.imap(render, gen_tasks(), chunksize=16)
+        n_entries, n_bytes = BakedStore.write(options.path, source_version(), items)
+
+    print(f'baked {n_entries} responses ({n_bytes / 2**20:.1f} MB compressed) '
+          f'from {len(bakeable)} callbacks in {time.perf_counter() - start:.1f} s to {options.path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+# benchmarks of the callbacks (python -m bench.callbacks) and load tests (python -m bench.load)
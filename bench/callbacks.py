@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# micro-benchmarks of the callback functions, called directly (without dash, caches or the network)
+#
+# usage: python -m bench.callbacks [--repeat N] [--save] [--compare]
+import argparse
+import inspect
+import json
+import sys
+import time
+
+import plotly.utils
+
+from index import pages
+from bench.common import compare, save_baseline
+
+pages.load_all()
+
+from apps import cohen_d, diagnostic_tests, hypothesis_test, power_analysis  # noqa: E402
+
+normal_distribution = pages.load('/normal_distribution')
+t_distribution = pages.load('/t_distribution')
+f_distribution = pages.load('/f_distribution')
+binomial_distribution = pages.load('/binomial_distribution')
+
+
+# name -> (callback, arguments)
+cases = {
+    'normal_distribution.create_cdf': (normal_distribution.create_cdf, (1.37,)),
+    'normal_distribution.create_pdf': (normal_distribution.create_pdf, (1.37,)),
+    't_distribution.create_cdf': (t_distribution.create_cdf, (0.7,)),
+    't_distribution.create_pdf': (t_distribution.create_pdf, (0.7,)),
+    'f_distribution.create_pdf': (f_distribution.create_pdf, (0.7, 1.0)),
+    'binomial_distribution.create_cdf': (binomial_distribution.create_cdf, (10, 0.3)),
+    'cohen_d.gen_figure': (cohen_d.gen_figure, (2.0, 1.0, 1.2)),
+    'power_analysis.gen_n_figure': (power_analysis.gen_n_figure, (0.5, 1.5, 0.8, 0.05, 2)),
+    'power_analysis.gen_d_figure': (power_analysis.gen_d_figure, (0.5, 1.5, 0.8, 0.05, 2)),
+    'diagnostic_tests.update_slider': (diagnostic_tests.update_slider, (2.0, 1.0)),
+    'diagnostic_tests.gen_dist_base': (diagnostic_tests.gen_dist_base, (2.0,)),
+    'diagnostic_tests.gen_roc_base': (diagnostic_tests.gen_roc_base, (2.0,)),
+    'diagnostic_tests.gen_cutoff_state': (diagnostic_tests.gen_cutoff_state, (2.0, 1.0)),
+    'diagnostic_tests.gen_contingency_table': (diagnostic_tests.gen_contingency_table, (2.0, 1.0, 0.1)),
+    'hypothesis_test.gen_figures': (hypothesis_test.gen_figures, (0.5, 1.5, 0.05)),
+}
+
+# name -> intermediate results cached across calls, cleared before every call
+caches = {
+    'diagnostic_tests.gen_contingency_table': [diagnostic_tests.contingency_tables],
+    'hypothesis_test.gen_figures': [hypothesis_test.experiments],
+}
+
+
+def run(func, args, repeat, cached=()):
+    """
+    median time of building the response and of serializing it like dash does
+    """
+    func = inspect.unwrap(func)  # strip memoization and instrumentation
+    build, serialize, size = [], [], 0
+    for _ in range(repeat):
+        for cache in cached:
+            cache.cache_clear()
+        start = time.perf_counter()
+        value = func(*args)
+        middle = time.perf_counter()
+        response = json.dumps(value, cls=plotly.utils.PlotlyJSONEncoder)
+        end = time.perf_counter()
+        build.append(middle - start)
+        serialize.append(end - middle)
+        size = len(response)
+    build.sort()
+    serialize.sort()
+    return build[repeat // 2], serialize[repeat // 2], size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='micro-benchmarks of the callback functions')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--save', action='store_true', help='store the results as baseline')
+    parser.add_argument('--compare', action='store_true', help='compare the results to the baseline')
+    options = parser.parse_args()
+
+    results = {}
+    print(f'{"callback":>48s}  {"build":>10s}  {"serialize":>10s}  {"bytes":>8s}')
+    for name, (func, args) in cases.items():
+        build, serialize, size = run(func, args, options.repeat, caches.get(name, ()))
+        print(f'{name:>48s}  {build * 1e3:8.3f}ms  {serialize * 1e3:8.3f}ms  {size:8d}')
+        results[f'{name} build_seconds'] = build
+        results[f'{name} serialize_seconds'] = serialize
+        results[f'{name} response_bytes'] = size
+
+    if options.save:
+        save_baseline('callbacks', results)
+    if options.compare:
+        regressions = compare('callbacks', results, lower_is_better=set(results))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# helpers shared by the benchmarks: statistics and the stored baseline
+import json
+import os
+
+import numpy as np
+
+baseline_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# a result is reported as regression if it is slower than the baseline by this factor
+regression_factor = 1.25
+
+
+def percentiles(values, q=(50, 95, 99)):
+    values = np.asarray(values, dtype=float)
+    return {f'p{p}': float(np.percentile(values, p)) for p in q}
+
+
+def load_baseline():
+    if not os.path.exists(baseline_path):
+        return {}
+    with open(baseline_path) as f:
+        return json.load(f)
+
+
+def save_baseline(section, results):
+    """
+    store the results of one benchmark ('callbacks' or 'load') in the baseline file
+    """
+    baseline = load_baseline()
+    baseline[section] = results
+    with open(baseline_path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def compare(section, results, lower_is_better):
+    """
+    compare flat {name: value} results to the baseline, returns the names of regressions
+    """
+    baseline = load_baseline().get(section, {})
+    regressions = []
+    for name, value in results.items():
+        reference = baseline.get(name)
+        if reference is None or reference == 0:
+            print(f'{name:>56s}: {value:12.4g} (no baseline)')
+            continue
+        ratio = value / reference
+        regression = ratio > regression_factor if name in lower_is_better else ratio < 1. / regression_factor
+        print(f'{name:>56s}: {value:12.4g} baseline {reference:12.4g} ({ratio:5.2f}x)'
+              + ('  REGRESSION' if regression else ''))
+        if regression:
+            regressions.append(name)
+    return regressions
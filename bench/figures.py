@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# cpu time of the callbacks with the figures built as validated go.Figure and as plain dicts
+# (apps.commons.build_figure), and whether both give the same response
+#
+# usage: python -m bench.figures [--repeat N]
+import argparse
+import inspect
+import json
+import time
+
+import plotly.utils
+
+from apps import commons
+from bench.callbacks import cases
+
+
+def response(func, args):
+    return json.dumps(func(*args), cls=plotly.utils.PlotlyJSONEncoder, sort_keys=True)
+
+
+def cpu_time(func, args, repeat):
+    # median cpu time of building the response
+    times = []
+    for _ in range(repeat):
+        start = time.process_time()
+        func(*args)
+        times.append(time.process_time() - start)
+    times.sort()
+    return times[repeat // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='cpu time of validated and dict figures')
+    parser.add_argument('--repeat', type=int, default=20)
+    options = parser.parse_args()
+
+    print(f'{"callback":>48s}  {"validated":>10s}  {"dict":>10s}  {"speedup":>8s}  same response')
+    totals = {True: 0., False: 0.}
+    for name, (func, args) in cases.items():
+        func = inspect.unwrap(func)
+        result = {}
+        for validate in (True, False):
+            commons.validate_figures = validate
+            result[validate] = (cpu_time(func, args, options.repeat), response(func, args))
+            totals[validate] += result[validate][0]
+        validated, plain = result[True][0], result[False][0]
+        print(f'{name:>48s}  {validated * 1e3:8.2f}ms  {plain * 1e3:8.2f}ms  {validated / max(plain, 1e-9):7.1f}x  '
+              f'{result[True][1] == result[False][1]}')
+    print(f'{"total":>48s}  {totals[True] * 1e3:8.2f}ms  {totals[False] * 1e3:8.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+# load test: boots wsgi:application with gunicorn and replays the _dash-update-component requests of a
+# class of students dragging the sliders of all pages
+#
+# usage: python -m bench.load [--students N] [--drags N] [--workers N] [--save] [--compare]
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from index import app, pages
+from bench.common import compare, percentiles, save_baseline
+
+repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# sliders dragged by the students: page, slider id, values along the slider, initial values of the page
+scenarios = [
+    ('/normal_distribution', 'sigma-slider', [round(0.5 + 0.05 * i, 2) for i in range(51)],
+     {'sigma-slider.value': 1.3}),
+    ('/t_distribution', 'dof-slider', [round(0.05 * i, 2) for i in range(47)],
+     {'dof-slider.value': 0.}),
+    ('/cohen_d', 'delta-mu', [round(0.2 * i, 1) for i in range(26)],
+     {'delta-mu.value': 2.0, 'sigma-1.value': 1.0, 'sigma-2.value': 1.0}),
+    ('/cohen_d', 'sigma-1', [round(0.5 + 0.1 * i, 1) for i in range(16)],
+     {'delta-mu.value': 2.0, 'sigma-1.value': 1.0, 'sigma-2.value': 1.0}),
+    ('/cohen_d', 'sigma-2', [round(0.5 + 0.1 * i, 1) for i in range(16)],
+     {'delta-mu.value': 2.0, 'sigma-1.value': 1.0, 'sigma-2.value': 1.0}),
+    ('/diagnostic_tests', 'difference', [round(0.2 * i, 1) for i in range(26)],
+     {'difference.value': 2.0, 'cutoff.value': 1.0, 'prevalence.value': 0.1}),
+    ('/diagnostic_tests', 'cutoff', [round(-4. + 0.2 * i, 1) for i in range(41)],
+     {'difference.value': 2.0, 'cutoff.value': 1.0, 'prevalence.value': 0.1}),
+]
+
+
+def server_callbacks(prop_id):
+    """
+    ids of the python callbacks fired by a change of 'prop_id' (one level, chained callbacks are not followed)
+    """
+    return [callback_id for callback_id, entry in app.callback_map.items()
+            if 'callback' in entry
+            and any(f'{c["id"]}.{c["property"]}' == prop_id for c in entry['inputs'])]
+
+
+def gen_payload(callback_id, values, changed):
+    entry = app.callback_map[callback_id]
+
+    def props(dependencies):
+        return [{'id': c['id'], 'property': c['property'], 'value': values.get(f'{c["id"]}.{c["property"]}')}
+                for c in dependencies]
+
+    return json.dumps({
+        'output': callback_id,
+        'inputs': props(entry['inputs']),
+        'state': props(entry['state']),
+        'changedPropIds': [changed],
+    })
+
+
+def gen_stream(rng, n_drags):
+    """
+    requests (referer, payload) of one student: drags over a random part of a random slider, step by step
+    """
+    stream = []
+    for _ in range(n_drags):
+        page, slider_id, slider_values, initial = rng.choice(scenarios)
+        start, end = sorted(rng.sample(range(len(slider_values)), 2))
+        steps = slider_values[start:end + 1]
+        if rng.random() < 0.5:
+            steps = steps[::-1]
+        values = dict(initial)
+        prop_id = f'{slider_id}.value'
+        for value in steps:
+            values[prop_id] = value
+            for callback_id in server_callbacks(prop_id):
+                stream.append((page, gen_payload(callback_id, values, prop_id)))
+    return stream
+
+
+def student(host, port, session, stream, latencies, errors):
+    connection = http.client.HTTPConnection(host, port, timeout=60)
+    for page, payload in stream:
+        start = time.perf_counter()
+        try:
+            connection.request('POST', '/_dash-update-component', body=payload, headers={
+                'Content-Type': 'application/json',
+                'Accept-Encoding': 'gzip',
+                'Referer': f'http://{host}:{port}{page}',
+                'Cookie': f'dash_session={session}',
+            })
+            response = connection.getresponse()
+            response.read()
+            if response.status not in (200, 204):
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as error:
+            errors.append(repr(error))
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=60)
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_server(host, port, timeout=120.):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=5)
+            connection.request('GET', '/')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('gunicorn did not start')
+
+
+def read_processes():
+    """
+    parent pid, resident set size and proportional set size (shared pages divided by the number of processes
+    sharing them) in bytes and command line of all processes
+    """
+    processes = {}
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                status = dict(line.split(':', 1) for line in f if ':' in line)
+            with open(f'/proc/{pid}/smaps_rollup') as f:
+                rollup = dict(line.split(':', 1) for line in f if ':' in line)
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                cmdline = f.read()
+        except (OSError, ValueError):
+            # exited meanwhile or a kernel thread
+            continue
+        processes[int(pid)] = (int(status['PPid']), int(status['VmRSS'].split()[0]) * 1024,
+                               int(rollup['Pss'].split()[0]) * 1024, cmdline)
+    return processes
+
+
+def descendants(children, pid):
+    # the process and its children, recursively
+    tree, stack = [], [pid]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, ()))
+    return tree
+
+
+def worker_memory(master_pid):
+    """
+    resident set size and proportional set size in bytes of every gunicorn worker with all its descendants
+    (offload processes forked by the worker), and of the master with its other descendants (the forkserver
+    shared by the workers and the offload processes forked from it, the resource tracker)
+    """
+    processes = read_processes()
+    if master_pid not in processes:
+        return {}, (0, 0)
+    children = {}
+    for pid, (ppid, _, _, _) in processes.items():
+        children.setdefault(ppid, []).append(pid)
+    # the workers are forked from the master without exec, the helper processes of multiprocessing are not
+    workers = [pid for pid in children.get(master_pid, ()) if processes[pid][3] == processes[master_pid][3]]
+    memory, counted = {}, set()
+    for worker in workers:
+        tree = descendants(children, worker)
+        counted.update(tree)
+        memory[worker] = (sum(processes[pid][1] for pid in tree), sum(processes[pid][2] for pid in tree))
+    others = [pid for pid in descendants(children, master_pid) if pid not in counted]
+    return memory, (sum(processes[pid][1] for pid in others), sum(processes[pid][2] for pid in others))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='load test of the dash callback endpoints')
+    parser.add_argument('--students', type=int, default=30)
+    parser.add_argument('--drags', type=int, default=5, help='slider drags per student')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--gunicorn-args', default='', help='additional arguments for gunicorn')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', action='store_true', help='store the results as baseline')
+    parser.add_argument('--compare', action='store_true', help='compare the results to the baseline')
+    options = parser.parse_args()
+
+    pages.load_all()
+    rng = random.Random(options.seed)
+    streams = [gen_stream(rng, options.drags) for _ in range(options.students)]
+
+    host, port = '127.0.0.1', free_port()
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                               '--workers', str(options.workers),
+                               '--bind', f'{host}:{port}', '--log-level', 'warning']
+                              + options.gunicorn_args.split() + ['wsgi:application'], cwd=repo)
+    try:
+        wait_for_server(host, port)
+        # every worker should have loaded all pages before measuring
+        for page in {scenario[0] for scenario in scenarios}:
+            for _ in range(2 * options.workers):
+                connection = http.client.HTTPConnection(host, port, timeout=60)
+                connection.request('GET', page)
+                connection.getresponse().read()
+
+        latencies, errors = [], []
+        threads = [threading.Thread(target=student, args=(host, port, f'student-{i}', stream, latencies, errors))
+                   for i, stream in enumerate(streams)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - start
+        memory, master_memory = worker_memory(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+    results = percentiles(latencies)
+    results['throughput'] = len(latencies) / duration
+    results['max_worker_rss_mb'] = max(rss for rss, _ in memory.values()) / 2**20 if memory else 0.
+    results['max_worker_pss_mb'] = max(pss for _, pss in memory.values()) / 2**20 if memory else 0.
+    # the rss of the processes sum pages shared between them, the pss add up to the memory of the host
+    results['master_pss_mb'] = master_memory[1] / 2**20
+    results['total_pss_mb'] = (master_memory[1] + sum(pss for _, pss in memory.values())) / 2**20
+
+    print(f'{options.students} students, {len(latencies)} requests, {len(errors)} errors '
+          f'in {duration:.1f} s on {options.workers} workers')
+    print(f'latency p50 {results["p50"] * 1e3:.1f} ms, p95 {results["p95"] * 1e3:.1f} ms, '
+          f'p99 {results["p99"] * 1e3:.1f} ms, throughput {results["throughput"]:.1f} requests/s')
+    for pid, (rss, pss) in sorted(memory.items()):
+        print(f'worker {pid}: RSS {rss / 2**20:.1f} MB, PSS {pss / 2**20:.1f} MB')
+    print(f'master: RSS {master_memory[0] / 2**20:.1f} MB, PSS {master_memory[1] / 2**20:.1f} MB, '
+          f'total PSS {results["total_pss_mb"]:.1f} MB')
+
+    if options.save:
+        save_baseline('load', results)
+    if options.compare:
+        regressions = compare('load', results, lower_is_better={'p50', 'p95', 'p99', 'max_worker_rss_mb',
+                                                                'max_worker_pss_mb', 'master_pss_mb',
+                                                                'total_pss_mb'})
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
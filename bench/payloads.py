@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# size of the callback responses before and after slimming (apps.commons.slim_figure), uncompressed and
+# compressed like Flask-Compress does (see app.py)
+#
+# usage: python -m bench.payloads
+import gzip
+import inspect
+import json
+
+import plotly.utils
+
+from apps import commons
+from bench.callbacks import cases
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def sizes(value):
+    response = json.dumps(value, cls=plotly.utils.PlotlyJSONEncoder).encode('utf-8')
+    result = [len(response), len(gzip.compress(response, 6))]
+    if brotli is not None:
+        result.append(len(brotli.compress(response, quality=4)))
+    return result
+
+
+def main():
+    columns = ['raw', 'gzip'] + (['br'] if brotli is not None else [])
+    header = '  '.join(f'{c:>8s}' for c in columns)
+    print(f'{"callback":>40s}  before: {header}  after: {header}')
+
+    totals = {False: [0] * len(columns), True: [0] * len(columns)}
+    for name, (func, args) in cases.items():
+        func = inspect.unwrap(func)
+        result = {}
+        for slim in (False, True):
+            commons.slim_figures = slim
+            result[slim] = sizes(func(*args))
+            totals[slim] = [t + s for t, s in zip(totals[slim], result[slim])]
+        print(f'{name:>40s}          ' + '  '.join(f'{s:8d}' for s in result[False]) +
+              '         ' + '  '.join(f'{s:8d}' for s in result[True]))
+
+    print(f'{"total":>40s}          ' + '  '.join(f'{s:8d}' for s in totals[False]) +
+          '         ' + '  '.join(f'{s:8d}' for s in totals[True]))
+
+
+if __name__ == '__main__':
+    main()
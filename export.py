@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+# static export: the dash front-end, the layouts and the responses of all enumerable callback states
+# (the states of bake.py and the routes) are written as a static site, which can be served by any static
+# host or CDN without python; the callback requests are answered by static/dash_static.js
+#
+# the responses of a page are stored in a data pack: <page>.bin holds the zlib-compressed responses,
+# <page>.json maps callback id and arguments to their offset and length in <page>.bin, the browser
+# fetches single responses by range requests
+#
+# the callbacks without enumerable states (uploads, the sampling of the central limit page, the power analysis
+# with its millions of slider combinations) have no static responses, the export fails unless their
+# requests are sent to the server (--backend) or the pages are accepted without them (--partial)
+#
+# usage: python export.py [directory] [--jobs N] [--backend | --partial]
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import time
+import zlib
+from urllib.parse import urlparse
+
+from index import app, pages
+from bake import gen_tasks
+from apps.figure_cache import bakeable, static_key
+
+root = os.path.dirname(os.path.abspath(__file__))
+
+# callback of index.py rendering the page of a pathname
+router_id = 'page-content.children'
+# callbacks with more states get a pack of their own, the browser loads the index of a pack before it
+# answers any of its requests
+separate_pack_states = 10000
+
+
+def render(task):
+    callback_id, args = task
+    func = bakeable[callback_id][0]
+    return callback_id, static_key(args), func(*args)
+
+
+def load_pages():
+    """
+    load all pages, returns the ids of the callbacks registered by every page (by pack name)
+    """
+    callbacks = collections.OrderedDict()
+    for pathname, name in pages.routes.items():
+        pack = name.split(':')[-1]
+        if pack in callbacks:
+            continue
+        registered = set(app.callback_map)
+        pages.load(pathname)
+        callbacks[pack] = [callback_id for callback_id in app.callback_map if callback_id not in registered]
+    return callbacks
+
+
+def route_responses(client):
+    """
+    responses of the router for all pathnames, with and without trailing slash
+    """
+    responses = {}
+    for pathname in pages.routes:
+        for variant in {pathname, pathname.rstrip('/') + '/'}:
+            body = {'output': router_id, 'inputs': [{'id': 'url', 'property': 'pathname', 'value': variant}]}
+            response = client.post('/_dash-update-component', json=body)
+            responses[static_key([variant])] = response.get_data(as_text=True)
+    return responses
+
+
+class PackWriter(object):
+    """
+    data pack of a page, the responses are appended as they are rendered
+    """
+
+    def __init__(self, directory, name):
+        self.path = os.path.join(directory, '_static', name)
+        self.index = collections.OrderedDict()
+        self.size = 0
+        self._file = open(self.path + '.bin', 'wb')
+
+    def add(self, callback_id, key, response):
+        compressed = zlib.compress(response.encode('utf-8'), 9)
+        self.index.setdefault(callback_id, {})[key] = [self.size, len(compressed)]
+        self._file.write(compressed)
+        self.size += len(compressed)
+
+    def close(self):
+        self._file.close()
+        with open(self.path + '.json', 'w') as f:
+            json.dump(self.index, f, separators=(',', ':'))
+
+
+def write_file(directory, url, data):
+    path = os.path.join(directory, urlparse(url).path.lstrip('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def export_frontend(client, directory):
+    """
+    the html of every route (loading static/dash_static.js first), the scripts and stylesheets of dash,
+    the layout and the callback dependencies, and the assets
+    """
+    urls = {'/_dash-layout', '/_dash-dependencies'}
+    for pathname in pages.routes:
+        html = client.get(pathname).get_data(as_text=True)
+        urls.update(re.findall(r'(?:src|href)="(/[^/"][^"]*)"', html))
+        html = html.replace('<head>', '<head>\n<script src="/_static/dash_static.js"></script>', 1)
+        write_file(directory, pathname.rstrip('/') + '/index.html', html.encode('utf-8'))
+
+    for url in sorted(urls):
+        if url.startswith('/assets/'):
+            continue
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url}: status {response.status_code}')
+        write_file(directory, url, response.get_data())
+
+    shutil.copytree(os.path.join(root, 'assets'), os.path.join(directory, 'assets'))
+    shutil.copy(os.path.join(root, 'static', 'dash_static.js'), os.path.join(directory, '_static', 'dash_static.js'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='export the pages and all slider states as a static site')
+    parser.add_argument('directory', nargs='?', default=os.path.join(root, 'static_site'))
+    parser.add_argument('--jobs', type=int, default=os.cpu_count())
+    parser.add_argument('--backend', action='store_true',
+                        help='send the callback requests missing in the packs to the server (same origin)')
+    parser.add_argument('--partial', action='store_true',
+                        help='export without the callbacks missing in the packs (their outputs stay empty)')
+    options = parser.parse_args()
+
+    start = time.perf_counter()
+    callbacks = load_pages()
+    # callbacks answered by the backend only (or not at all)
+    dynamic = [callback_id for callback_ids in callbacks.values() for callback_id in callback_ids
+               if callback_id not in bakeable and 'callback' in app.callback_map[callback_id]]
+    if dynamic and not (options.backend or options.partial):
+        parser.error(f'no static responses for {", ".join(dynamic)}; send their requests to the server with '
+                     f'--backend or export without them with --partial')
+    client = app.server.test_client()
+
+    if os.path.exists(options.directory):
+        shutil.rmtree(options.directory)
+    os.makedirs(os.path.join(options.directory, '_static'))
+    export_frontend(client, options.directory)
+
+    pack_of = {callback_id: pack for pack, callback_ids in callbacks.items() for callback_id in callback_ids}
+    for callback_id, (_, states, _) in bakeable.items():
+        if callback_id in pack_of and sum(1 for _ in states()) > separate_pack_states:
+            pack_of[callback_id] += '-' + re.sub(r'[^\w-]+', '_', callback_id).strip('_')
+    writers = collections.OrderedDict()
+
+    def writer(pack):
+        if pack not in writers:
+            writers[pack] = PackWriter(options.directory, pack)
+        return writers[pack]
+
+    for key, response in route_responses(client).items():
+        writer('router').add(router_id, key, response)
+    with multiprocessing.Pool(options.jobs) as pool:
+        for callback_id, key, response in pool.imap(render, gen_tasks(), chunksize=16):
+            writer(pack_of[callback_id]).add(callback_id, key, response)
+
+    index = {'packs': {}, 'backend': options.backend}
+    for pack, pack_writer in writers.items():
+        pack_writer.close()
+        index['packs'].update({callback_id: pack for callback_id in pack_writer.index})
+        print(f'{pack:>32s}: {sum(map(len, pack_writer.index.values())):6d} responses '
+              f'{pack_writer.size / 2**20:8.2f} MB')
+    with open(os.path.join(options.directory, '_static', 'index.json'), 'w') as f:
+        json.dump(index, f)
+
+    if dynamic:
+        print(f'not exported ({"sent to the backend" if options.backend else "no update"}): {", ".join(dynamic)}')
+    print(f'exported {len(pages.routes)} routes in {time.perf_counter() - start:.1f} s to {options.directory}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# gunicorn settings, see Procfile
+import os
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+
+# the threads of a worker serve the cheap callbacks, while the CPU-heavy ones run in a bounded process
+# pool per worker (see apps/offload.py), the settings are read by the app when it is preloaded below
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+os.environ.setdefault('OFFLOAD_PROCESSES', str(max(1, (os.cpu_count() or 1) // workers)))
+
+# the listeners of the presenter mode (see apps/presenter.py) occupy a thread each in a gthread worker, at
+# most half of the threads are given to them, i.e. 4 per worker by default, the further followers poll
+# once per second; 'worker_connections' only applies to the gevent worker class, which is not installed
+# (see requirements.txt)
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+if worker_class == 'gthread':
+    os.environ.setdefault('PRESENTER_MAX_LISTENERS', str(threads // 2))
+
+# import the app once in the master, the workers are forked from it and share its memory (copy-on-write)
+preload_app = True
+
+
+def when_ready(server):
+    # build all pages (layouts, callbacks and distribution tables) in the master before the workers are
+    # forked, hence neither the workers nor respawned workers build them again
+    from index import pages
+    from apps.offload import start_forkserver
+    pages.load_all()
+    server.log.info(f'loaded all pages in the master:\n{pages.report()}')
+    # one forkserver of the offload processes per host, it imports the offloaded pages once (about 160 MB,
+    # which are not shared with the master) and the pool processes of all workers are forked from it
+    start_forkserver()
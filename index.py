@@ -1,35 +1,101 @@
 # -*- coding: utf-8 -*-
+import os
+import sys
+import time
+from urllib.parse import urlparse
+
+start = time.perf_counter()
+
 import dash_core_components as dcc
 import dash_html_components as html
 from dash.dependencies import Input, Output
+import flask
 
 from app import app
-from apps import (toc, normal_distribution, t_distribution, cohen_d, diagnostic_tests)
+from apps.coalesce import coalesce
+from apps.empirical import register_uploads
+from apps.metrics import instrument
+from apps.pages import PageRegistry
+from apps.presenter import register_presenter
+from apps.registry import distributions
+from apps.sessions import register_sessions
 
 server = app.server
 
+# browser sessions identified by a cookie, their server-side state is kept in apps/sessions.py
+register_sessions(server)
+
+# drop superseded and share identical concurrent callback requests
+coalesce(app)
+
+# per-callback latency and payload-size metrics at /metrics
+instrument(app)
+
+# the pages are imported on first request, see apps/pages.py, the distribution pages are generated
+# from the registry by apps/explorer.py
+routes = {
+    '/': 'toc',
+    '/toc': 'toc',
+    '/cohen_d': 'cohen_d',
+    '/power_analysis': 'power_analysis',
+    '/diagnostic_tests': 'diagnostic_tests',
+    '/hypothesis_test': 'hypothesis_test',
+    '/central_limit': 'central_limit',
+}
+routes.update({f'/{name}': f'explorer:{name}' for name in distributions})
+pages = PageRegistry(routes)
+pages.timings['app'] = time.perf_counter() - start
+
+# uploads of empirical datasets, the route has to exist before the first request
+register_uploads(server, pages=['cohen_d'])
+
+# presenter mode: the lecturer's slider state is pushed to the students following the session
+register_presenter(app, pages)
+
 app.layout = html.Div([
     dcc.Location(id='url', refresh=False),
     html.Div(id='page-content')
 ])
 
 
+@server.before_request
+def load_requested_page():
+    # the callbacks of a page have to be registered before the browser fetches the dependencies,
+    # requests for dash internals are attributed to the page they were sent from
+    path = flask.request.path
+    if path.startswith('/_dash-'):
+        path = urlparse(flask.request.referrer or '').path
+    pages.load(path)
+
+    # callback of a page not loaded yet by this worker and no (or a foreign) referrer
+    if flask.request.path == '/_dash-update-component':
+        # malformed bodies are rejected here, dash (and the wrappers of its endpoint) would fail with a 500
+        body = flask.request.get_json(silent=True)
+        output = body.get('output') if isinstance(body, dict) else None
+        if not isinstance(output, str):
+            flask.abort(400)
+        if output not in app.callback_map:
+            pages.load_all()
+
+
 @app.callback(Output('page-content', 'children'),
               [Input('url', 'pathname')])
 def display_page(pathname):
-    if pathname == '/' or pathname == '/toc':
-        return toc.layout
-    elif pathname == '/normal_distribution':
-        return normal_distribution.layout
-    elif pathname == '/t_distribution':
-        return t_distribution.layout
-    elif pathname == '/cohen_d':
-        return cohen_d.layout
-    elif pathname == '/diagnostic_tests':
-        return diagnostic_tests.layout
-    else:
+    page = pages.load(pathname)
+    if page is None:
         return "404"
+    return page.layout
+
+
+# optionally import all pages in the background right after startup
+if os.environ.get('PAGE_WARMUP', '0') == '1':
+    pages.warm_up()
 
 
 if __name__ == '__main__':
-    app.run_server(debug=True)
+    if '--timings' in sys.argv:
+        # startup-timing report: import time per page
+        pages.load_all()
+        print(pages.report())
+    else:
+        app.run_server(debug=True)
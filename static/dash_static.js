@@ -0,0 +1,92 @@
+// static export (see export.py): the callback requests of the dash front-end are answered from the data
+// packs of the pages, which hold the responses of all enumerable slider states; other requests (e.g.
+// clicks on a cdf or uploads) are sent to the backend if the export was built with one, and answered
+// with 204 (no update) otherwise
+(function() {
+    var originalFetch = window.fetch.bind(window);
+    var index = null;
+    var packs = {};
+
+    function getJSON(url) {
+        return originalFetch(url).then(function(response) {
+            return response.json();
+        });
+    }
+
+    // same as apps.figure_cache.static_key: numbers with 6 decimals (also within arrays and objects),
+    // objects with sorted keys, anything else as JSON
+    function canonicalValue(value) {
+        if (typeof value === 'number') {
+            return value.toFixed(6);
+        }
+        if (Array.isArray(value)) {
+            return '[' + value.map(canonicalValue).join(',') + ']';
+        }
+        if (value !== null && typeof value === 'object') {
+            return '{' + Object.keys(value).sort().map(function(key) {
+                return JSON.stringify(key) + ':' + canonicalValue(value[key]);
+            }).join(',') + '}';
+        }
+        return JSON.stringify(value === undefined ? null : value);
+    }
+
+    function staticKey(values) {
+        return values.map(canonicalValue).join(',');
+    }
+
+    // offset and length of the response in the pack, undefined if it is not in the export
+    function lookup(payload) {
+        if (index === null) {
+            index = getJSON('/_static/index.json');
+        }
+        return index.then(function(index) {
+            var pack = index.packs[payload.output];
+            if (pack === undefined) {
+                return undefined;
+            }
+            if (!(pack in packs)) {
+                packs[pack] = getJSON('/_static/' + pack + '.json');
+            }
+            return packs[pack].then(function(entries) {
+                var values = (payload.inputs || []).concat(payload.state || []).map(function(item) {
+                    return item.value;
+                });
+                var entry = entries[payload.output][staticKey(values)];
+                return entry === undefined ? undefined : {pack: pack, offset: entry[0], length: entry[1]};
+            });
+        });
+    }
+
+    // the zlib-compressed response, hosts ignoring the range get the whole pack (cached by the browser)
+    function load(entry) {
+        var last = entry.offset + entry.length - 1;
+        return originalFetch('/_static/' + entry.pack + '.bin', {
+            headers: {Range: 'bytes=' + entry.offset + '-' + last}
+        }).then(function(response) {
+            var partial = response.status === 206;
+            return response.arrayBuffer().then(function(buffer) {
+                return partial ? buffer : buffer.slice(entry.offset, last + 1);
+            });
+        }).then(function(buffer) {
+            var stream = new Blob([buffer]).stream().pipeThrough(new DecompressionStream('deflate'));
+            return new Response(stream, {status: 200, headers: {'Content-Type': 'application/json'}});
+        });
+    }
+
+    window.fetch = function(url, options) {
+        if (typeof url !== 'string' || url.indexOf('_dash-update-component') < 0) {
+            return originalFetch(url, options);
+        }
+        var payload = JSON.parse(options.body);
+        return Promise.all([lookup(payload), index]).then(function(results) {
+            var entry = results[0];
+            if (entry !== undefined && typeof DecompressionStream !== 'undefined') {
+                return load(entry);
+            }
+            if (results[1].backend) {
+                return originalFetch(url, options);
+            }
+            return new Response(null, {status: 204});
+        });
+    };
+})();
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import io
+
+import numpy as np
+import pytest
+from scipy.special import gamma
+
+from apps import bootstrap, empirical
+
+
+def gen_summary(values_1, values_2):
+    rows = ''.join(f'{a},{b}\n' for a, b in zip(values_1, values_2))
+    return empirical.DatasetSummary.from_csv(io.BytesIO(rows.encode('utf-8')))
+
+
+def gen_groups(summary):
+    return [(m.n, m.mean) + bootstrap.bin_moments(m, h) for m, h in zip(summary.moments, summary.histograms)]
+
+
+def cohen_d(values_1, values_2):
+    n_1, n_2 = len(values_1), len(values_2)
+    pooled = np.sqrt(((n_1 - 1) * np.var(values_1, ddof=1) + (n_2 - 1) * np.var(values_2, ddof=1)) /
+                     (n_1 + n_2 - 2))
+    return (np.mean(values_2) - np.mean(values_1)) / pooled
+
+
+def test_resample_d_row_level():
+    # integer values, every bin holds a single value: the resampled bin counts give the same d as the
+    # resampled rows
+    rng = np.random.default_rng(1)
+    values = [rng.integers(0, 10, 200), rng.integers(2, 12, 200)]
+    summary, _ = gen_summary(*values)
+    groups = gen_groups(summary)
+    d = bootstrap.resample_d(groups, 7, 50)
+
+    rng = np.random.default_rng(7)
+    for group, (n, _, probabilities, _, _) in enumerate(groups):
+        draws = rng.multinomial(n, probabilities, size=50)
+        histogram = summary.histograms[group]
+        bin_values = np.unique(values[group])
+        assert np.array_equal(np.flatnonzero(histogram.counts), np.unique(
+            ((bin_values - histogram.lo) / histogram.width).astype(int)))
+        values[group] = [np.repeat(bin_values, counts) for counts in draws]
+    assert d == pytest.approx([cohen_d(*rows) for rows in zip(*values)], rel=1e-9)
+
+
+def test_resample_d_interval():
+    # continuous values: the same percentile interval as the bootstrap of the rows
+    rng = np.random.default_rng(2)
+    values = [rng.normal(0., 1., 300), rng.gamma(2., 1., 300)]
+    summary, _ = gen_summary(*values)
+    d = bootstrap.resample_d(gen_groups(summary), 3, 4000)
+
+    rows = [[rng.choice(group, group.size) for group in values] for _ in range(4000)]
+    d_rows = np.array([cohen_d(*resample) for resample in rows])
+    assert np.mean(d) == pytest.approx(np.mean(d_rows), abs=0.01)
+    assert np.quantile(d, [0.025, 0.975]) == pytest.approx(np.quantile(d_rows, [0.025, 0.975]), abs=0.02)
+
+
+@pytest.mark.parametrize('df', [2, 5, 10, 50, 150])
+def test_hedges_correction(df):
+    exact = gamma(df / 2.) / (np.sqrt(df / 2.) * gamma((df - 1) / 2.))
+    assert empirical.hedges_correction(df) == pytest.approx(exact, rel=1e-12)
+    # the common approximation, accurate to O(1/df^2)
+    assert empirical.hedges_correction(df) == pytest.approx(1. - 3. / (4. * df - 1.), abs=0.05 / df**2)
+
+
+def test_hedges_correction_large_df():
+    # gamma overflows, the log-gamma does not
+    assert empirical.hedges_correction(10**6) == pytest.approx(1. - 3. / (4e6 - 1.), abs=1e-9)
+
+
+def test_hedges_g_interval(tmp_path, monkeypatch):
+    monkeypatch.setattr(bootstrap, 'upload_dir', str(tmp_path))
+    monkeypatch.setattr(empirical, 'upload_dir', str(tmp_path))
+    monkeypatch.setattr(bootstrap, 'bootstrap_resamples', 2000)
+    rng = np.random.default_rng(4)
+    summary, dataset_id = gen_summary(rng.normal(0., 1., 12), rng.normal(1., 1., 12))
+    summary.save(empirical.dataset_path(dataset_id))
+
+    ci = bootstrap.bootstrap_ci(dataset_id)
+    correction = empirical.hedges_correction(22)
+    assert summary.hedges_g() == pytest.approx(correction * summary.cohen_d())
+    assert ci['g'] == pytest.approx([correction * ci['d'][0], correction * ci['d'][1]])
+    assert ci['d'][0] < summary.cohen_d() < ci['d'][1]
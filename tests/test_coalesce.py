@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+from apps.coalesce import request_key
+from apps.sessions import session_outputs
+
+
+def test_session_outputs_not_shared_across_sessions():
+    body = {'output': 'test-session.data', 'inputs': [{'id': 'test', 'property': 'value', 'value': 0}]}
+    assert request_key(body, 'a') == request_key(body, 'b')
+    session_outputs.add('test-session.data')
+    try:
+        assert request_key(body, 'a') != request_key(body, 'b')
+        assert request_key(body, 'a') == request_key(body, 'a')
+    finally:
+        session_outputs.discard('test-session.data')
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+import json
+
+from apps import commons
+
+
+def test_template_follows_slim_figures(monkeypatch):
+    def size():
+        figure = commons.build_figure([commons.scatter(x=[0., 1.], y=[1., 0.])], {'template': 'ggplot2'})
+        return len(json.dumps(figure['layout']['template']))
+
+    monkeypatch.setattr(commons, 'slim_figures', True)
+    slim = size()
+    monkeypatch.setattr(commons, 'slim_figures', False)
+    assert size() > slim
+    monkeypatch.setattr(commons, 'slim_figures', True)
+    assert size() == slim
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+import os
+
+import numpy as np
+
+from apps import distributions
+
+
+def test_shared_arrays_remove_tables_of_other_sources(tmp_path, monkeypatch):
+    monkeypatch.setattr(distributions, 'shared_table_dir', str(tmp_path))
+    stale = tmp_path / ('0' * 40)
+    stale.mkdir()
+    (tmp_path / 'presenter').mkdir()
+    (tmp_path / 'sessions.sqlite').write_bytes(b'')
+
+    arrays = distributions.shared_arrays('test', lambda: {'values': np.arange(3.)})
+    assert list(arrays['values']) == [0., 1., 2.]
+    assert sorted(os.listdir(tmp_path)) == sorted([distributions.table_version, 'presenter', 'sessions.sqlite'])
+
+    # stored once, not built again
+    arrays = distributions.shared_arrays('test', lambda: {'values': np.zeros(3)})
+    assert list(arrays['values']) == [0., 1., 2.]
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+
+import numpy as np
+import pytest
+
+from apps import empirical
+
+csv = b'group,value\n' + b''.join(b'%s,%d\n' % (b'ab'[i % 2:i % 2 + 1], i % 7) for i in range(100))
+
+
+def test_dataset_found_after_upload_again(tmp_path, monkeypatch):
+    monkeypatch.setattr(empirical, 'upload_dir', str(tmp_path))
+    summary, dataset_id = empirical.DatasetSummary.from_csv(io.BytesIO(csv))
+    path = empirical.dataset_path(dataset_id)
+    summary.save(path)
+    assert empirical.load_dataset(dataset_id) is not None
+
+    # expired, the miss must not be cached
+    os.remove(path)
+    assert empirical.load_dataset(dataset_id) is None
+    summary.save(path)
+    assert empirical.load_dataset(dataset_id).names == ['a', 'b']
+
+
+def chunks(values, sizes):
+    # consecutive chunks of the given sizes
+    return np.split(values, np.cumsum(sizes)[:-1])
+
+
+def test_running_moments_chunked():
+    rng = np.random.default_rng(1)
+    # a large offset, where the sums of squares would cancel
+    values = 1e9 + rng.normal(0., 3., 10000)
+    moments = empirical.RunningMoments()
+    for chunk in chunks(values, [1, 2, 997, 3000, 6000]):
+        moments.update(chunk)
+    assert moments.n == values.size
+    assert moments.mean == pytest.approx(np.mean(values), rel=1e-15)
+    assert moments.variance == pytest.approx(np.var(values, ddof=1), rel=1e-9)
+
+    # merged in any order
+    first, second = empirical.RunningMoments(), empirical.RunningMoments()
+    first.update(values[:4000])
+    second.update(values[4000:])
+    second.merge(first)
+    assert second.variance == pytest.approx(np.var(values, ddof=1), rel=1e-9)
+
+
+def test_streaming_histogram_preserves_counts():
+    rng = np.random.default_rng(2)
+    # the range grows chunk by chunk, the bins are extended and merged
+    values = np.concatenate([rng.normal(0., 1., 1000), rng.normal(50., 10., 5000), rng.normal(-200., 1., 500)])
+    histogram = empirical.StreamingHistogram(max_bins=128)
+    for chunk in chunks(values, [1000, 5000, 500]):
+        histogram.update(chunk)
+    assert histogram.counts.size <= histogram.max_bins
+    assert histogram.counts.sum() == values.size
+    assert histogram.lo <= values.min() and values.max() < histogram.lo + histogram.counts.size * histogram.width
+    assert histogram.sums.sum() == pytest.approx(np.sum(values - histogram.ref))
+    assert histogram.squares.sum() == pytest.approx(np.sum((values - histogram.ref)**2))
+    assert np.array_equal(np.bincount(((values - histogram.lo) // histogram.width).astype(int),
+                                      minlength=histogram.counts.size), histogram.counts)
+
+
+@pytest.mark.parametrize('bandwidth', [0.01, 0.3, 2.])
+def test_binned_kde_integrates_to_one(bandwidth):
+    rng = np.random.default_rng(3)
+    histogram = empirical.StreamingHistogram()
+    histogram.update(rng.gamma(2., 1., 20000))
+    x, density = empirical.binned_kde(histogram, bandwidth)
+    assert np.all(density >= 0.)
+    assert np.sum(density) * histogram.width == pytest.approx(1., abs=1e-3)
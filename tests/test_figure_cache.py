@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+# the browser sends the slider states back as JSON, the baked responses have to be found for them
+import json
+
+from index import pages
+from bake import render
+from apps.figure_cache import BakedStore, bakeable, quantize
+
+
+def test_quantize_whole_numbers():
+    # the baked index is keyed by the repr of the quantized arguments
+    assert repr(quantize((2, 1.0, 1.2000000000000002))) == repr(quantize((2.0, 1, 1.2)))
+    assert quantize(True) is True
+
+
+def test_baked_lookup_after_json_round_trip(tmp_path):
+    pages.load('/cohen_d')
+    callback_id = 'fig-display.figure'
+    func, states, _ = bakeable[callback_id]
+    # the default state of the page, sent by the browser as [2, 1, 1]
+    args = next(tuple(args) for args in states() if tuple(args) == (2.0, 1.0, 1.0))
+
+    path = str(tmp_path / 'figures.bin')
+    BakedStore.write(path, 'test', [render((callback_id, args))])
+    store = BakedStore(path)
+
+    sent = json.loads(json.dumps([int(value) for value in args]))
+    assert store.get((callback_id, quantize(sent))) == func(*args).encode('utf-8')
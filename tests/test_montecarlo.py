@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from apps.montecarlo import ContingencySimulator, predictive_values
+from apps.roc import binormal_roc
+
+
+@pytest.mark.parametrize('prevalence, separation, cutoff', [(0.1, 2., 1.), (0.5, 1., 0.), (0.02, 3., 2.2)])
+def test_simulated_predictive_values(prevalence, separation, cutoff):
+    fpr, sensitivity = binormal_roc(separation, cutoff)
+    ppv, npv = predictive_values(prevalence, sensitivity, 1. - fpr)
+    simulator = ContingencySimulator(batch_size=2**16)
+    for n_samples in [10**4, 10**5, 10**6]:
+        for seed in range(3):
+            (tp, fp), (fn, tn) = simulator.simulate(n_samples, prevalence, separation, cutoff, seed=seed)
+            assert tp + fp + fn + tn == n_samples
+            # within 5 standard errors of the exact values, which shrink with the number of subjects
+            assert abs(tp / (tp + fp) - ppv) < 5. * np.sqrt(ppv * (1. - ppv) / (tp + fp))
+            assert abs(tn / (tn + fn) - npv) < 5. * np.sqrt(npv * (1. - npv) / (tn + fn))
+
+
+def test_simulate_cutoffs_at_once():
+    # the tables of several cutoffs from the same draws equal the tables of the single cutoffs
+    simulator = ContingencySimulator(batch_size=1000)
+    cutoffs = [-1., 0.4, 2.]
+    tables = simulator.simulate(2500, 0.3, 1.5, np.array(cutoffs), seed=5)
+    assert tables.shape == (3, 2, 2)
+    for cutoff, table in zip(cutoffs, tables):
+        assert np.array_equal(table, simulator.simulate(2500, 0.3, 1.5, cutoff, seed=5))
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+import scipy.optimize
+
+from apps.distributions import PowerTable, t_test_power
+
+alphas = [0.01, 0.05, 0.1]
+
+
+@pytest.fixture(scope='module')
+def power_table():
+    return PowerTable(alphas)
+
+
+def exact_sample_size(d, power, alpha, tails):
+    # root of the power of the noncentral t-distribution over the (fractional) n per group
+    return scipy.optimize.brentq(lambda n: t_test_power(2. * n - 2., d * np.sqrt(n / 2.), alpha, tails) - power,
+                                 2., 1e5, xtol=1e-8)
+
+
+@pytest.mark.parametrize('d, power, alpha, tails', [
+    (0.5, 0.8, 0.05, 2), (0.5, 0.8, 0.05, 1), (0.2, 0.9, 0.01, 2), (0.8, 0.8, 0.1, 1), (1.5, 0.95, 0.05, 2),
+])
+def test_sample_size(power_table, d, power, alpha, tails):
+    n = power_table.sample_size(d, power, alpha, tails)
+    assert n == pytest.approx(exact_sample_size(d, power, alpha, tails), rel=5e-3)
+    assert power_table(n, d, alpha, tails) == pytest.approx(power, abs=1e-6)
+    assert t_test_power(2. * n - 2., d * np.sqrt(n / 2.), alpha, tails) == pytest.approx(power, abs=1e-3)
+
+
+def test_sample_size_textbook(power_table):
+    # n per group for the power 0.8 at alpha 0.05 (Cohen's tables)
+    assert int(np.ceil(power_table.sample_size(0.5, 0.8, 0.05, 2))) == 64
+    assert int(np.ceil(power_table.sample_size(0.5, 0.8, 0.05, 1))) == 51
+    assert int(np.ceil(power_table.sample_size(0.8, 0.8, 0.05, 2))) == 26
+
+
+def test_sample_size_out_of_table(power_table):
+    assert power_table.sample_size(0.01, 0.8, 0.05, 2) == np.inf
+    # reached by the smallest n of the table (2 per group)
+    assert power_table.sample_size(20., 0.8, 0.05, 2) == 2.
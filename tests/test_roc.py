@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from apps.roc import binormal_roc, binormal_auc, trapezoid_auc, empirical_roc, empirical_auc, \
+    empirical_operating_points
+
+
+def test_empirical_roc_tied_scores():
+    # the tied scores of a sick and a healthy subject give one diagonal step
+    fpr, tpr, cutoffs = empirical_roc([3., 2., 2., 1.], [1, 1, 0, 0])
+    assert list(cutoffs) == [np.inf, 3., 2., 1.]
+    assert list(fpr) == [0., 0., 0.5, 1.]
+    assert list(tpr) == [0., 0.5, 1., 1.]
+    assert empirical_auc([3., 2., 2., 1.], [1, 1, 0, 0]) == pytest.approx(0.875)
+
+
+def test_empirical_auc_mann_whitney():
+    # with ties counted as one half
+    rng = np.random.default_rng(1)
+    labels = rng.random(300) < 0.4
+    scores = np.round(rng.normal(labels * 0.8, 1.), 1)
+    sick, healthy = scores[labels], scores[~labels]
+    pairs = (sick[:, np.newaxis] > healthy) + 0.5 * (sick[:, np.newaxis] == healthy)
+    assert empirical_auc(scores, labels) == pytest.approx(pairs.mean())
+
+    fpr, tpr, cutoffs = empirical_roc(scores, labels)
+    assert np.allclose(empirical_operating_points(scores, labels, cutoffs), (fpr, tpr))
+
+
+@pytest.mark.parametrize('separation, sigma_sick', [(0., 1.), (1., 1.), (2.5, 1.), (1., 2.)])
+def test_trapezoid_auc_binormal(separation, sigma_sick):
+    cutoffs = np.linspace(-12., 12. + separation, 20001)
+    fpr, tpr = binormal_roc(separation, cutoffs, sigma_sick=sigma_sick)
+    assert trapezoid_auc(fpr, tpr) == pytest.approx(binormal_auc(separation, sigma_sick=sigma_sick), abs=1e-6)